@@ -0,0 +1,111 @@
+import io
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import Any, Dict, List, Optional, Tuple
+
+from dependency_graph import DependencyGraph
+from http_transport import HttpTransport
+from maven_parser import MavenParser
+from package_filter import PackageFilter
+from pom_cache import PomCache
+from repository_backend import create_backend
+from traversal_policy import EdgeAttributes, TraversalPolicy, edge_attributes
+
+
+# Сколько пакетов отдавать процессу за одно обращение к пулу
+PROCESS_CHUNK_SIZE = 8
+
+# MavenParser рабочего процесса (создается инициализатором пула)
+_worker_parser: Optional[MavenParser] = None
+
+
+def create_maven_parser(settings: Dict[str, Any]) -> MavenParser:
+    """
+    Создает MavenParser по сериализуемым настройкам
+
+    Args:
+        settings: repository_url и необязательные cache_dir, cache_max_bytes,
+            offline, local_repository, mirrors, http_timeout, http_retries,
+            metadata_ttl, negative_ttl
+
+    Returns:
+        MavenParser со своим транспортом и кэшем
+    """
+    cache = None
+    if settings.get('cache_dir'):
+        cache = PomCache(settings['cache_dir'], max_bytes=settings.get('cache_max_bytes', 256 * 1024 * 1024))
+    transport = HttpTransport(timeout=settings.get('http_timeout', 30.0),
+                              max_retries=settings.get('http_retries', 3))
+    backend = create_backend(settings['repository_url'], transport,
+                             local_repository=settings.get('local_repository'),
+                             mirrors=settings.get('mirrors'))
+    return MavenParser(settings['repository_url'], cache=cache, offline=settings.get('offline', False),
+                       transport=transport, backend=backend,
+                       metadata_ttl=settings.get('metadata_ttl', 3600.0),
+                       negative_ttl=settings.get('negative_ttl', 600.0))
+
+
+def _init_worker(settings: Dict[str, Any]) -> None:
+    global _worker_parser
+    _worker_parser = create_maven_parser(settings)
+
+
+def _fetch_dependency_ids(package: str) -> Tuple[List[str], List[EdgeAttributes]]:
+    """Загружает и разбирает POM в рабочем процессе"""
+    with redirect_stdout(io.StringIO()):
+        dependencies = _worker_parser.get_direct_dependencies(package)
+    return (
+        [f"{dep['group_id']}:{dep['artifact_id']}:{dep['version']}" for dep in dependencies],
+        [edge_attributes(dep) for dep in dependencies]
+    )
+
+
+class BatchResolver:
+    """
+    Пакетное построение общего графа для многих корневых пакетов
+
+    Все корни обходятся одним BFS в общем DependencyGraph, поэтому общие
+    библиотеки загружаются один раз. При processes > 1 загрузка и разбор
+    POM-файлов каждого уровня распределяются по пулу процессов: каждый
+    процесс держит свой MavenParser (кэши parent-POM внутри процесса,
+    постоянный кэш на диске - общий).
+    """
+
+    def __init__(self, dependency_graph: DependencyGraph, parser_settings: Optional[Dict[str, Any]] = None,
+                 processes: int = 1):
+        self.dependency_graph = dependency_graph
+        self.parser_settings = parser_settings
+        self.processes = processes
+
+    def resolve(self, root_packages: List[str], filter_substring: str = "", max_depth: int = 10,
+                concurrency: int = 1, policy: Optional[TraversalPolicy] = None,
+                package_filter: Optional[PackageFilter] = None, mediation: bool = False) -> Dict[str, Any]:
+        """
+        Строит общий граф для корневых пакетов
+
+        Args:
+            root_packages: Корневые пакеты
+            filter_substring: Подстрока для исключения пакетов
+            max_depth: Максимальная глубина обхода
+            concurrency: Число потоков загрузки (без пула процессов)
+            policy: Политика обхода (None - следовать по всем ребрам)
+            package_filter: Правила включения и исключения пакетов
+            mediation: Разрешать конфликты версий (nearest wins)
+
+        Returns:
+            Dict с графом и статистикой
+        """
+        if self.processes <= 1 or not self.parser_settings:
+            return self.dependency_graph.build_dependency_graph_multi(
+                root_packages, filter_substring, max_depth, concurrency, policy=policy,
+                package_filter=package_filter, mediation=mediation
+            )
+
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                 initargs=(self.parser_settings,)) as executor:
+            return self.dependency_graph.build_dependency_graph_multi(
+                root_packages, filter_substring, max_depth,
+                fetch_many=lambda packages: executor.map(_fetch_dependency_ids, packages,
+                                                         chunksize=PROCESS_CHUNK_SIZE),
+                policy=policy, package_filter=package_filter, mediation=mediation
+            )
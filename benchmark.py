@@ -0,0 +1,1370 @@
+import argparse
+import fnmatch
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+import xml.etree.ElementTree as ET
+from collections import deque
+from contextlib import redirect_stdout
+
+from batch_resolver import BatchResolver
+from compact_graph import CompactGraph
+from dependency_graph import DependencyGraph
+from graph_generator import ROOT_PACKAGE, generate_graph, maven_coordinates, to_maven_artifacts, write_test_repository
+from http_transport import HttpTransport
+from maven_parser import MavenParser
+from mock_maven_server import POM_NAMESPACE, MockMavenRepository, write_repository
+from package_filter import PackageFilter
+from pom_cache import PomCache
+from profiler import DISABLED, Profiler
+from query_server import QueryService, create_server, server_url
+from repository_backend import ChainedBackend, HedgedBackend, HttpBackend, LocalBackend
+from test_repository import TestRepository
+from traversal_policy import TraversalPolicy
+from visualizer import PlantUMLVisualizer
+
+
+# Сценарии, результат которых разошелся с эталоном
+MISMATCHES = []
+
+
+def compare_status(matches: bool, label: str = '') -> str:
+    """
+    Возвращает отметку сравнения с эталоном и запоминает расхождения
+
+    Args:
+        matches: Совпал ли результат с эталоном
+        label: Описание проверки для итогового отчета
+
+    Returns:
+        "совпадает" или "ОТЛИЧАЕТСЯ"
+    """
+    if matches:
+        return "совпадает"
+    MISMATCHES.append(label)
+    return "ОТЛИЧАЕТСЯ"
+
+
+def make_maven_tree(levels: int, fan_out: int) -> dict:
+    """
+    Строит синтетическое дерево Maven-пакетов
+
+    Каждый пакет зависит от fan_out пакетов следующего уровня; последний
+    уровень пакетов не имеет зависимостей.
+    """
+    artifacts = {}
+    current = ["bench.root:root:1.0"]
+    for level in range(levels):
+        next_level = []
+        for index, package in enumerate(current):
+            deps = [f"bench.l{level + 1}:a{index * fan_out + i}:1.0" for i in range(fan_out)]
+            artifacts[package] = deps
+            next_level.extend(deps)
+        current = next_level
+    for package in current:
+        artifacts[package] = []
+    return artifacts
+
+
+def bench_concurrent_bfs(levels: int = 3, fan_out: int = 8, latency: float = 0.02,
+                         concurrency_levels=(1, 4, 16, 32)) -> None:
+    """Сравнение последовательного и параллельного построения графа"""
+    artifacts = make_maven_tree(levels, fan_out)
+    root = "bench.root:root:1.0"
+    print(f"BFS: {len(artifacts)} пакетов, задержка {latency * 1000:.0f} мс")
+
+    reference = None
+    with MockMavenRepository(artifacts, latency=latency) as repository:
+        for concurrency in concurrency_levels:
+            graph = DependencyGraph(maven_parser=MavenParser(repository.url))
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                graph.build_dependency_graph_bfs(root, max_depth=levels + 1, concurrency=concurrency)
+            elapsed = time.perf_counter() - started
+
+            snapshot = list(graph.graph.items())
+            if reference is None:
+                reference = snapshot
+            status = compare_status(snapshot == reference, f"bfs {concurrency}")
+            print(f"  concurrency={concurrency:<3} {elapsed:8.3f} с  граф {status}")
+
+
+def bench_persistent_cache(levels: int = 3, fan_out: int = 6, latency: float = 0.005) -> None:
+    """Холодный и теплый запуск с постоянным кэшем POM-файлов"""
+    artifacts = make_maven_tree(levels, fan_out)
+    root = "bench.root:root:1.0"
+    print(f"Кэш: {len(artifacts)} пакетов, задержка {latency * 1000:.0f} мс")
+
+    with tempfile.TemporaryDirectory() as cache_dir, \
+            MockMavenRepository(artifacts, latency=latency) as repository:
+        for run in ("холодный", "теплый", "офлайн"):
+            requests_before = repository.request_count
+            cache = PomCache(cache_dir)
+            parser = MavenParser(repository.url, cache=cache, offline=(run == "офлайн"))
+            graph = DependencyGraph(maven_parser=parser)
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                graph.build_dependency_graph_bfs(root, max_depth=levels + 1)
+            elapsed = time.perf_counter() - started
+            cache.close()
+            print(f"  {run:<9} {elapsed:8.3f} с  HTTP-запросов: {repository.request_count - requests_before}")
+
+
+def bench_transport(levels: int = 3, fan_out: int = 6, latency: float = 0.002) -> None:
+    """Переиспользование соединений и повторы при ошибках зеркала"""
+    artifacts = make_maven_tree(levels, fan_out)
+    root = "bench.root:root:1.0"
+    print(f"Транспорт: {len(artifacts)} пакетов, задержка {latency * 1000:.0f} мс")
+
+    for error_rate in (0.0, 0.1):
+        with MockMavenRepository(artifacts, latency=latency, error_rate=error_rate) as repository:
+            transport = HttpTransport(backoff_base=0.01)
+            graph = DependencyGraph(maven_parser=MavenParser(repository.url, transport=transport))
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                graph.build_dependency_graph_bfs(root, max_depth=levels + 1, concurrency=8)
+            elapsed = time.perf_counter() - started
+            host_stats = transport.stats()['127.0.0.1']
+            transport.close()
+            print(f"  ошибки {error_rate:.0%}: {elapsed:8.3f} с  пакетов {len(graph.graph)}, "
+                  f"запросов {repository.request_count}, соединений {repository.connection_count}, "
+                  f"повторов {int(host_stats.get('retries', 0))}")
+
+
+def make_realistic_pom(index: int, dependencies: int = 80, managed: int = 400, plugins: int = 30,
+                       namespaced: bool = True) -> str:
+    """
+    Формирует POM-файл, близкий по размеру и структуре к реальным
+
+    Содержит свойства, dependencyManagement, прямые зависимости и плагины
+    со своими зависимостями.
+    """
+    xmlns = ' xmlns="http://maven.apache.org/POM/4.0.0"' if namespaced else ''
+    parts = [f'<?xml version="1.0" encoding="UTF-8"?>\n<project{xmlns}>',
+             '<modelVersion>4.0.0</modelVersion>',
+             f'<groupId>bench.pom</groupId><artifactId>module{index}</artifactId><version>1.0</version>',
+             '<properties>']
+    parts.extend(f'<lib{i}.version>{i}.0</lib{i}.version>' for i in range(managed // 4))
+    parts.append('</properties><dependencyManagement><dependencies>')
+    parts.extend(f'<dependency><groupId>org.managed{i}</groupId><artifactId>managed{i}</artifactId>'
+                 f'<version>{i}.0</version></dependency>' for i in range(managed))
+    parts.append('</dependencies></dependencyManagement><dependencies>')
+    parts.extend(f'<dependency><groupId>org.lib{i}</groupId><artifactId>lib{i}</artifactId>'
+                 f'<version>{i}.0</version><scope>{"test" if i % 5 == 0 else "compile"}</scope>'
+                 f'<exclusions><exclusion><groupId>x</groupId><artifactId>y</artifactId></exclusion></exclusions>'
+                 f'</dependency>' for i in range(dependencies))
+    parts.append('</dependencies><build><plugins>')
+    parts.extend(f'<plugin><groupId>org.plugins</groupId><artifactId>plugin{i}</artifactId><version>1.0</version>'
+                 f'<configuration><options><option>-Xlint:all</option></options></configuration>'
+                 f'<dependencies><dependency><groupId>org.plugdep{i}</groupId><artifactId>dep{i}</artifactId>'
+                 f'<version>1.0</version></dependency></dependencies></plugin>' for i in range(plugins))
+    parts.append('</plugins></build></project>')
+    return '\n'.join(parts)
+
+
+def legacy_extract_dependencies(pom_content: str) -> list:
+    """Прежний разбор POM через ElementTree.fromstring и поиск по всему дереву"""
+    namespaces = {'ns': 'http://maven.apache.org/POM/4.0.0'}
+    root = ET.fromstring(pom_content)
+    dependencies = []
+    for dep in root.findall('.//ns:dependencies/ns:dependency', namespaces):
+        group_id_elem = dep.find('ns:groupId', namespaces)
+        artifact_id_elem = dep.find('ns:artifactId', namespaces)
+        version_elem = dep.find('ns:version', namespaces)
+        scope_elem = dep.find('ns:scope', namespaces)
+        if group_id_elem is not None and artifact_id_elem is not None:
+            dependencies.append({
+                'group_id': group_id_elem.text,
+                'artifact_id': artifact_id_elem.text,
+                'version': version_elem.text if version_elem is not None else 'UNKNOWN',
+                'scope': scope_elem.text if scope_elem is not None else 'compile'
+            })
+    return dependencies
+
+
+def bench_pom_parser(corpus_size: int = 200) -> None:
+    """Пропускная способность и пиковая память разбора POM-файлов"""
+    corpus = [make_realistic_pom(i, namespaced=(i % 10 != 0)) for i in range(corpus_size)]
+    total_bytes = sum(len(pom.encode('utf-8')) for pom in corpus)
+    print(f"Разбор POM: {corpus_size} файлов, средний размер {total_bytes / corpus_size / 1024:.1f} КБ")
+
+    parser = MavenParser()
+    for name, extract in (("ElementTree.fromstring", legacy_extract_dependencies),
+                          ("потоковый", lambda pom: parser.parse_pom(pom)['dependencies'])):
+        started = time.perf_counter()
+        found = sum(len(extract(pom)) for pom in corpus)
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        extract(corpus[1])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(f"  {name:<23} {total_bytes / elapsed / 1024 / 1024:7.1f} МБ/с  "
+              f"пик памяти {peak / 1024:8.1f} КБ  зависимостей {found}")
+
+
+def bench_parent_resolution(children: int = 300, managed: int = 500) -> None:
+    """Число загрузок и время при общем parent-POM с большим dependencyManagement"""
+    xmlns = 'xmlns="http://maven.apache.org/POM/4.0.0"'
+    parent = (f'<project {xmlns}><groupId>bench.parent</groupId><artifactId>parent</artifactId>'
+              f'<version>1.0</version><packaging>pom</packaging><properties><shared.version>7.0</shared.version>'
+              f'</properties><dependencyManagement><dependencies>'
+              + ''.join(f'<dependency><groupId>org.managed{i}</groupId><artifactId>managed{i}</artifactId>'
+                        f'<version>${{shared.version}}</version></dependency>' for i in range(managed))
+              + '</dependencies></dependencyManagement></project>')
+    poms = {"bench.parent:parent:1.0": parent}
+    for index in range(children):
+        poms[f"bench.child:child{index}:1.0"] = (
+            f'<project {xmlns}><parent><groupId>bench.parent</groupId><artifactId>parent</artifactId>'
+            f'<version>1.0</version></parent><groupId>bench.child</groupId><artifactId>child{index}</artifactId>'
+            f'<dependencies>'
+            + ''.join(f'<dependency><groupId>org.managed{i}</groupId><artifactId>managed{i}</artifactId>'
+                      f'</dependency>' for i in range(index % 10, managed, 50))
+            + '</dependencies></project>')
+    print(f"Наследование: {children} пакетов с общим parent ({managed} управляемых версий)")
+
+    with MockMavenRepository({}, poms=poms) as repository:
+        for memoized in (False, True):
+            parser = MavenParser(repository.url)
+            requests_before = repository.request_count
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                for index in range(children):
+                    if not memoized:
+                        parser.pom_resolver.clear()
+                    parser.get_direct_dependencies(f"bench.child:child{index}:1.0")
+            elapsed = time.perf_counter() - started
+            label = "с кэшем parent" if memoized else "без кэша parent"
+            print(f"  {label:<16} {elapsed:8.3f} с  HTTP-запросов: {repository.request_count - requests_before}")
+
+
+def make_random_graph(edge_count: int, average_degree: int = 5, seed: int = 1) -> dict:
+    """Случайный граф Maven-пакетов с заданным числом ребер"""
+    rng = random.Random(seed)
+    node_count = max(2, edge_count // average_degree)
+    names = [f"org.bench.group{i % 997}:artifact-{i}:1.{i % 13}.0" for i in range(node_count)]
+    graph = {}
+    for index in range(edge_count):
+        source = names[index // average_degree]
+        graph.setdefault(source, []).append(names[rng.randrange(node_count)])
+    return graph
+
+
+def _bfs_dict(graph: dict, root: str) -> int:
+    visited = {root}
+    queue = deque([root])
+    while queue:
+        for dep in graph.get(queue.popleft(), ()):
+            if dep not in visited:
+                visited.add(dep)
+                queue.append(dep)
+    return len(visited)
+
+
+def _bfs_compact(compact: CompactGraph, root: int) -> int:
+    offsets, targets = compact.forward_offsets, compact.forward_targets
+    visited = bytearray(compact.node_count)
+    visited[root] = 1
+    queue = deque([root])
+    count = 1
+    while queue:
+        node = queue.popleft()
+        for edge in range(offsets[node], offsets[node + 1]):
+            target = targets[edge]
+            if not visited[target]:
+                visited[target] = 1
+                count += 1
+                queue.append(target)
+    return count
+
+
+def bench_compact_graph(edge_counts=(10_000, 100_000, 1_000_000)) -> None:
+    """Память и скорость обхода: словарь списков строк против CSR"""
+    print("Компактный граф: память структуры (без самих строк) и полный BFS")
+    for edge_count in edge_counts:
+        source = make_random_graph(edge_count)
+        root = next(iter(source))
+
+        tracemalloc.start()
+        as_dict = {package: list(deps) for package, deps in source.items()}
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        compact = CompactGraph.from_adjacency(source)
+        compact_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        started = time.perf_counter()
+        reached_dict = _bfs_dict(as_dict, root)
+        dict_time = time.perf_counter() - started
+        started = time.perf_counter()
+        reached_compact = _bfs_compact(compact, compact.nodes.id(root))
+        compact_time = time.perf_counter() - started
+
+        status = compare_status(reached_dict == reached_compact, f"compact {edge_count}")
+        print(f"  {edge_count:>9} ребер: dict {dict_bytes / 1024 / 1024:7.2f} МБ, CSR {compact_bytes / 1024 / 1024:7.2f} МБ "
+              f"(массивы прямой и обратной смежности {compact.memory_usage() / 1024 / 1024:6.2f} МБ); "
+              f"BFS dict {dict_time:6.3f} с, CSR {compact_time:6.3f} с ({status})")
+
+
+def _legacy_reverse_closure(graph: dict, target: str, max_depth: int = 10) -> list:
+    """Прежний поиск: обратный граф строится заново на каждый запрос"""
+    reverse_graph = {}
+    for package, dependencies in graph.items():
+        for dep in dependencies:
+            reverse_graph.setdefault(dep, []).append(package)
+    visited = set()
+    queue = deque([(target, 0)])
+    while queue:
+        package, depth = queue.popleft()
+        if depth >= max_depth:
+            continue
+        for dependent in reverse_graph.get(package, ()):
+            if dependent not in visited:
+                visited.add(dependent)
+                queue.append((dependent, depth + 1))
+    return sorted(visited)
+
+
+def bench_reverse_queries(edge_count: int = 50_000, queries: int = 500, legacy_queries: int = 20) -> None:
+    """Массовые запросы обратных зависимостей (проверка уязвимостей)"""
+    graph = DependencyGraph()
+    for package, deps in make_random_graph(edge_count, seed=7).items():
+        graph._add_edges(package, deps)
+    targets = random.Random(3).sample(sorted(graph.reverse_graph), queries)
+    print(f"Обратные зависимости: {edge_count} ребер, {queries} целевых пакетов")
+
+    started = time.perf_counter()
+    for target in targets[:legacy_queries]:
+        _legacy_reverse_closure(graph.graph, target)
+    legacy = (time.perf_counter() - started) / legacy_queries
+
+    started = time.perf_counter()
+    single = {target: graph.get_all_reverse_dependencies_bfs(target) for target in targets}
+    indexed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = graph.get_all_reverse_dependencies_batch(targets)
+    batched = time.perf_counter() - started
+
+    status = compare_status(batch == single, "reverse")
+    print(f"  перестроение на запрос: {legacy * queries:8.3f} с (оценка по {legacy_queries} запросам)")
+    print(f"  индекс, по одному:      {indexed:8.3f} с")
+    print(f"  индекс, пакетно:        {batched:8.3f} с  результат {status}")
+
+
+def _legacy_explain(graph: dict, root: str, target: str):
+    """Прежний способ: обход от корня с запоминанием родителей для каждого пакета"""
+    parents = {root: None}
+    queue = deque([root])
+    while queue:
+        package = queue.popleft()
+        if package == target:
+            chain = []
+            while package is not None:
+                chain.append(package)
+                package = parents[package]
+            return chain[::-1]
+        for dep in graph.get(package, ()):
+            if dep not in parents:
+                parents[dep] = package
+                queue.append(dep)
+    return None
+
+
+def bench_why_queries(depth: int = 8, fan_out: int = 6, max_width: int = 4000, queries: int = 500,
+                      legacy_queries: int = 50) -> None:
+    """Объяснение попадания пакетов в граф: индекс предшественников против обхода на запрос"""
+    adjacency = generate_graph(depth=depth, fan_out=fan_out, diamond_density=0.5, cycle_rate=0.02,
+                               max_width=max_width, seed=11)
+    graph = DependencyGraph()
+    # Смежность подставляется как уже загруженные зависимости
+    graph.fetched = adjacency
+    with redirect_stdout(io.StringIO()):
+        graph.build_dependency_graph_bfs(ROOT_PACKAGE, max_depth=depth + 1)
+    targets = random.Random(5).sample(sorted(graph.depths), queries)
+    print(f"Цепочки зависимостей: {len(graph.graph)} пакетов, {queries} пакетов для объяснения")
+
+    started = time.perf_counter()
+    for target in targets[:legacy_queries]:
+        _legacy_explain(graph.graph, ROOT_PACKAGE, target)
+    legacy = (time.perf_counter() - started) / legacy_queries
+
+    started = time.perf_counter()
+    batch = graph.explain_dependencies_batch(targets)
+    batched = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for target in targets[:legacy_queries]:
+        graph.explain_dependency(target, max_paths=5)
+    k_paths = (time.perf_counter() - started) / legacy_queries
+
+    same_length = all(len(batch[target]) == len(_legacy_explain(graph.graph, ROOT_PACKAGE, target))
+                      for target in targets[:legacy_queries])
+    status = compare_status(same_length, "why")
+    print(f"  обход на запрос:          {legacy * queries:8.3f} с (оценка по {legacy_queries} запросам)")
+    print(f"  индекс, пакетно:          {batched:8.3f} с  длина цепочек {status}")
+    print(f"  5 кратчайших цепочек:     {k_paths * 1000:8.3f} мс на пакет")
+
+
+def make_chain_graph(edge_count: int, back_edge_every: int = 100, back_edge_span: int = 50) -> dict:
+    """Длинная цепочка зависимостей с периодическими обратными ребрами (циклами)"""
+    node_count = max(2, edge_count * back_edge_every // (back_edge_every + 1))
+    graph = {}
+    for index in range(node_count - 1):
+        deps = [f"chain:n{index + 1}:1.0"]
+        if index % back_edge_every == back_edge_every - 1:
+            deps.append(f"chain:n{max(0, index - back_edge_span)}:1.0")
+        graph[f"chain:n{index}:1.0"] = deps
+    return graph
+
+
+def legacy_detect_cycles(graph: dict) -> list:
+    """Прежний рекурсивный поиск циклов с копированием пути на каждом ребре"""
+    visited = set()
+    recursion_stack = set()
+    cycles = []
+
+    def dfs_cycle_detection(node, path):
+        if node in recursion_stack:
+            cycle = path[path.index(node):]
+            if cycle not in cycles:
+                cycles.append(cycle)
+            return
+        if node in visited:
+            return
+        visited.add(node)
+        recursion_stack.add(node)
+        path.append(node)
+        for neighbor in graph.get(node, ()):
+            dfs_cycle_detection(neighbor, path.copy())
+        recursion_stack.remove(node)
+        path.pop()
+
+    for node in graph:
+        if node not in visited:
+            dfs_cycle_detection(node, [])
+    return cycles
+
+
+def bench_cycle_detection(edge_counts=(1_000, 10_000, 100_000, 1_000_000)) -> None:
+    """Масштабирование поиска циклов: рекурсивный DFS против SCC Тарьяна"""
+    print("Поиск циклов на длинных цепочках с обратными ребрами")
+    for edge_count in edge_counts:
+        graph = DependencyGraph()
+        graph.graph = make_chain_graph(edge_count)
+
+        started = time.perf_counter()
+        try:
+            legacy = f"{len(legacy_detect_cycles(graph.graph))} циклов за {time.perf_counter() - started:.3f} с"
+        except RecursionError:
+            legacy = "RecursionError"
+
+        started = time.perf_counter()
+        components = graph.find_cyclic_components()
+        cycles = graph.detect_cycles(max_cycles_per_component=5)
+        elapsed = time.perf_counter() - started
+        print(f"  {edge_count:>9} ребер: прежний {legacy:<24} SCC {len(components)} компонент, "
+              f"{len(cycles)} циклов за {elapsed:.3f} с")
+
+
+def legacy_build_layers(graph: dict) -> list:
+    """Прежний скрипт: слой за слоем отбираются пакеты, все зависимости которых уже размещены"""
+    placed = set()
+    remaining = set(graph) | {dep for deps in graph.values() for dep in deps}
+    layers = []
+    while remaining:
+        layer = [package for package in remaining if all(dep in placed for dep in graph.get(package, ()))]
+        if not layer:
+            raise ValueError("цикл в графе")
+        placed.update(layer)
+        remaining.difference_update(layer)
+        layers.append(layer)
+    return layers
+
+
+def bench_build_layers(edge_counts=(10_000, 100_000, 1_000_000), legacy_limit: int = 100_000,
+                       chain_edges: int = 300_000) -> None:
+    """Слои сборки: конденсация по SCC против послойного отбора пакетов"""
+    print("Слои сборки на слоистых графах с ромбами и на длинной цепочке с циклами")
+    for edge_count in edge_counts:
+        adjacency = make_diamond_graph(50, edge_count // 100)
+        graph = _fresh_graph(adjacency)
+        edges = sum(len(deps) for deps in adjacency.values())
+
+        legacy = "пропущен"
+        if edges <= legacy_limit:
+            started = time.perf_counter()
+            legacy_layers = legacy_build_layers(adjacency)
+            legacy = f"{len(legacy_layers)} слоев за {time.perf_counter() - started:.3f} с"
+
+        started = time.perf_counter()
+        layers = graph.get_build_layers()
+        elapsed = time.perf_counter() - started
+        print(f"  {edges:>9} ребер: прежний {legacy:<24} SCC {len(layers['layers'])} слоев, "
+              f"ширина до {max(layers['widths'])} за {elapsed:.3f} с")
+
+    graph = _fresh_graph(make_chain_graph(chain_edges))
+    started = time.perf_counter()
+    layers = graph.get_build_layers()
+    print(f"  цепочка {chain_edges} ребер с циклами: {len(layers['layers'])} слоев, "
+          f"критический путь {layers['critical_path_length']} за {time.perf_counter() - started:.3f} с")
+
+
+def make_diamond_graph(layers: int, width: int, fan_out: int = 2, seed: int = 5) -> dict:
+    """Слоистый граф с ромбами: каждый пакет зависит от нескольких пакетов следующего слоя"""
+    rng = random.Random(seed)
+    graph = {"diamond:root:1.0": [f"diamond:l0n{i}:1.0" for i in range(min(width, fan_out))]}
+    for layer in range(layers - 1):
+        for index in range(width):
+            graph[f"diamond:l{layer}n{index}:1.0"] = [
+                f"diamond:l{layer + 1}n{rng.randrange(width)}:1.0" for _ in range(fan_out)
+            ]
+    return graph
+
+
+def legacy_all_dependencies(graph: dict, package: str, visited=None) -> set:
+    """Прежний рекурсивный обход с копированием visited на каждом вызове"""
+    if visited is None:
+        visited = set()
+    if package in visited:
+        return set()
+    visited.add(package)
+    result = set()
+    for dep in graph.get(package, ()):
+        result.add(dep)
+        result.update(legacy_all_dependencies(graph, dep, visited.copy()))
+    return result
+
+
+def bench_transitive_closure(layer_counts=(8, 12, 16, 20, 200), width: int = 4) -> None:
+    """Транзитивные зависимости на графах с большим числом ромбов"""
+    print("Транзитивное замыкание на слоистых графах с ромбами")
+    for layers in layer_counts:
+        graph = DependencyGraph()
+        graph.graph = make_diamond_graph(layers, width)
+        root = "diamond:root:1.0"
+
+        if layers <= 20:
+            started = time.perf_counter()
+            expected = legacy_all_dependencies(graph.graph, root)
+            legacy = f"{time.perf_counter() - started:8.3f} с"
+        else:
+            expected, legacy = None, "   пропущен"
+
+        started = time.perf_counter()
+        closure = graph.get_all_dependencies(root)
+        queries = sum(graph.depends_on(package, root) for package in graph.graph)
+        elapsed = time.perf_counter() - started
+
+        status = "" if expected is None else compare_status(closure == expected, f"closure {layers}")
+        print(f"  {layers:>4} слоев ({len(graph.graph)} пакетов): прежний {legacy}, замыкание и "
+              f"{len(graph.graph)} запросов {elapsed:8.3f} с {status}")
+
+
+def bench_incremental_rebuild(levels: int = 3, fan_out: int = 8, latency: float = 0.01) -> None:
+    """Интерактивная смена глубины и фильтра: полное перестроение против инкрементального"""
+    artifacts = make_maven_tree(levels, fan_out)
+    root = "bench.root:root:1.0"
+    steps = [("", 2), ("", 3), ("", 5), ("bench.l2", 5), ("", 3)]
+    print(f"Инкрементальное перестроение: {len(artifacts)} пакетов, шаги {steps}")
+
+    with MockMavenRepository(artifacts, latency=latency) as repository:
+        for incremental in (False, True):
+            requests_before = repository.request_count
+            graph = None
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                for filter_substring, depth in steps:
+                    if graph is None or not incremental:
+                        graph = DependencyGraph(maven_parser=MavenParser(repository.url))
+                    graph.build_dependency_graph_bfs(root, filter_substring, depth, concurrency=8)
+            elapsed = time.perf_counter() - started
+            label = "инкрементально" if incremental else "с нуля"
+            print(f"  {label:<15} {elapsed:8.3f} с  HTTP-запросов: {repository.request_count - requests_before}")
+
+
+def make_conflicting_tree(levels: int = 4, width: int = 12, fan_out: int = 4, versions: int = 3,
+                          seed: int = 7) -> dict:
+    """
+    Синтетический репозиторий с конфликтами версий
+
+    На каждом уровне width артефактов в versions версиях; каждая версия
+    зависит от fan_out случайных артефактов следующего уровня в случайных версиях.
+    """
+    rng = random.Random(seed)
+
+    def pick(level):
+        return f"bench.l{level}:a{rng.randrange(width)}:{rng.randrange(versions) + 1}.0"
+
+    artifacts = {"bench.root:root:1.0": [pick(0) for _ in range(fan_out)]}
+    for level in range(levels):
+        for index in range(width):
+            for version in range(1, versions + 1):
+                package = f"bench.l{level}:a{index}:{version}.0"
+                artifacts[package] = [pick(level + 1) for _ in range(fan_out)] if level + 1 < levels else []
+    return artifacts
+
+
+def bench_version_mediation(levels: int = 6, width: int = 30, fan_out: int = 5, versions: int = 5) -> None:
+    """Сырые версии против посредничества nearest wins"""
+    artifacts = make_conflicting_tree(levels, width, fan_out, versions)
+    root = "bench.root:root:1.0"
+    print(f"Посредничество версий: {len(artifacts)} артефактов, {versions} версии каждого")
+
+    with MockMavenRepository(artifacts) as repository:
+        for mediation in (False, True):
+            requests_before = repository.request_count
+            graph = DependencyGraph(maven_parser=MavenParser(repository.url))
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                graph.build_dependency_graph_bfs(root, max_depth=levels + 1, concurrency=8, mediation=mediation)
+            elapsed = time.perf_counter() - started
+            label = "nearest wins" if mediation else "без разрешения"
+            print(f"  {label:<15} {elapsed:8.3f} с  узлов: {len(graph.visited):>4}  "
+                  f"HTTP-запросов: {repository.request_count - requests_before:>4}  "
+                  f"конфликтов: {len(graph.conflicts)}")
+
+
+def bench_local_repository(levels: int = 3, fan_out: int = 8, latency: float = 0.005,
+                           local_share: float = 0.8) -> None:
+    """Удаленный репозиторий против локального (~/.m2) и цепочки локальный -> удаленный"""
+    artifacts = make_maven_tree(levels, fan_out)
+    root = "bench.root:root:1.0"
+    rng = random.Random(3)
+    partial = {package: deps for package, deps in artifacts.items() if rng.random() < local_share}
+    print(f"Локальный репозиторий: {len(artifacts)} пакетов, задержка сети {latency * 1000:.0f} мс, "
+          f"в частичном локальном {len(partial)}")
+
+    with tempfile.TemporaryDirectory() as full_dir, tempfile.TemporaryDirectory() as partial_dir, \
+            MockMavenRepository(artifacts, latency=latency) as repository:
+        write_repository(artifacts, full_dir)
+        write_repository(partial, partial_dir)
+        backends = [
+            ("HTTP", lambda: HttpBackend(repository.url)),
+            ("локальный", lambda: LocalBackend(full_dir)),
+            ("цепочка", lambda: ChainedBackend([LocalBackend(partial_dir), HttpBackend(repository.url)])),
+        ]
+
+        reference = None
+        for label, make_backend in backends:
+            requests_before = repository.request_count
+            graph = DependencyGraph(maven_parser=MavenParser(repository.url, backend=make_backend()))
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                graph.build_dependency_graph_bfs(root, max_depth=levels + 1)
+            elapsed = time.perf_counter() - started
+
+            snapshot = list(graph.graph.items())
+            if reference is None:
+                reference = snapshot
+            status = compare_status(snapshot == reference, f"local {label}")
+            print(f"  {label:<10} {elapsed:8.3f} с  HTTP-запросов: {repository.request_count - requests_before:>4}"
+                  f"  граф {status}")
+
+
+def make_services(services: int, levels: int = 3, fan_out: int = 6, libraries_per_service: int = 4,
+                  seed: int = 11) -> dict:
+    """Набор сервисов, каждый из которых зависит от нескольких общих библиотек"""
+    rng = random.Random(seed)
+    artifacts = make_maven_tree(levels, fan_out)
+    libraries = [package for package in artifacts if not package.startswith("bench.root:")]
+    for index in range(services):
+        artifacts[f"bench.svc:s{index}:1.0"] = rng.sample(libraries, libraries_per_service)
+    return artifacts
+
+
+def bench_batch_roots(services: int = 40, latency: float = 0.002, processes: int = 4) -> None:
+    """Отдельный граф на каждый сервис против общего графа для всех корней"""
+    artifacts = make_services(services)
+    roots = [package for package in artifacts if package.startswith("bench.svc:")]
+    print(f"Пакетный режим: {len(roots)} корней, {len(artifacts)} пакетов, задержка {latency * 1000:.0f} мс")
+
+    with MockMavenRepository(artifacts, latency=latency) as repository:
+        requests_before = repository.request_count
+        started = time.perf_counter()
+        separate = {}
+        with redirect_stdout(io.StringIO()):
+            for root in roots:
+                graph = DependencyGraph(maven_parser=MavenParser(repository.url))
+                graph.build_dependency_graph_bfs(root, concurrency=8)
+                separate[root] = len(graph.get_all_dependencies(root))
+        elapsed = time.perf_counter() - started
+        print(f"  {'по одному':<18} {elapsed:8.3f} с  HTTP-запросов: {repository.request_count - requests_before}")
+
+        settings = {'repository_url': repository.url}
+        for label, resolver_processes in (("общий граф", 1), (f"общий, {processes} проц.", processes)):
+            requests_before = repository.request_count
+            graph = DependencyGraph(maven_parser=MavenParser(repository.url))
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                BatchResolver(graph, settings, processes=resolver_processes).resolve(roots, concurrency=8)
+                summary = graph.get_roots_summary(roots)
+            elapsed = time.perf_counter() - started
+            status = compare_status(all(item['transitive'] == separate[item['root']] for item in summary),
+                                    f"batch {label}")
+            print(f"  {label:<18} {elapsed:8.3f} с  HTTP-запросов: {repository.request_count - requests_before}"
+                  f"  сводка {status}")
+
+
+def bench_graph_snapshot(edge_counts=(100_000, 1_000_000), queries: int = 100) -> None:
+    """Сохранение графа в снимок и открытие через mmap против перестроения словаря"""
+    print("Бинарные снимки графа")
+    for edge_count in edge_counts:
+        source = DependencyGraph()
+        source.graph = make_random_graph(edge_count)
+        rng = random.Random(2)
+        targets = rng.sample(list(source.graph), queries)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "graph.snapshot")
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                source.save_snapshot(path)
+            save_elapsed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            CompactGraph.from_adjacency(source.graph)
+            rebuild_elapsed = time.perf_counter() - started
+
+            loaded = DependencyGraph()
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                loaded.load_snapshot(path)
+            load_elapsed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            answers = [loaded.get_reverse_dependencies(target) for target in targets]
+            query_elapsed = time.perf_counter() - started
+
+            expected = [source.get_reverse_dependencies(target) for target in targets]
+            status = compare_status(answers == expected, f"snapshot {edge_count}")
+            size = os.path.getsize(path)
+            loaded.snapshot.close()
+
+        print(f"  {edge_count:>9} ребер: запись {save_elapsed:6.3f} с ({size / 2**20:.1f} МБ), "
+              f"CSR из словаря {rebuild_elapsed:6.3f} с, открытие снимка {load_elapsed * 1000:7.2f} мс, "
+              f"{queries} запросов {query_elapsed:6.3f} с {status}")
+
+
+def write_adjacency_file(path: str, packages: int, fan_out: int = 5, seed: int = 4) -> None:
+    """Синтетический файл смежности в формате TestRepository"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for index in range(packages):
+            deps = ", ".join(f"pkg{rng.randrange(packages)}" for _ in range(fan_out))
+            f.write(f"pkg{index}: {deps}\n")
+
+
+def bench_indexed_test_repository(packages: int = 300_000, depth: int = 2) -> None:
+    """Полная загрузка файла смежности против индекса строк для неглубокого BFS"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "adjacency.txt")
+        write_adjacency_file(path, packages)
+        print(f"Тестовый репозиторий: {packages} строк, {os.path.getsize(path) / 2**20:.1f} МБ, BFS глубины {depth}")
+
+        reference = None
+        for label, indexed in (("целиком", False), ("индекс (построение)", True), ("индекс (с диска)", True)):
+            tracemalloc.start()
+            started = time.perf_counter()
+            repository = TestRepository(path, indexed=indexed)
+            repository.load_test_repository()
+            opened = time.perf_counter() - started
+            graph = DependencyGraph(test_repository=repository)
+            with redirect_stdout(io.StringIO()):
+                graph.build_dependency_graph_bfs("pkg0", max_depth=depth)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            snapshot = list(graph.graph.items())
+            if reference is None:
+                reference = snapshot
+            status = compare_status(snapshot == reference, f"testrepo {label}")
+            print(f"  {label:<20} открытие {opened:7.3f} с, всего {elapsed:7.3f} с, "
+                  f"пик {peak / 2**20:7.1f} МБ  граф {status}")
+
+
+def make_scoped_repository(levels: int = 5, width: int = 40, fan_out: int = 6, seed: int = 9) -> dict:
+    """
+    POM-файлы с областями видимости, optional и exclusions
+
+    Каждый артефакт зависит от fan_out артефактов следующего уровня; часть
+    зависимостей объявлена как test или provided, часть - optional, а
+    некоторые ребра исключают одну из зависимостей своего потомка.
+    """
+    rng = random.Random(seed)
+    scopes = ['compile', 'compile', 'compile', 'runtime', 'test', 'provided']
+    graph = {"bench.root:root:1.0": [f"bench.l0:a{index}:1.0" for index in rng.sample(range(width), fan_out)]}
+    for level in range(levels):
+        for index in range(width):
+            graph[f"bench.l{level}:a{index}:1.0"] = [
+                f"bench.l{level + 1}:a{child}:1.0" for child in rng.sample(range(width), fan_out)
+            ] if level + 1 < levels else []
+
+    poms = {}
+    for package, deps in graph.items():
+        group_id, artifact_id, version = package.split(':')
+        lines = [f'<project xmlns="{POM_NAMESPACE}">', f'  <groupId>{group_id}</groupId>',
+                 f'  <artifactId>{artifact_id}</artifactId>', f'  <version>{version}</version>',
+                 '  <dependencies>']
+        for dep in deps:
+            dep_group, dep_artifact, dep_version = dep.split(':')
+            lines.append(f'    <dependency><groupId>{dep_group}</groupId><artifactId>{dep_artifact}</artifactId>'
+                         f'<version>{dep_version}</version><scope>{rng.choice(scopes)}</scope>')
+            if rng.random() < 0.15:
+                lines.append('      <optional>true</optional>')
+            grandchildren = graph.get(dep, [])
+            if grandchildren and rng.random() < 0.2:
+                excluded_group, excluded_artifact, _ = rng.choice(grandchildren).split(':')
+                lines.append(f'      <exclusions><exclusion><groupId>{excluded_group}</groupId>'
+                             f'<artifactId>{excluded_artifact}</artifactId></exclusion></exclusions>')
+            lines.append('    </dependency>')
+        lines.extend(['  </dependencies>', '</project>'])
+        poms[package] = '\n'.join(lines)
+    return poms
+
+
+def bench_scoped_traversal(levels: int = 5, width: int = 40, fan_out: int = 6, latency: float = 0.002) -> None:
+    """Обход по всем ребрам против политики областей видимости Maven"""
+    poms = make_scoped_repository(levels, width, fan_out)
+    root = "bench.root:root:1.0"
+    print(f"Политика обхода: {len(poms)} артефактов, задержка {latency * 1000:.0f} мс")
+
+    policies = [
+        ("все ребра", None),
+        ("compile,runtime", TraversalPolicy({'compile', 'runtime'})),
+        ("compile", TraversalPolicy({'compile'})),
+    ]
+    with MockMavenRepository({}, latency=latency, poms=poms) as repository:
+        for label, policy in policies:
+            requests_before = repository.request_count
+            graph = DependencyGraph(maven_parser=MavenParser(repository.url))
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                graph.build_dependency_graph_bfs(root, max_depth=levels + 1, concurrency=8, policy=policy)
+            elapsed = time.perf_counter() - started
+            print(f"  {label:<16} {elapsed:8.3f} с  узлов: {len(graph.visited):>4}  "
+                  f"HTTP-запросов: {repository.request_count - requests_before:>4}  "
+                  f"отброшено ребер: {graph.pruned_edges}")
+
+
+def bench_profiler_overhead(levels: int = 3, fan_out: int = 8, corpus_size: int = 100, repeats: int = 3) -> None:
+    """Стоимость инструментирования: выключенный и включенный профилировщик"""
+    artifacts = make_maven_tree(levels, fan_out)
+    root = "bench.root:root:1.0"
+    corpus = [make_realistic_pom(index) for index in range(corpus_size)]
+    print(f"Профилировщик: {len(artifacts)} пакетов, разбор {corpus_size} POM x {repeats}")
+
+    with MockMavenRepository(artifacts) as repository:
+        for label, make_profiler in (("выключен", lambda: DISABLED), ("включен", Profiler)):
+            profiler = make_profiler()
+            parser = MavenParser(repository.url, profiler=profiler)
+            started = time.perf_counter()
+            for _ in range(repeats):
+                for content in corpus:
+                    parser.parse_pom(content)
+            parse_elapsed = time.perf_counter() - started
+
+            graph = DependencyGraph(maven_parser=parser, profiler=profiler)
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                graph.build_dependency_graph_bfs(root, max_depth=levels + 1, concurrency=8)
+            bfs_elapsed = time.perf_counter() - started
+            print(f"  {label:<10} разбор {parse_elapsed:8.3f} с  BFS {bfs_elapsed:8.3f} с  "
+                  f"метрик: {len(profiler.report().get('histograms', {}))} гистограмм")
+
+
+def legacy_filter_accepts(package: str, group_prefixes: list, globs: list, substrings: list) -> bool:
+    """Исключение пакета перебором правил по одному"""
+    group_id = package.split(':', 1)[0]
+    for prefix in group_prefixes:
+        if group_id == prefix or group_id.startswith(prefix + '.'):
+            return False
+    for pattern in globs:
+        if fnmatch.fnmatchcase(package, pattern):
+            return False
+    for substring in substrings:
+        if substring in package:
+            return False
+    return True
+
+
+def bench_package_filter(packages: int = 40_000, rules: int = 60, occurrences: int = 5, seed: int = 13) -> None:
+    """Перебор правил фильтра против скомпилированного фильтра"""
+    rng = random.Random(seed)
+    groups = [f"org.vendor{index}.lib{index % 7}" for index in range(200)]
+    ids = [f"{rng.choice(groups)}:a{index}:{rng.randrange(5)}.{rng.randrange(10)}"
+           + ("-SNAPSHOT" if rng.random() < 0.05 else "") for index in range(packages)]
+    # Зависимость встречается в графе несколько раз (у разных родителей)
+    stream = [ids[rng.randrange(packages)] for _ in range(packages * occurrences)]
+
+    group_prefixes = [f"org.vendor{index}" for index in range(0, rules // 2)]
+    globs = [f"*:*:{index}.*-SNAPSHOT" for index in range(5)] + [f"org.vendor1{index}.*:a1*:*" for index in range(rules // 4)]
+    substrings = [f"lib{index}:a9" for index in range(rules - len(group_prefixes) - len(globs))]
+    print(f"Фильтр пакетов: {len(group_prefixes) + len(globs) + len(substrings)} правил, "
+          f"{len(stream)} проверок ({packages} разных пакетов)")
+
+    started = time.perf_counter()
+    legacy = [legacy_filter_accepts(package, group_prefixes, globs, substrings) for package in stream]
+    legacy_elapsed = time.perf_counter() - started
+
+    package_filter = PackageFilter(exclude=[f"group:{prefix}" for prefix in group_prefixes]
+                                   + [f"glob:{pattern}" for pattern in globs]
+                                   + [f"contains:{substring}" for substring in substrings])
+    started = time.perf_counter()
+    compiled = [package_filter.accepts(package) for package in stream]
+    compiled_elapsed = time.perf_counter() - started
+
+    status = compare_status(legacy == compiled, "filter")
+    print(f"  перебор правил  {legacy_elapsed:8.3f} с")
+    print(f"  скомпилированный {compiled_elapsed:7.3f} с  ({legacy_elapsed / compiled_elapsed:.1f}x), "
+          f"принято {sum(compiled)}, результат {status}")
+
+
+def make_ranged_tree(libraries: int = 60, versions: int = 8, fan_out: int = 5, missing: int = 10,
+                     seed: int = 17) -> tuple:
+    """
+    Репозиторий, где зависимости объявлены диапазонами и LATEST/RELEASE
+
+    Каждая библиотека публикуется в versions версиях; сервисы ссылаются на
+    библиотеки диапазонами, а также на missing несуществующих артефактов.
+    """
+    rng = random.Random(seed)
+    artifacts = {f"bench.lib:l{index}:{version}.0": [] for index in range(libraries)
+                 for version in range(1, versions + 1)}
+    poms = {}
+    for service in range(libraries):
+        package = f"bench.svc:s{service}:1.0"
+        dependencies = []
+        for _ in range(fan_out):
+            low = rng.randrange(1, versions)
+            spec = rng.choice([f"[{low}.0,{low + 2}.0)", f"[{low}.0,)", "LATEST", "RELEASE"])
+            dependencies.append((f"bench.lib:l{rng.randrange(libraries)}", spec))
+        dependencies += [(f"bench.missing:m{rng.randrange(missing)}", "[1.0,2.0)") for _ in range(2)]
+        body = ''.join(f'<dependency><groupId>{ga.split(":")[0]}</groupId><artifactId>{ga.split(":")[1]}'
+                       f'</artifactId><version>{spec}</version></dependency>' for ga, spec in dependencies)
+        poms[package] = (f'<project xmlns="{POM_NAMESPACE}"><groupId>bench.svc</groupId>'
+                         f'<artifactId>s{service}</artifactId><version>1.0</version>'
+                         f'<dependencies>{body}</dependencies></project>')
+    return artifacts, poms
+
+
+def bench_version_ranges(libraries: int = 60, latency: float = 0.002) -> None:
+    """Разрешение диапазонов версий: повторные сборки с кэшем метаданных и без него"""
+    artifacts, poms = make_ranged_tree(libraries)
+    roots = list(poms)
+    print(f"Диапазоны версий: {len(roots)} сервисов, {len(artifacts)} версий библиотек, задержка {latency * 1000:.0f} мс")
+
+    with MockMavenRepository(artifacts, latency=latency, poms=poms) as repository:
+        for label, negative_ttl, metadata_ttl in (("без кэша метаданных", 0.0, 0.0),
+                                                  ("TTL и отрицательный кэш", 600.0, 3600.0)):
+            parser = MavenParser(repository.url, metadata_ttl=metadata_ttl, negative_ttl=negative_ttl)
+            requests_before = repository.request_count
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                for _ in range(3):
+                    parser.dependencies_cache.clear()
+                    graph = DependencyGraph(maven_parser=parser)
+                    graph.build_dependency_graph_multi(roots, max_depth=2, concurrency=8)
+            elapsed = time.perf_counter() - started
+            print(f"  {label:<24} {elapsed:8.3f} с  HTTP-запросов за 3 сборки: "
+                  f"{repository.request_count - requests_before:>5}  пакетов: {len(graph.graph)}")
+
+
+def bench_query_server(depth: int = 4, fan_out: int = 5, latency: float = 0.002, queries: int = 200) -> None:
+    """Запросы к резидентному серверу против построения графа на каждый запуск CLI"""
+    artifacts = to_maven_artifacts(generate_graph(depth=depth, fan_out=fan_out, diamond_density=0.4, seed=3))
+    root = maven_coordinates(ROOT_PACKAGE)
+    packages = sorted(artifacts)
+    print(f"Сервер запросов: {len(artifacts)} пакетов, задержка {latency * 1000:.0f} мс, {queries} запросов")
+
+    with MockMavenRepository(artifacts, latency=latency) as repository:
+        # Каждый запуск CLI заново загружает POM-файлы и строит граф
+        started = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            for package in packages[:3]:
+                graph = DependencyGraph(maven_parser=MavenParser(repository.url))
+                graph.build_dependency_graph_multi([root], max_depth=depth, concurrency=8)
+                graph.get_all_dependencies(package)
+        per_run = (time.perf_counter() - started) / 3
+        print(f"  запуск CLI на запрос       {per_run * 1000:10.2f} мс")
+
+        parser = MavenParser(repository.url)
+        service = QueryService(lambda: DependencyGraph(maven_parser=parser), [root], max_depth=depth, concurrency=8)
+        service.rebuild(wait=True)
+        server = create_server('127.0.0.1:0', service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = server_url(server)
+        rng = random.Random(7)
+
+        def query_latencies(count: int) -> list:
+            latencies = []
+            for _ in range(count):
+                path = rng.choice([f"/closure?package={rng.choice(packages)}",
+                                   f"/reverse?package={rng.choice(packages)}",
+                                   f"/path?from={root}&to={rng.choice(packages)}", "/cycles"])
+                started = time.perf_counter()
+                with urllib.request.urlopen(url + path) as response:
+                    response.read()
+                latencies.append(time.perf_counter() - started)
+            return sorted(latencies)
+
+        try:
+            latencies = query_latencies(queries)
+            print(f"  сервер, медиана / p99      {latencies[len(latencies) // 2] * 1000:10.2f} / "
+                  f"{latencies[int(len(latencies) * 0.99)] * 1000:.2f} мс")
+
+            # Полный сброс кэшей: граф перестраивается в фоне, запросы обслуживает прежний
+            service.invalidate()
+            latencies = query_latencies(queries // 4)
+            service.rebuild(wait=True)
+            print(f"  сервер во время сборки     {latencies[len(latencies) // 2] * 1000:10.2f} мс (медиана), "
+                  f"поколение графа: {service.current.generation}")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def bench_hedged_repositories(depth: int = 4, fan_out: int = 5, latency: float = 0.002, slow_rate: float = 0.04,
+                              slow_latency: float = 0.25, repeats: int = 2) -> None:
+    """Несколько репозиториев: последовательный перебор против хеджирования с памятью маршрутов"""
+    artifacts = to_maven_artifacts(generate_graph(depth=depth, fan_out=fan_out, diamond_density=0.3, seed=6))
+    root = maven_coordinates(ROOT_PACKAGE)
+    # Пакеты последнего уровня есть только во втором репозитории ("Google") и в зеркале
+    google_group = f"gen.l{depth}"
+    central = {package: deps for package, deps in artifacts.items() if not package.startswith(google_group)}
+    google = {package: deps for package, deps in artifacts.items() if package.startswith(google_group)}
+    print(f"Несколько репозиториев: {len(artifacts)} пакетов ({len(google)} только в Google), "
+          f"хвост задержки Central {slow_rate:.0%} по {slow_latency * 1000:.0f} мс")
+
+    for label in ("последовательный перебор", "хеджирование по p95"):
+        with MockMavenRepository(central, latency=latency, slow_rate=slow_rate, slow_latency=slow_latency,
+                                 seed=2) as central_repository, \
+                MockMavenRepository(google, latency=latency * 1.5) as google_repository, \
+                MockMavenRepository(artifacts, latency=latency * 3) as mirror_repository:
+            repositories = (central_repository, google_repository, mirror_repository)
+            transport = HttpTransport()
+            backends = [HttpBackend(repository.url, transport) for repository in repositories]
+            backend = ChainedBackend(backends) if label.startswith("послед") else HedgedBackend(backends)
+            timings = []
+            for _ in range(repeats):
+                parser = MavenParser(central_repository.url, transport=transport, backend=backend)
+                graph = DependencyGraph(maven_parser=parser)
+                started = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    graph.build_dependency_graph_bfs(root, max_depth=depth + 1, concurrency=8)
+                timings.append(time.perf_counter() - started)
+            backend.close()
+            transport.close()
+            requests = '/'.join(str(repository.request_count) for repository in repositories)
+            print(f"  {label:<26} первая сборка {timings[0]:7.3f} с, повторная {timings[-1]:7.3f} с  "
+                  f"запросов Central/Google/зеркало: {requests}  пакетов: {len(graph.graph)}")
+
+
+class LegacyPlantUMLVisualizer(PlantUMLVisualizer):
+    """Прежняя генерация: конкатенация строк в атрибуте и replace для каждого id"""
+
+    def generate_plantuml(self, graph: dict, root_package: str, title: str = "Граф зависимостей"):
+        self.plantuml_code = self._header(root_package, title)
+        all_packages = set()
+        for package, dependencies in graph.items():
+            all_packages.add(package)
+            all_packages.update(dependencies)
+        for package in sorted(all_packages):
+            if package != root_package:
+                self.plantuml_code += f'node "{package}" as {self._sanitize_id(package)}\n'
+        self.plantuml_code += "\n"
+        for package, dependencies in graph.items():
+            for dep in dependencies:
+                if package == root_package:
+                    self.plantuml_code += f'root --> {self._sanitize_id(dep)}\n'
+                else:
+                    self.plantuml_code += f'{self._sanitize_id(package)} --> {self._sanitize_id(dep)}\n'
+        self.plantuml_code += "@enduml"
+        return self.plantuml_code
+
+    def _sanitize_id(self, package_name: str) -> str:
+        return package_name.replace(':', '_').replace('.', '_').replace('-', '_')
+
+
+class _NullWriter:
+    """Поток, который только считает записанные символы"""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, text: str) -> None:
+        self.size += len(text)
+
+
+def bench_plantuml_output(edge_counts=(5_000, 10_000, 20_000, 100_000, 500_000), legacy_limit: int = 20_000) -> None:
+    """Масштабирование вывода PlantUML: конкатенация против потоковой записи"""
+    print("Генерация PlantUML для графов разного размера")
+    for edge_count in edge_counts:
+        graph = make_random_graph(edge_count)
+        root = next(iter(graph))
+
+        if edge_count <= legacy_limit:
+            tracemalloc.start()
+            started = time.perf_counter()
+            legacy_code = LegacyPlantUMLVisualizer().generate_plantuml(graph, root)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            legacy = f"{elapsed:7.3f} с, пик {peak / 2**20:6.1f} МБ"
+        else:
+            legacy_code, legacy = None, "пропущен"
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        sink = _NullWriter()
+        PlantUMLVisualizer().write_plantuml(graph, root, sink)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        status = ""
+        if legacy_code is not None:
+            status = compare_status(PlantUMLVisualizer().generate_plantuml(graph, root) == legacy_code,
+                                    f"plantuml {edge_count}")
+        print(f"  {edge_count:>8} ребер: прежний {legacy:<28} потоковый {elapsed:7.3f} с, "
+              f"пик {peak / 2**20:6.1f} МБ, {sink.size / 2**20:6.1f} МБ текста {status}")
+
+
+# Профили воспроизводимого набора: параметры генератора графа
+SUITE_PROFILES = {
+    'small': {'depth': 5, 'fan_out': 4, 'diamond_density': 0.3, 'cycle_rate': 0.02, 'max_width': 200},
+    'medium': {'depth': 6, 'fan_out': 6, 'diamond_density': 0.5, 'cycle_rate': 0.01, 'max_width': 1000},
+    'large': {'depth': 8, 'fan_out': 8, 'diamond_density': 0.6, 'cycle_rate': 0.005, 'max_width': 10000},
+}
+
+# Сколько раз повторять измерения в памяти (берется лучшее время)
+SUITE_REPEATS = 3
+
+
+def _best_time(function, repeats: int = SUITE_REPEATS):
+    """Лучшее время из нескольких запусков и результат последнего"""
+    best = None
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _fresh_graph(adjacency: dict) -> DependencyGraph:
+    """DependencyGraph поверх готовой смежности, без кэшей прошлых запусков"""
+    graph = DependencyGraph()
+    graph.graph = adjacency
+    return graph
+
+
+def run_suite(profile: str = 'small', latency: float = 0.001, error_rate: float = 0.02, seed: int = 1,
+              concurrency: int = 8, queries: int = 200) -> dict:
+    """
+    Воспроизводимый набор измерений на сгенерированном графе
+
+    Граф строится graph_generator.generate_graph по профилю и seed, затем
+    измеряются: BFS по файлу TestRepository, BFS через локальный
+    Maven-сервер с задержкой и долей ошибок, обратные запросы, поиск
+    циклов, транзитивное замыкание и вывод PlantUML.
+
+    Returns:
+        Dict: имя измерения -> метрики (секунды и счетчики)
+    """
+    parameters = SUITE_PROFILES[profile]
+    adjacency = generate_graph(seed=seed, **parameters)
+    edges = sum(len(dependencies) for dependencies in adjacency.values())
+    print(f"Набор '{profile}': {len(adjacency)} пакетов, {edges} ребер, параметры {parameters}, seed {seed}")
+    max_depth = parameters['depth'] + 1
+    results = {'graph': {'packages': len(adjacency), 'edges': edges}}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'generated.txt')
+        write_test_repository(adjacency, path)
+
+        def build_from_file():
+            repository = TestRepository(path)
+            repository.load_test_repository()
+            graph = DependencyGraph(test_repository=repository)
+            with redirect_stdout(io.StringIO()):
+                graph.build_dependency_graph_bfs(ROOT_PACKAGE, max_depth=max_depth)
+            return graph
+
+        seconds, built = _best_time(build_from_file)
+        results['testrepo_bfs'] = {'seconds': seconds, 'packages': len(built.graph)}
+
+    artifacts = to_maven_artifacts(adjacency)
+    with MockMavenRepository(artifacts, latency=latency, error_rate=error_rate, seed=seed) as repository:
+        parser = MavenParser(repository.url, transport=HttpTransport(max_retries=6, backoff_base=0.005))
+        graph = DependencyGraph(maven_parser=parser)
+        started = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            graph.build_dependency_graph_bfs(maven_coordinates(ROOT_PACKAGE), max_depth=max_depth,
+                                             concurrency=concurrency)
+        results['maven_bfs'] = {
+            'seconds': time.perf_counter() - started,
+            'packages': len(graph.graph),
+            'requests': repository.request_count
+        }
+
+    rng = random.Random(seed)
+    targets = [rng.choice(list(built.graph)) for _ in range(queries)]
+    seconds, answers = _best_time(lambda: _fresh_graph(built.graph).get_all_reverse_dependencies_batch(targets))
+    results['reverse_queries'] = {'seconds': seconds, 'queries': queries,
+                                  'answers': sum(len(found) for found in answers.values())}
+
+    seconds, cycles = _best_time(lambda: _fresh_graph(built.graph).detect_cycles())
+    results['cycles'] = {'seconds': seconds, 'cycles': len(cycles)}
+
+    def closure():
+        graph = _fresh_graph(built.graph)
+        closure = graph.transitive_closure()
+        return sum(closure.count(node_id) for node_id in range(closure.node_count))
+
+    seconds, reachable = _best_time(closure)
+    results['closure'] = {'seconds': seconds, 'reachable_pairs': reachable}
+
+    def plantuml():
+        writer = _NullWriter()
+        PlantUMLVisualizer().write_plantuml(built.graph, ROOT_PACKAGE, writer)
+        return writer.size
+
+    seconds, size = _best_time(plantuml)
+    results['plantuml'] = {'seconds': seconds, 'characters': size}
+
+    for name, metrics in results.items():
+        print(f"  {name:<16} " + "  ".join(
+            f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}" for key, value in metrics.items()
+        ))
+    return results
+
+
+def _git_revision() -> dict:
+    """Текущий коммит и наличие незакоммиченных изменений (если доступен git)"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+    return {'commit': commit, 'dirty': dirty}
+
+
+def record_suite(path: str, profile: str, results: dict, parameters: dict) -> dict:
+    """Дописывает результаты набора строкой JSON в файл истории"""
+    record = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        **_git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'profile': profile,
+        'parameters': parameters,
+        'results': results
+    }
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    print(f"Результаты записаны в: {path}")
+    return record
+
+
+def compare_suite(path: str, profile: str) -> None:
+    """Сравнивает два последних запуска профиля из файла истории"""
+    with open(path, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    records = [record for record in records if record['profile'] == profile]
+    if len(records) < 2:
+        print(f"Для сравнения профиля '{profile}' нужно минимум два запуска в {path}")
+        return
+
+    previous, current = records[-2], records[-1]
+    print(f"\nСравнение '{profile}': {(previous['commit'] or '?')[:10]} -> {(current['commit'] or '?')[:10]}")
+    for name, metrics in current['results'].items():
+        before = previous['results'].get(name, {}).get('seconds')
+        after = metrics.get('seconds')
+        if before is None or after is None:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"  {name:<16} {before:10.4f} с -> {after:10.4f} с  ({change:+.1f}%)")
+
+
+SCENARIOS = {
+    'bfs': bench_concurrent_bfs,
+    'cache': bench_persistent_cache,
+    'transport': bench_transport,
+    'parser': bench_pom_parser,
+    'inheritance': bench_parent_resolution,
+    'compact': bench_compact_graph,
+    'reverse': bench_reverse_queries,
+    'cycles': bench_cycle_detection,
+    'closure': bench_transitive_closure,
+    'incremental': bench_incremental_rebuild,
+    'plantuml': bench_plantuml_output,
+    'mediation': bench_version_mediation,
+    'local': bench_local_repository,
+    'batch': bench_batch_roots,
+    'snapshot': bench_graph_snapshot,
+    'testrepo': bench_indexed_test_repository,
+    'scopes': bench_scoped_traversal,
+    'profiler': bench_profiler_overhead,
+    'filter': bench_package_filter,
+    'ranges': bench_version_ranges,
+    'server': bench_query_server,
+    'why': bench_why_queries,
+    'layers': bench_build_layers,
+    'hedged': bench_hedged_repositories,
+}
+
+
+def report_mismatches() -> None:
+    """Завершает процесс с ненулевым кодом, если результат сценария разошелся с эталоном"""
+    if MISMATCHES:
+        print(f"\nРезультаты отличаются от эталона: {', '.join(MISMATCHES)}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарки визуализатора зависимостей')
+    parser.add_argument('scenarios', nargs='*', help='Сценарии для запуска (по умолчанию все)')
+    parser.add_argument('--suite', choices=list(SUITE_PROFILES), help='Запустить воспроизводимый набор с профилем')
+    parser.add_argument('--seed', type=int, default=1, help='Начальное значение генератора графа')
+    parser.add_argument('--latency', type=float, default=0.001, help='Задержка ответа Maven-сервера, с')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='Доля ответов 503 Maven-сервера')
+    parser.add_argument('--record', help='Дописать результаты набора в JSONL-файл истории')
+    parser.add_argument('--compare', action='store_true', help='Сравнить с предыдущим запуском из файла истории')
+    args = parser.parse_args()
+
+    if args.suite:
+        results = run_suite(args.suite, latency=args.latency, error_rate=args.error_rate, seed=args.seed)
+        if args.record:
+            parameters = dict(SUITE_PROFILES[args.suite], seed=args.seed, latency=args.latency,
+                              error_rate=args.error_rate)
+            record_suite(args.record, args.suite, results, parameters)
+            if args.compare:
+                compare_suite(args.record, args.suite)
+        if not args.scenarios:
+            report_mismatches()
+            return
+
+    for name in args.scenarios or list(SCENARIOS):
+        SCENARIOS[name]()
+    report_mismatches()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,213 @@
 import argparse
+import sys
 from config import ConfigManager
+from http_transport import HttpTransport
+from batch_resolver import BatchResolver
 from maven_parser import MavenParser
+from package_filter import RULE_SEPARATOR, PackageFilter
+from pom_cache import PomCache
+from profiler import DISABLED, Profiler
+from query_server import QueryServerError, QueryService, serve
+from repository_backend import DEFAULT_LOCAL_REPOSITORY, create_backend
 from dependency_graph import DependencyGraph
 from test_repository import TestRepository
+from traversal_policy import TraversalPolicy, parse_scopes
 from visualizer import PlantUMLVisualizer
 
+def read_package_list(path: str):
+    """Читает список пакетов (по одному в строке) из файла или stdin"""
+    stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        return [line.strip() for line in stream if line.strip()]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def create_policy(args, config):
+    """Политика обхода по областям видимости или None, если области не заданы"""
+    scopes = parse_scopes(args.scopes or config['traversal_scopes'])
+    if scopes is None:
+        return None
+    return TraversalPolicy(scopes,
+                           include_optional=args.include_optional or config['include_optional'],
+                           apply_exclusions=config['apply_exclusions'] and not args.no_exclusions)
+
+
+def create_package_filter(args, config):
+    """Фильтр пакетов из правил конфигурации и --include/--exclude или None"""
+    include = RULE_SEPARATOR.join([config['include_patterns']] + (args.include or []))
+    exclude = RULE_SEPARATOR.join([config['exclude_patterns']] + (args.exclude or []))
+    return PackageFilter.from_config(include, exclude)
+
+
+def display_pruned_edges(dependency_graph: DependencyGraph, policy) -> None:
+    if policy is not None:
+        print(f"\nОтброшено ребер политикой обхода: {dependency_graph.pruned_edges}")
+
+
+# Короткие имена репозиториев для --mirror и параметра mirrors
+REPOSITORY_ALIASES = {
+    'central': MavenParser.MAVEN_CENTRAL,
+    'google': MavenParser.MAVEN_GOOGLE
+}
+
+
+def repository_mirrors(args, config):
+    """Дополнительные репозитории из параметра mirrors (через ';') и --mirror"""
+    mirrors = [mirror.strip() for mirror in config['mirrors'].split(';')] + (args.mirror or [])
+    return [REPOSITORY_ALIASES.get(mirror, mirror) for mirror in mirrors if mirror]
+
+
+def display_http_stats(dependency_graph: DependencyGraph) -> None:
+    """Счетчики HTTP по хостам и, при нескольких репозиториях, задержки каждого"""
+    dependency_graph.maven_parser.transport.display_stats()
+    repositories = dependency_graph.maven_parser.backend.stats()
+    if not repositories:
+        return
+    print("\nРепозитории:")
+    print("=" * 60)
+    for location, counters in repositories.items():
+        print(f"{location}: запросов {int(counters.get('requests', 0))}, "
+              f"ответил первым {int(counters.get('wins', 0))}, "
+              f"дублирований {int(counters.get('hedges', 0))}, "
+              f"404 {int(counters.get('not_found', 0))}, "
+              f"ошибок {int(counters.get('errors', 0))}, "
+              f"p50 {counters.get('p50', 0) * 1000:.1f} мс, p95 {counters.get('p95', 0) * 1000:.1f} мс")
+    print("=" * 60)
+
+
+def save_profile(args, dependency_graph: DependencyGraph) -> None:
+    """Сохраняет отчет профилировщика, если задан --profile"""
+    if not args.profile:
+        return
+    sections = {}
+    if dependency_graph.maven_parser:
+        sections['http'] = dependency_graph.maven_parser.transport.stats()
+        repositories = dependency_graph.maven_parser.backend.stats()
+        if repositories:
+            sections['repositories'] = repositories
+    dependency_graph.profiler.save(args.profile, **sections)
+
+
+def display_explanations(args, dependency_graph: DependencyGraph) -> None:
+    """Вывод цепочек зависимостей для --why и --why-file"""
+    if args.why_file:
+        dependency_graph.display_dependency_explanations_batch(read_package_list(args.why_file))
+    for package in args.why or []:
+        dependency_graph.display_dependency_explanation(package, args.paths)
+
+
+def run_batch(args, config, dependency_graph: DependencyGraph, roots, parser_settings):
+    """Пакетный режим: общий граф для многих корневых пакетов и сводка по ним"""
+    if args.visualize:
+        raise ValueError("PlantUML-визуализация строится для одного корневого пакета, "
+                         "в пакетном режиме она недоступна")
+    mediation = args.mediate or config['version_mediation']
+    
+    print(f"\nПакетное построение графа:")
+    print(f"Корневых пакетов: {len(roots)}")
+    print("-" * 40)
+    
+    if not args.load_snapshot:
+        policy = create_policy(args, config)
+        resolver = BatchResolver(dependency_graph, parser_settings, processes=args.processes)
+        resolver.resolve(roots, config['filter_substring'], max_depth=args.depth, concurrency=args.workers,
+                         policy=policy, package_filter=create_package_filter(args, config), mediation=mediation)
+        display_pruned_edges(dependency_graph, policy)
+        if mediation:
+            dependency_graph.display_version_conflicts()
+        if args.save_snapshot:
+            dependency_graph.save_snapshot(args.save_snapshot)
+    
+    with dependency_graph.profiler.phase('output'):
+        if args.layers:
+            dependency_graph.display_build_layers()
+        elif args.why_file or args.why:
+            display_explanations(args, dependency_graph)
+        elif args.reverse_file:
+            dependency_graph.display_reverse_dependencies_batch(read_package_list(args.reverse_file))
+        elif args.reverse:
+            dependency_graph.display_reverse_dependencies(args.reverse)
+        else:
+            dependency_graph.display_roots_summary(roots)
+    
+    if args.http_stats and dependency_graph.maven_parser:
+        display_http_stats(dependency_graph)
+    save_profile(args, dependency_graph)
+
+
+def run_server(args, config, dependency_graph: DependencyGraph, roots):
+    """Режим сервера: граф и кэши парсера остаются в памяти между запросами"""
+    if args.visualize:
+        raise ValueError("PlantUML-визуализация недоступна в режиме сервера")
+    
+    service = QueryService(
+        lambda: DependencyGraph(maven_parser=dependency_graph.maven_parser,
+                                test_repository=dependency_graph.test_repository,
+                                profiler=dependency_graph.profiler),
+        roots, filter_substring=config['filter_substring'], max_depth=args.depth, concurrency=args.workers,
+        policy=create_policy(args, config), package_filter=create_package_filter(args, config),
+        mediation=args.mediate or config['version_mediation']
+    )
+    
+    if args.load_snapshot:
+        service.publish(dependency_graph)
+    else:
+        print(f"\nПостроение графа для {len(service.roots)} корневых пакетов...")
+        service.rebuild(wait=True)
+        if service.current is None:
+            raise QueryServerError(f"Не удалось построить граф: {service.last_error}")
+    
+    status = service.status()
+    print(f"Граф в памяти: {status['packages']} пакетов, {status['edges']} зависимостей "
+          f"(построен за {status['build_seconds']:.3f} с)")
+    serve(args.serve, service)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Визуализатор графа зависимостей - Этап 5')
     parser.add_argument('--config', default='config.csv', help='Конфигурационный файл')
     parser.add_argument('--depth', type=int, default=3, help='Глубина обхода')
     parser.add_argument('--reverse', help='Обратные зависимости для пакета')
+    parser.add_argument('--reverse-file', help='Файл со списком пакетов для пакетного поиска обратных зависимостей ("-" - stdin)')
     parser.add_argument('--visualize', action='store_true', help='Сгенерировать PlantUML визуализацию')
     parser.add_argument('--output', help='Файл для сохранения PlantUML кода')
+    parser.add_argument('--cache-dir', help='Каталог постоянного кэша POM-файлов')
+    parser.add_argument('--offline', action='store_true', help='Не обращаться к сети, использовать только кэш')
+    parser.add_argument('--http-stats', action='store_true', help='Вывести счетчики HTTP-запросов по хостам')
+    parser.add_argument('--workers', type=int, default=1, help='Число параллельных загрузок POM на уровне BFS')
+    parser.add_argument('--local-repo', nargs='?', const=DEFAULT_LOCAL_REPOSITORY,
+                        help=f'Локальный репозиторий, опрашиваемый до удаленного (по умолчанию {DEFAULT_LOCAL_REPOSITORY})')
+    parser.add_argument('--mirror', action='append',
+                        help='Дополнительный репозиторий после repository_url: URL, central или google (можно повторять)')
+    parser.add_argument('--roots-file', help='Файл со списком корневых пакетов для пакетного режима ("-" - stdin)')
+    parser.add_argument('--processes', type=int, default=1, help='Число процессов разбора POM в пакетном режиме')
+    parser.add_argument('--mediate', action='store_true', help='Разрешать конфликты версий (ближайшая версия побеждает)')
+    parser.add_argument('--indexed-repo', action='store_true',
+                        help='Читать тестовый репозиторий по индексу строк вместо загрузки целиком')
+    parser.add_argument('--save-snapshot', help='Сохранить построенный граф в бинарный снимок')
+    parser.add_argument('--load-snapshot', help='Загрузить граф из снимка вместо построения')
+    parser.add_argument('--scopes', help='Области видимости, по которым идет обход (через запятую, например compile,runtime)')
+    parser.add_argument('--include-optional', action='store_true', help='Следовать по транзитивным optional-зависимостям')
+    parser.add_argument('--no-exclusions', action='store_true', help='Не применять exclusions из POM-файлов')
+    parser.add_argument('--include', action='append',
+                        help='Правило включения пакетов: group:префикс, glob:шаблон, re:выражение (можно повторять)')
+    parser.add_argument('--exclude', action='append',
+                        help='Правило исключения пакетов: group:префикс, glob:шаблон, re:выражение, contains:подстрока')
+    parser.add_argument('--profile', help='Сохранить профиль выполнения (фазы, задержки, счетчики) в JSON-файл')
+    parser.add_argument('--why', action='append',
+                        help='Показать, через какие цепочки пакет попал в граф (можно повторять)')
+    parser.add_argument('--why-file', help='Файл со списком пакетов для пакетного объяснения ("-" - stdin)')
+    parser.add_argument('--paths', type=int, default=1, help='Число различных кратчайших цепочек для --why')
+    parser.add_argument('--layers', action='store_true',
+                        help='Вывести слои сборки (пакеты, обрабатываемые параллельно) и критический путь')
+    parser.add_argument('--serve', metavar='ADDRESS',
+                        help='Держать граф в памяти и отвечать на запросы (хост:порт, порт или unix:/путь)')
     
     args = parser.parse_args()
     config_manager = ConfigManager(args.config)
+    backend = None
     
     try:
         config = config_manager.load_config()
@@ -22,50 +215,118 @@ def main():
         
         dependency_graph = None
         test_repo = None
+        parser_settings = None
+        profiler = Profiler() if args.profile else DISABLED
         
         if config['test_repo_mode']:
             print(f"\nРЕЖИМ ТЕСТИРОВАНИЯ")
-            test_repo = TestRepository(config['repository_url'])
+            test_repo = TestRepository(config['repository_url'],
+                                       indexed=args.indexed_repo or config['test_repo_indexed'])
             test_repo.load_test_repository()
-            dependency_graph = DependencyGraph(test_repository=test_repo)
+            dependency_graph = DependencyGraph(test_repository=test_repo, profiler=profiler)
         else:
             print(f"\nРЕЖИМ MAVEN")
-            maven_parser = MavenParser(config['repository_url'])
-            dependency_graph = DependencyGraph(maven_parser=maven_parser)
+            cache_dir = args.cache_dir or config['cache_dir']
+            offline = args.offline or config['offline']
+            cache = PomCache(cache_dir, max_bytes=config['cache_max_mb'] * 1024 * 1024) if cache_dir else None
+            transport = HttpTransport(timeout=config['http_timeout'], max_retries=config['http_retries'])
+            mirrors = repository_mirrors(args, config)
+            backend = create_backend(config['repository_url'], transport,
+                                     local_repository=args.local_repo or config['local_repository'],
+                                     mirrors=mirrors, concurrency=args.workers)
+            maven_parser = MavenParser(config['repository_url'], cache=cache, offline=offline,
+                                       transport=transport, backend=backend, profiler=profiler,
+                                       metadata_ttl=config['metadata_ttl'], negative_ttl=config['negative_ttl'])
+            dependency_graph = DependencyGraph(maven_parser=maven_parser, profiler=profiler)
+            parser_settings = {
+                'repository_url': config['repository_url'],
+                'cache_dir': cache_dir,
+                'cache_max_bytes': config['cache_max_mb'] * 1024 * 1024,
+                'offline': offline,
+                'local_repository': args.local_repo or config['local_repository'],
+                'mirrors': mirrors,
+                'http_timeout': config['http_timeout'],
+                'http_retries': config['http_retries'],
+                'metadata_ttl': config['metadata_ttl'],
+                'negative_ttl': config['negative_ttl']
+            }
+        
+        roots = read_package_list(args.roots_file) if args.roots_file else config_manager.get_root_packages()
+        if args.load_snapshot:
+            dependency_graph.load_snapshot(args.load_snapshot)
+        
+        if args.serve:
+            run_server(args, config, dependency_graph, roots)
+            return
+        
+        if args.roots_file or len(roots) > 1:
+            run_batch(args, config, dependency_graph, roots, parser_settings)
+            return
+        
+        mediation = args.mediate or config['version_mediation']
+        policy = create_policy(args, config)
         
         print(f"\nПостроение графа:")
         print(f"Пакет: {config['package_name']}")
         print("-" * 40)
         
-        graph_data = dependency_graph.build_dependency_graph_bfs(
-            root_package=config['package_name'],
-            filter_substring=config['filter_substring'],
-            max_depth=args.depth
-        )
-        
-        # Визуализация
-        if args.visualize:
-            visualizer, plantuml_code = dependency_graph.generate_plantuml_visualization(
-                config['package_name']
+        if not args.load_snapshot:
+            graph_data = dependency_graph.build_dependency_graph_bfs(
+                root_package=config['package_name'],
+                filter_substring=config['filter_substring'],
+                max_depth=args.depth,
+                concurrency=args.workers,
+                mediation=mediation,
+                policy=policy,
+                package_filter=create_package_filter(args, config)
             )
-            visualizer.display_plantuml_code()
+            display_pruned_edges(dependency_graph, policy)
+            if mediation:
+                dependency_graph.display_version_conflicts()
+            if args.save_snapshot:
+                dependency_graph.save_snapshot(args.save_snapshot)
+        
+        with dependency_graph.profiler.phase('output'):
+            # Визуализация
+            if args.visualize:
+                dependency_graph.display_plantuml_visualization(config['package_name'])
             
-            if args.output:
-                visualizer.save_to_file(args.output)
+                if args.output:
+                    dependency_graph.save_plantuml_visualization(config['package_name'], args.output)
         
-        # Обратные зависимости
-        elif args.reverse:
-            dependency_graph.display_reverse_dependencies(args.reverse)
+            # Слои сборки по конденсации графа
+            elif args.layers:
+                dependency_graph.display_build_layers()
         
-        # Обычный вывод
-        else:
-            dependency_graph.display_dependency_info(
-                root_package=config['package_name'],
-                filter_substring=config['filter_substring']
-            )
+            # Цепочки, через которые пакеты попали в граф
+            elif args.why_file or args.why:
+                display_explanations(args, dependency_graph)
+        
+            # Пакетный поиск обратных зависимостей
+            elif args.reverse_file:
+                dependency_graph.display_reverse_dependencies_batch(read_package_list(args.reverse_file))
+        
+            # Обратные зависимости
+            elif args.reverse:
+                dependency_graph.display_reverse_dependencies(args.reverse)
+        
+            # Обычный вывод
+            else:
+                dependency_graph.display_dependency_info(
+                    root_package=config['package_name'],
+                    filter_substring=config['filter_substring']
+                )
+        
+        if args.http_stats and dependency_graph.maven_parser:
+            display_http_stats(dependency_graph)
+        save_profile(args, dependency_graph)
         
     except Exception as e:
         print(f"Ошибка: {e}")
+    finally:
+        # После сборки и после остановки сервера (serve возвращается по Ctrl+C)
+        if backend is not None:
+            backend.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+# Тип элементов массивов смежности: 32-битные беззнаковые целые
+INDEX_TYPECODE = 'I'
+
+
+def _zeros(length: int) -> array:
+    return array(INDEX_TYPECODE, [0]) * length
+
+
+class NodeTable:
+    """Таблица интернирования имен пакетов: строка <-> целочисленный id"""
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name: str) -> int:
+        """Возвращает id пакета, добавляя его в таблицу при необходимости"""
+        node_id = self._ids.get(name)
+        if node_id is None:
+            node_id = len(self.names)
+            self._ids[name] = node_id
+            self.names.append(name)
+        return node_id
+
+    def id(self, name: str) -> Optional[int]:
+        """Возвращает id пакета или None, если пакет неизвестен"""
+        return self._ids.get(name)
+
+    def name(self, node_id: int) -> str:
+        return self.names[node_id]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+
+class CompactGraph:
+    """
+    Компактное представление графа зависимостей (CSR)
+
+    Узлы интернированы в целые числа, смежность хранится в плоских массивах:
+    зависимости узла i - forward_targets[forward_offsets[i]:forward_offsets[i + 1]],
+    обратные зависимости - аналогично в reverse_*. Узлы с id < expanded_count -
+    ключи исходного словаря графа (раскрытые при обходе), в исходном порядке.
+    """
+
+    def __init__(self, nodes: NodeTable, expanded_count: int,
+                 forward_offsets: array, forward_targets: array,
+                 reverse_offsets: array, reverse_targets: array):
+        self.nodes = nodes
+        self.expanded_count = expanded_count
+        self.forward_offsets = forward_offsets
+        self.forward_targets = forward_targets
+        self.reverse_offsets = reverse_offsets
+        self.reverse_targets = reverse_targets
+
+    @classmethod
+    def from_adjacency(cls, graph: Mapping) -> 'CompactGraph':
+        """
+        Строит компактный граф из словаря "пакет -> список зависимостей"
+
+        Args:
+            graph: Граф в формате DependencyGraph.graph
+
+        Returns:
+            CompactGraph с прямой и обратной смежностью
+        """
+        nodes = NodeTable(graph.keys())
+        expanded_count = len(nodes)
+
+        forward_targets = array(INDEX_TYPECODE)
+        row_ends = []
+        for dependencies in graph.values():
+            forward_targets.extend(nodes.intern(dep) for dep in dependencies)
+            row_ends.append(len(forward_targets))
+
+        node_count = len(nodes)
+        forward_offsets = array(INDEX_TYPECODE, [0])
+        forward_offsets.extend(row_ends)
+        forward_offsets.extend([len(forward_targets)] * (node_count - expanded_count))
+
+        reverse_offsets, reverse_targets = cls._transpose(node_count, forward_offsets, forward_targets)
+        return cls(nodes, expanded_count, forward_offsets, forward_targets, reverse_offsets, reverse_targets)
+
+    @staticmethod
+    def _transpose(node_count: int, offsets, targets):
+        """Строит обратную смежность подсчетом (counting sort), O(V + E)"""
+        counts = _zeros(node_count + 1)
+        for target in targets:
+            counts[target + 1] += 1
+        for i in range(node_count):
+            counts[i + 1] += counts[i]
+
+        reverse_offsets = array(INDEX_TYPECODE, counts)
+        position = array(INDEX_TYPECODE, counts)
+        reverse_targets = _zeros(len(targets))
+        for source in range(node_count):
+            for edge in range(offsets[source], offsets[source + 1]):
+                target = targets[edge]
+                reverse_targets[position[target]] = source
+                position[target] += 1
+        return reverse_offsets, reverse_targets
+
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.forward_targets)
+
+    def successors(self, node_id: int):
+        """Id прямых зависимостей узла"""
+        return self.forward_targets[self.forward_offsets[node_id]:self.forward_offsets[node_id + 1]]
+
+    def predecessors(self, node_id: int):
+        """Id пакетов, напрямую зависящих от узла"""
+        return self.reverse_targets[self.reverse_offsets[node_id]:self.reverse_offsets[node_id + 1]]
+
+    def as_mapping(self) -> 'AdjacencyView':
+        """Представление графа с интерфейсом словаря DependencyGraph.graph"""
+        return AdjacencyView(self)
+
+    def as_reverse_mapping(self) -> 'ReverseAdjacencyView':
+        """Представление обратной смежности с интерфейсом словаря"""
+        return ReverseAdjacencyView(self)
+
+    def memory_usage(self) -> int:
+        """Объем массивов смежности в байтах (без таблицы имен)"""
+        return sum(part.itemsize * len(part) for part in (
+            self.forward_offsets, self.forward_targets, self.reverse_offsets, self.reverse_targets
+        ))
+
+
+class AdjacencyView(Mapping):
+    """
+    Представление CompactGraph только для чтения с API словаря
+
+    Ключи - раскрытые пакеты в исходном порядке, значения - списки имен
+    зависимостей, которые строятся при обращении.
+    """
+
+    def __init__(self, compact: CompactGraph):
+        self.compact = compact
+
+    def __getitem__(self, package: str) -> List[str]:
+        node_id = self.compact.nodes.id(package)
+        if node_id is None or node_id >= self.compact.expanded_count:
+            raise KeyError(package)
+        names = self.compact.nodes.names
+        return [names[target] for target in self.compact.successors(node_id)]
+
+    def __contains__(self, package) -> bool:
+        node_id = self.compact.nodes.id(package)
+        return node_id is not None and node_id < self.compact.expanded_count
+
+    def __iter__(self) -> Iterator[str]:
+        names = self.compact.nodes.names
+        return (names[node_id] for node_id in range(self.compact.expanded_count))
+
+    def __len__(self) -> int:
+        return self.compact.expanded_count
+
+
+class ReverseAdjacencyView(Mapping):
+    """
+    Обратная смежность CompactGraph только для чтения с API словаря
+
+    Ключи - пакеты, от которых кто-то зависит, значения - списки имен
+    зависящих от них пакетов.
+    """
+
+    def __init__(self, compact: CompactGraph):
+        self.compact = compact
+
+    def __getitem__(self, package: str) -> List[str]:
+        node_id = self.compact.nodes.id(package)
+        if node_id is None:
+            raise KeyError(package)
+        predecessors = self.compact.predecessors(node_id)
+        if not predecessors:
+            raise KeyError(package)
+        names = self.compact.nodes.names
+        return [names[source] for source in predecessors]
+
+    def __iter__(self) -> Iterator[str]:
+        offsets = self.compact.reverse_offsets
+        names = self.compact.nodes.names
+        return (names[node_id] for node_id in range(self.compact.node_count)
+                if offsets[node_id] != offsets[node_id + 1])
+
+    def __len__(self) -> int:
+        offsets = self.compact.reverse_offsets
+        return sum(1 for node_id in range(self.compact.node_count) if offsets[node_id] != offsets[node_id + 1])
@@ -1,6 +1,6 @@
 import csv
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 
 class ConfigError(Exception):
@@ -29,6 +29,27 @@ class ConfigManager:
         'filter_substring': str
     }
     
+    # Необязательные параметры конфигурации и их значения по умолчанию
+    OPTIONAL_PARAMETERS = {
+        'cache_dir': (str, ''),
+        'cache_max_mb': (int, 256),
+        'offline': (bool, False),
+        'http_timeout': (float, 30.0),
+        'http_retries': (int, 3),
+        'version_mediation': (bool, False),
+        'local_repository': (str, ''),
+        'batch_roots': (str, ''),
+        'test_repo_indexed': (bool, False),
+        'traversal_scopes': (str, ''),
+        'include_optional': (bool, False),
+        'apply_exclusions': (bool, True),
+        'include_patterns': (str, ''),
+        'exclude_patterns': (str, ''),
+        'metadata_ttl': (float, 3600.0),
+        'negative_ttl': (float, 600.0),
+        'mirrors': (str, '')
+    }
+    
     def __init__(self, config_file: str = 'config.csv'):
         self.config_file = config_file
         self.config: Dict[str, Any] = {}
@@ -88,7 +109,8 @@ class ConfigManager:
             )
         
         # Проверка на лишние параметры
-        extra_params = set(config_data.keys()) - set(self.REQUIRED_PARAMETERS.keys())
+        known_params = set(self.REQUIRED_PARAMETERS.keys()) | set(self.OPTIONAL_PARAMETERS.keys())
+        extra_params = set(config_data.keys()) - known_params
         if extra_params:
             print(f"Предупреждение: обнаружены неизвестные параметры: {', '.join(extra_params)}")
     
@@ -110,27 +132,63 @@ class ConfigManager:
         for param, value in config_data.items():
             if param in self.REQUIRED_PARAMETERS:
                 expected_type = self.REQUIRED_PARAMETERS[param]
-                
-                try:
-                    if expected_type == bool:
-                        # Преобразование строки в булево значение
-                        if value.lower() in ('true', '1', 'yes', 'y'):
-                            parsed_config[param] = True
-                        elif value.lower() in ('false', '0', 'no', 'n'):
-                            parsed_config[param] = False
-                        else:
-                            raise ValueError(f"Недопустимое булево значение: {value}")
-                    else:
-                        # Преобразование в другие типы
-                        parsed_config[param] = expected_type(value)
-                        
-                except (ValueError, TypeError) as e:
-                    raise ConfigParameterError(
-                        f"Неверное значение параметра '{param}': {value}. Ожидается тип {expected_type.__name__}"
-                    )
+            elif param in self.OPTIONAL_PARAMETERS:
+                if not value:
+                    continue
+                expected_type = self.OPTIONAL_PARAMETERS[param][0]
+            else:
+                continue
+            
+            parsed_config[param] = self._parse_value(param, value, expected_type)
+        
+        for param, (expected_type, default) in self.OPTIONAL_PARAMETERS.items():
+            parsed_config.setdefault(param, default)
         
         return parsed_config
     
+    def _parse_value(self, param: str, value: str, expected_type: type) -> Any:
+        """
+        Преобразует строковое значение параметра в ожидаемый тип
+        
+        Args:
+            param: Имя параметра
+            value: Значение в строковом формате
+            expected_type: Ожидаемый тип значения
+            
+        Returns:
+            Any: Преобразованное значение
+            
+        Raises:
+            ConfigParameterError: Если преобразование типа невозможно
+        """
+        try:
+            if expected_type == bool:
+                # Преобразование строки в булево значение
+                if value.lower() in ('true', '1', 'yes', 'y'):
+                    return True
+                elif value.lower() in ('false', '0', 'no', 'n'):
+                    return False
+                else:
+                    raise ValueError(f"Недопустимое булево значение: {value}")
+            else:
+                # Преобразование в другие типы
+                return expected_type(value)
+                
+        except (ValueError, TypeError) as e:
+            raise ConfigParameterError(
+                f"Неверное значение параметра '{param}': {value}. Ожидается тип {expected_type.__name__}"
+            )
+    
+    def get_root_packages(self) -> List[str]:
+        """
+        Возвращает корневые пакеты для построения графа
+        
+        Returns:
+            List[str]: Пакеты из batch_roots (через ';') или [package_name]
+        """
+        roots = [root.strip() for root in self.config.get('batch_roots', '').split(';') if root.strip()]
+        return roots or [self.config['package_name']]
+    
     def display_config(self) -> None:
         """Выводит текущую конфигурацию в формате ключ-значение"""
         if not self.config:
@@ -1,15 +1,132 @@
+import heapq
+import itertools
+import time
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
+from compact_graph import AdjacencyView, CompactGraph
+from graph_algorithms import (TopologicalLayers, TransitiveClosure, elementary_cycles, is_cyclic_component,
+                              strongly_connected_components)
+import graph_snapshot
 from maven_parser import MavenParser
+from package_filter import PackageFilter
+from profiler import DISABLED, Profiler
 from test_repository import TestRepository
+from traversal_policy import DEFAULT_EDGE, TraversalPolicy, edge_attributes
 from visualizer import PlantUMLVisualizer
 
 
+# Число циклов, перечисляемых в каждой циклической компоненте по умолчанию
+DEFAULT_CYCLES_PER_COMPONENT = 10
+
+
 class DependencyGraph:
-    def __init__(self, maven_parser=None, test_repository=None):
+    def __init__(self, maven_parser=None, test_repository=None, profiler: Profiler = DISABLED,
+                 verbose: bool = True):
         self.maven_parser = maven_parser
         self.test_repository = test_repository
+        self.profiler = profiler
+        # Выводить ход построения (отключается для фоновых сборок сервера)
+        self.verbose = verbose
         self.graph = {}
         self.visited = set()
+        self.reverse_graph = {}
+        self._reverse_source = self.graph
+        self._compact = None
+        self._compact_source = None
+        self._closure = None
+        self._closure_source = None
+        # Неотфильтрованные зависимости уже загруженных пакетов и состояние
+        # последнего обхода для инкрементального перестроения
+        self.fetched = {}
+        self.edge_attributes = {}
+        self.depths = {}
+        # Индекс предшественников: пакет -> пакеты предыдущего уровня BFS,
+        # ребро от которых привело к нему (все кратчайшие пути от корней)
+        self.predecessors = {}
+        self.fetch_count = 0
+        self._build_state = None
+        # Посредничество версий: выбранная версия для groupId:artifactId
+        # и отчет о разрешенных конфликтах
+        self.selected_versions = {}
+        self.conflicts = []
+        self.snapshot = None
+        # Политика обхода: область видимости и исключения пакетов,
+        # с которыми они достигнуты, и число отброшенных ребер
+        self.node_scopes = {}
+        self.node_exclusions = {}
+        self.pruned_edges = 0
+    
+    def compact_graph(self) -> CompactGraph:
+        """
+        Компактное (CSR) представление текущего графа
+
+        Строится один раз после обхода и сбрасывается при перестроении графа.
+        """
+        if isinstance(self.graph, AdjacencyView):
+            return self.graph.compact
+        if self._compact is None or self._compact_source is not self.graph:
+            self._compact = CompactGraph.from_adjacency(self.graph)
+            self._compact_source = self.graph
+        return self._compact
+    
+    def transitive_closure(self) -> TransitiveClosure:
+        """Транзитивное замыкание текущего графа (вычисляется один раз)"""
+        compact = self.compact_graph()
+        if self._closure is None or self._closure_source is not compact:
+            self._closure = TransitiveClosure(compact.node_count, compact.forward_offsets, compact.forward_targets)
+            self._closure_source = compact
+        return self._closure
+    
+    def use_compact_storage(self) -> None:
+        """
+        Заменяет словарь графа представлением поверх CompactGraph
+
+        API словаря (чтение) сохраняется, а память под списки строк освобождается.
+        """
+        self.graph = self.compact_graph().as_mapping()
+    
+    def save_snapshot(self, path: str) -> None:
+        """
+        Сохраняет граф в бинарный снимок (см. graph_snapshot)
+
+        Args:
+            path: Путь к файлу снимка
+        """
+        state = self._build_state or {}
+        metadata = {
+            'roots': state.get('roots', []),
+            'filter_substring': state.get('filter_substring', ''),
+            'max_depth': state.get('max_depth')
+        }
+        graph_snapshot.save_snapshot(self.compact_graph(), path, metadata)
+        print(f"Снимок графа сохранен в: {path}")
+    
+    def load_snapshot(self, path: str) -> dict:
+        """
+        Открывает снимок графа и переключает запросы на него
+
+        Файл отображается в память, запросы работают прямо по массивам
+        снимка без восстановления словаря графа.
+
+        Args:
+            path: Путь к файлу снимка
+
+        Returns:
+            Метаданные снимка (корни, фильтр, глубина)
+
+        Raises:
+            SnapshotError: Если файл не является снимком поддерживаемой версии
+        """
+        snapshot = graph_snapshot.load_snapshot(path)
+        self._reset_graph()
+        self._build_state = None
+        self.snapshot = snapshot
+        self.graph = snapshot.compact.as_mapping()
+        print(f"Снимок графа загружен из: {path} ({snapshot.compact.node_count} пакетов, "
+              f"{snapshot.compact.edge_count} зависимостей)")
+        return snapshot.metadata
     
     def display_graph_structure(self):
         """Вывести структуру графа для отладки"""
@@ -20,64 +137,385 @@ class DependencyGraph:
         print("=" * 30)
 
     
-    def build_dependency_graph_bfs(self, root_package: str, filter_substring: str = "", max_depth: int = 10):
-        self.graph = {}
-        self.visited = set()
+    def build_dependency_graph_bfs(self, root_package: str, filter_substring: str = "", max_depth: int = 10,
+                                   concurrency: int = 1, mediation: bool = False,
+                                   policy: Optional[TraversalPolicy] = None,
+                                   package_filter: Optional[PackageFilter] = None):
+        """
+        Строит граф зависимостей обходом в ширину
+
+        При concurrency > 1 зависимости всех пакетов текущего уровня BFS
+        загружаются параллельно, а результаты обрабатываются в исходном
+        порядке очереди, поэтому граф совпадает с последовательным обходом.
+
+        Повторный вызов работает инкрементально: загруженные зависимости
+        запоминаются без фильтра, поэтому смена фильтра или уменьшение
+        глубины перестраивают граф без новых загрузок, а увеличение глубины
+        при том же корне и фильтре лишь раскрывает сохраненную границу обхода.
+
+        В режиме mediation применяется правило Maven "ближайшее определение
+        побеждает": первая встреченная в порядке BFS версия groupId:artifactId
+        выбирается для всего графа, ребра к другим версиям перенаправляются
+        на нее, а проигравшие версии не загружаются. Разрешенные конфликты
+        записываются в self.conflicts.
+
+        Политика обхода (policy) отбрасывает ребра по области видимости,
+        флагу optional и исключениям до загрузки POM; число отброшенных
+        ребер - self.pruned_edges.
+
+        Фильтр пакетов (package_filter) и filter_substring проверяются
+        до постановки зависимости в очередь, поэтому исключенные пакеты
+        не загружаются.
+
+        Для каждого пакета запоминаются предшественники на кратчайших путях
+        от корня (self.predecessors): по ним explain_dependency объясняет,
+        через какую цепочку пакет попал в граф, без повторного обхода.
+
+        Args:
+            root_package: Корневой пакет
+            filter_substring: Подстрока для исключения пакетов
+            max_depth: Максимальная глубина обхода
+            concurrency: Максимальное число одновременных загрузок
+            mediation: Разрешать конфликты версий (nearest wins)
+            policy: Политика обхода (None - следовать по всем ребрам)
+            package_filter: Правила включения и исключения пакетов
+
+        Returns:
+            Dict с графом и статистикой
+        """
+        if self.verbose:
+            print(f"BFS построение графа для: {root_package}")
+            print(f"Фильтр: '{filter_substring}', Глубина: {max_depth}")
+            if package_filter:
+                print(f"Правила фильтра: {package_filter.describe()}")
         
-        print(f"BFS построение графа для: {root_package}")
-        print(f"Фильтр: '{filter_substring}', Глубина: {max_depth}")
+        self._traverse([root_package], filter_substring, max_depth, concurrency, mediation,
+                       policy=policy, package_filter=package_filter)
         
-        queue = deque([(root_package, 0)])
-        self.visited.add(root_package)
+        return {
+            'graph': self.graph,
+            'total_packages': len(self.graph),
+            'root_package': root_package
+        }
+    
+    def build_dependency_graph_multi(self, root_packages, filter_substring: str = "", max_depth: int = 10,
+                                     concurrency: int = 1, fetch_many=None,
+                                     policy: Optional[TraversalPolicy] = None,
+                                     package_filter: Optional[PackageFilter] = None,
+                                     mediation: bool = False):
+        """
+        Строит один общий граф зависимостей для нескольких корневых пакетов
+
+        Обход в ширину начинается сразу со всех корней, поэтому общие
+        библиотеки загружаются и разбираются один раз на весь набор.
+
+        Args:
+            root_packages: Корневые пакеты
+            filter_substring: Подстрока для исключения пакетов
+            max_depth: Максимальная глубина обхода от ближайшего корня
+            concurrency: Максимальное число одновременных загрузок
+            fetch_many: Функция загрузки списка пакетов (например, через пул
+                процессов); результаты - пары (идентификаторы зависимостей,
+                атрибуты ребер или None)
+            policy: Политика обхода (None - следовать по всем ребрам)
+            package_filter: Правила включения и исключения пакетов
+            mediation: Разрешать конфликты версий (nearest wins); из корней
+                с одинаковым groupId:artifactId выбирается первый
+
+        Returns:
+            Dict с графом и статистикой
+        """
+        roots = list(dict.fromkeys(root_packages))
+        if self.verbose:
+            print(f"BFS построение общего графа для {len(roots)} корневых пакетов")
+            print(f"Фильтр: '{filter_substring}', Глубина: {max_depth}")
+            if package_filter:
+                print(f"Правила фильтра: {package_filter.describe()}")
         
-        while queue:
-            current_package, depth = queue.popleft()
-            
-            if depth >= max_depth:
-                continue
-            
-            if self.test_repository:
-                dependencies = self.test_repository.get_dependencies(current_package)
-            else:
-                dependencies_data = self.maven_parser.get_direct_dependencies(current_package)
-                dependencies = [f"{dep['group_id']}:{dep['artifact_id']}:{dep['version']}" for dep in dependencies_data]
-            
-            filtered_dependencies = []
-            for dep in dependencies:
-                if filter_substring and filter_substring in dep:
-                    continue
-                filtered_dependencies.append(dep)
-            
-            self.graph[current_package] = filtered_dependencies
-            
-            for dep in filtered_dependencies:
-                if dep not in self.visited:
-                    self.visited.add(dep)
-                    queue.append((dep, depth + 1))
+        self._traverse(roots, filter_substring, max_depth, concurrency, mediation, fetch_many, policy, package_filter)
         
         return {
             'graph': self.graph,
             'total_packages': len(self.graph),
-            'root_package': root_package
+            'root_packages': roots
         }
     
-    def get_reverse_dependencies(self, target_package: str):
-        """Найти все пакеты, которые зависят от целевого пакета"""
-        reverse_deps = set()
+    def _traverse(self, roots: list, filter_substring: str, max_depth: int, concurrency: int,
+                  mediation: bool, fetch_many=None, policy: Optional[TraversalPolicy] = None,
+                  package_filter: Optional[PackageFilter] = None):
+        """Обход в ширину от корней с продолжением предыдущего обхода, если это возможно"""
+        with self.profiler.phase('bfs'):
+            self._traverse_levels(roots, filter_substring, max_depth, concurrency, mediation, fetch_many, policy,
+                                  PackageFilter.combine(package_filter, filter_substring))
+    
+    def _traverse_levels(self, roots: list, filter_substring: str, max_depth: int, concurrency: int,
+                         mediation: bool, fetch_many, policy: Optional[TraversalPolicy],
+                         package_filter: Optional[PackageFilter]):
+        state = self._build_state
+        if state and state['roots'] == roots and state['package_filter'] == package_filter \
+                and state['mediation'] == mediation and state['policy'] == policy \
+                and state['max_depth'] <= max_depth and self.graph is state['graph']:
+            # Продолжаем обход с границы предыдущего построения
+            level = state['frontier']
+            depth = state['max_depth']
+            self._compact = None
+        else:
+            self._reset_graph()
+            for root in roots:
+                self.visited.add(root)
+                self.depths[root] = 0
+                if mediation:
+                    self.selected_versions.setdefault(_version_key(root), root)
+            level = list(roots)
+            depth = 0
         
-        for package, dependencies in self.graph.items():
-            if target_package in dependencies:
-                reverse_deps.add(package)
+        accepts = package_filter.accepts if package_filter else None
+        with self._level_fetcher(concurrency, fetch_many) as fetch_level:
+            while level and depth < max_depth:
+                next_level = []
+                level_started = time.perf_counter()
+                level_edges = 0
+                
+                for current_package, dependencies in zip(level, fetch_level(level)):
+                    filtered_dependencies = []
+                    decisions = []
+                    if policy is not None:
+                        attributes = self.edge_attributes.get(current_package)
+                        parent_scope = self.node_scopes.get(current_package)
+                        parent_exclusions = self.node_exclusions.get(current_package, frozenset())
+                    for index, dep in enumerate(dependencies):
+                        if accepts is not None and not accepts(dep):
+                            continue
+                        if policy is not None:
+                            decision = policy.follow(parent_scope, parent_exclusions, dep,
+                                                     attributes[index] if attributes else DEFAULT_EDGE)
+                            if decision is None:
+                                self.pruned_edges += 1
+                                continue
+                        if mediation:
+                            dep = self._mediate(current_package, dep, depth + 1)
+                            if dep in filtered_dependencies:
+                                continue
+                        filtered_dependencies.append(dep)
+                        if policy is not None:
+                            decisions.append(decision)
+                    
+                    self._add_edges(current_package, filtered_dependencies)
+                    level_edges += len(filtered_dependencies)
+                    
+                    for index, dep in enumerate(filtered_dependencies):
+                        if dep not in self.visited:
+                            self.visited.add(dep)
+                            self.depths[dep] = depth + 1
+                            self.predecessors[dep] = [current_package]
+                            if policy is not None:
+                                self.node_scopes[dep], self.node_exclusions[dep] = decisions[index]
+                            next_level.append(dep)
+                        elif self.depths[dep] == depth + 1:
+                            predecessors = self.predecessors[dep]
+                            if predecessors[-1] != current_package:
+                                predecessors.append(current_package)
+                
+                self.profiler.record_level(depth, len(level), level_edges, time.perf_counter() - level_started)
+                level = next_level
+                depth += 1
+        
+        self._build_state = {
+            'graph': self.graph,
+            'roots': roots,
+            'filter_substring': filter_substring,
+            'package_filter': package_filter,
+            'max_depth': max_depth,
+            'mediation': mediation,
+            'policy': policy,
+            'frontier': level
+        }
+    
+    def _mediate(self, requested_by: str, package: str, depth: int) -> str:
+        """
+        Версия пакета, выбранная посредничеством (nearest wins)
+
+        Первая встреченная версия groupId:artifactId становится выбранной;
+        для остальных версий записывается конфликт и возвращается выбранная.
+        """
+        key = _version_key(package)
+        selected = self.selected_versions.setdefault(key, package)
+        if selected != package:
+            self.conflicts.append({
+                'ga': key,
+                'selected': selected,
+                'rejected': package,
+                'requested_by': requested_by,
+                'depth': depth
+            })
+        return selected
+    
+    def display_version_conflicts(self):
+        """Вывести конфликты версий, разрешенные посредничеством"""
+        if not self.conflicts:
+            print("\nКонфликтов версий не обнаружено")
+            return
         
-        return sorted(list(reverse_deps))
+        print(f"\nРазрешенные конфликты версий ({len(self.conflicts)}):")
+        for conflict in self.conflicts:
+            print(f"  {conflict['ga']}: выбрана {conflict['selected']}, отклонена {conflict['rejected']} "
+                  f"(запрошена {conflict['requested_by']}, глубина {conflict['depth']})")
+    
+    def _reset_graph(self):
+        """Начать новый граф, сохранив уже загруженные зависимости"""
+        self.graph = {}
+        self.visited = set()
+        self.depths = {}
+        self.predecessors = {}
+        self.selected_versions = {}
+        self.conflicts = []
+        self.node_scopes = {}
+        self.node_exclusions = {}
+        self.pruned_edges = 0
+        self.reverse_graph = {}
+        self._reverse_source = self.graph
+        self._compact = None
+        self._compact_source = None
+    
+    def invalidate_fetched(self):
+        """Забыть загруженные зависимости, чтобы следующий обход загрузил их заново"""
+        self.fetched = {}
+        self.edge_attributes = {}
+        self._build_state = None
+    
+    def _add_edges(self, package: str, dependencies: list):
+        """Добавить раскрытый пакет в граф, обновив обратный индекс"""
+        self.graph[package] = dependencies
+        for dep in dependencies:
+            dependents = self.reverse_graph.get(dep)
+            if dependents is None:
+                self.reverse_graph[dep] = [package]
+            else:
+                dependents.append(package)
+    
+    def _load_dependencies(self, package: str):
+        """
+        Загрузить прямые зависимости пакета
+
+        Может выполняться в потоке пула, поэтому не изменяет состояние графа.
+
+        Returns:
+            (идентификаторы зависимостей, атрибуты ребер или None)
+        """
+        if self.test_repository:
+            return self.test_repository.get_dependencies(package), None
+        dependencies_data = self.maven_parser.get_direct_dependencies(package)
+        dependencies = [f"{dep['group_id']}:{dep['artifact_id']}:{dep['version']}" for dep in dependencies_data]
+        return dependencies, [edge_attributes(dep) for dep in dependencies_data]
+    
+    @contextmanager
+    def _level_fetcher(self, concurrency: int, fetch_many=None):
+        """
+        Функция загрузки уровня BFS: последовательная, через пул потоков
+        или через внешнюю функцию fetch_many
+
+        Результаты всегда возвращаются в порядке входного списка пакетов.
+        """
+        if fetch_many is not None:
+            yield lambda packages: self._fetch_level_with(packages, fetch_many)
+            return
+        
+        if concurrency <= 1:
+            yield lambda packages: self._fetch_level_with(
+                packages, lambda missing: map(self._load_dependencies, missing))
+            return
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            yield lambda packages: self._fetch_level_with(
+                packages, lambda missing: executor.map(self._load_dependencies, missing))
+    
+    def _fetch_level_with(self, packages: list, fetch_many):
+        """
+        Загрузить через fetch_many только пакеты, которых еще нет в self.fetched
+
+        Результаты и счетчики записываются в вызывающем потоке.
+        """
+        missing = [package for package in dict.fromkeys(packages) if package not in self.fetched]
+        if missing:
+            for package, (dependencies, attributes) in zip(missing, fetch_many(missing)):
+                if attributes is not None:
+                    self.edge_attributes[package] = attributes
+                self.fetched[package] = dependencies
+            self.fetch_count += len(missing)
+            self.profiler.count('bfs.fetches', len(missing))
+        return [self.fetched[package] for package in packages]
+    
+    def get_reverse_dependencies(self, target_package: str):
+        """Найти все пакеты, которые зависят от целевого пакета"""
+        return sorted(set(self._reverse_index().get(target_package, ())))
     
     def get_all_reverse_dependencies_bfs(self, target_package: str, max_depth: int = 10):
         """Найти все обратные зависимости используя BFS"""
         if not self.graph:
             return []
         
-        reverse_graph = self._build_reverse_graph()
-        return self._bfs_reverse_dependencies(target_package, reverse_graph, max_depth)
+        return self._bfs_reverse_dependencies(target_package, self._reverse_index(), max_depth)
+    
+    def get_all_reverse_dependencies_batch(self, target_packages, max_depth: int = 10):
+        """
+        Найти все обратные зависимости сразу для многих пакетов
+
+        Обход выполняется одним проходом по уровням обратного графа: каждому
+        целевому пакету соответствует бит в маске, и маски всех целей
+        распространяются одновременно. Результат для каждой цели совпадает
+        с get_all_reverse_dependencies_bfs.
+
+        Args:
+            target_packages: Целевые пакеты
+            max_depth: Максимальная глубина обратного обхода
+
+        Returns:
+            Dict "пакет -> отсортированный список обратных зависимостей"
+        """
+        targets = list(dict.fromkeys(target_packages))
+        if not self.graph:
+            return {target: [] for target in targets}
+        
+        reverse_graph = self._reverse_index()
+        seen = {}
+        frontier = {}
+        for bit, target in enumerate(targets):
+            frontier[target] = frontier.get(target, 0) | (1 << bit)
+        
+        for _ in range(max_depth):
+            next_frontier = {}
+            for package, mask in frontier.items():
+                for dependent_package in reverse_graph.get(package, ()):
+                    known = seen.get(dependent_package, 0)
+                    new_bits = mask & ~known
+                    if new_bits:
+                        seen[dependent_package] = known | new_bits
+                        next_frontier[dependent_package] = next_frontier.get(dependent_package, 0) | new_bits
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        
+        results = {target: [] for target in targets}
+        for package, mask in seen.items():
+            while mask:
+                low_bit = mask & -mask
+                results[targets[low_bit.bit_length() - 1]].append(package)
+                mask ^= low_bit
+        return {target: sorted(dependents) for target, dependents in results.items()}
+    
+    def _reverse_index(self):
+        """
+        Обратный индекс "пакет -> пакеты, которые от него зависят"
+
+        Поддерживается при построении графа; если граф был заменен снаружи,
+        индекс строится заново.
+        """
+        if isinstance(self.graph, AdjacencyView):
+            return self.graph.compact.as_reverse_mapping()
+        if self._reverse_source is not self.graph:
+            self.reverse_graph = self._build_reverse_graph()
+            self._reverse_source = self.graph
+        return self.reverse_graph
     
     def _build_reverse_graph(self):
         """Построить обратный граф (кто от кого зависит)"""
@@ -130,56 +568,316 @@ class DependencyGraph:
         
         print("=" * 50)
     
-    def detect_cycles(self):
-        visited = set()
-        recursion_stack = set()
-        cycles = []
+    def display_reverse_dependencies_batch(self, target_packages):
+        """Вывести все обратные зависимости для списка пакетов"""
+        results = self.get_all_reverse_dependencies_batch(target_packages)
         
-        def dfs_cycle_detection(node: str, path: list):
-            if node in recursion_stack:
-                cycle_start = path.index(node)
-                cycle = path[cycle_start:]
-                if cycle not in cycles:
-                    cycles.append(cycle)
-                return
-            
-            if node in visited:
-                return
-            
-            visited.add(node)
-            recursion_stack.add(node)
-            path.append(node)
-            
-            if node in self.graph:
-                for neighbor in self.graph[node]:
-                    dfs_cycle_detection(neighbor, path.copy())
-            
-            recursion_stack.remove(node)
-            path.pop()
+        print(f"\nОбратные зависимости для {len(results)} пакетов")
+        print("=" * 50)
+        for target, dependents in results.items():
+            print(f"{target} ({len(dependents)}): {', '.join(dependents)}")
+        print("=" * 50)
+    
+    def find_cyclic_components(self):
+        """
+        Найти компоненты сильной связности, содержащие циклы, за O(V + E)
+
+        Returns:
+            Список компонент (списков пакетов); компонента идет раньше
+            компонент, которые от нее зависят
+        """
+        compact = self.compact_graph()
+        offsets, targets = compact.forward_offsets, compact.forward_targets
+        names = compact.nodes.names
+        return [
+            [names[node] for node in component]
+            for component in strongly_connected_components(compact.node_count, offsets, targets)
+            if is_cyclic_component(component, offsets, targets)
+        ]
+    
+    def detect_cycles(self, max_cycles_per_component: int = DEFAULT_CYCLES_PER_COMPONENT):
+        """
+        Найти циклические зависимости
+
+        Циклические компоненты находятся алгоритмом Тарьяна, а внутри каждой
+        перечисляются элементарные циклы, не более max_cycles_per_component.
+
+        Args:
+            max_cycles_per_component: Предел числа циклов на компоненту
+                (None - перечислить все)
+
+        Returns:
+            Список циклов, каждый - список пакетов
+        """
+        compact = self.compact_graph()
+        offsets, targets = compact.forward_offsets, compact.forward_targets
+        names = compact.nodes.names
+        cycles = []
         
-        for node in self.graph:
-            if node not in visited:
-                dfs_cycle_detection(node, [])
+        for component in strongly_connected_components(compact.node_count, offsets, targets):
+            if not is_cyclic_component(component, offsets, targets):
+                continue
+            for cycle in elementary_cycles(component, offsets, targets, max_cycles_per_component):
+                cycles.append([names[node] for node in cycle])
         
         return cycles
     
-    def get_all_dependencies_recursive(self, package: str, visited=None, depth=0):
-        if visited is None:
-            visited = set()
+    def get_build_layers(self):
+        """
+        Слои сборки: порядок, в котором пакеты можно обрабатывать параллельно
+
+        Циклические компоненты сжимаются в единицы (см. TopologicalLayers).
+        Первым идет слой пакетов без зависимостей; все зависимости пакета
+        находятся в более ранних слоях или в его собственной единице.
+
+        Returns:
+            Dict с полями layers (слои; слой - список единиц, единица -
+            отсортированный список пакетов, несколько пакетов - цикл),
+            widths (число пакетов в каждом слое), critical_path (единицы
+            самой длинной цепочки от зависящей к зависимостям) и
+            critical_path_length (число единиц в ней, равно числу слоев)
+        """
+        compact = self.compact_graph()
+        names = compact.nodes.names
+        layering = TopologicalLayers(compact.node_count, compact.forward_offsets, compact.forward_targets)
         
-        if package in visited:
+        def unit(component_id):
+            return sorted(names[node] for node in layering.components[component_id])
+        
+        return {
+            'layers': [[unit(component_id) for component_id in layer] for layer in layering.layers],
+            'widths': layering.widths(),
+            'critical_path': [unit(component_id) for component_id in layering.critical_path()],
+            'critical_path_length': layering.critical_path_length
+        }
+    
+    def display_build_layers(self):
+        """Вывести слои сборки, их ширину и критический путь"""
+        layers = self.get_build_layers()
+        
+        def describe(unit):
+            return unit[0] if len(unit) == 1 else f"[{', '.join(unit)}]"
+        
+        print(f"\nСЛОИ СБОРКИ ({len(layers['layers'])}):")
+        print("=" * 50)
+        for i, (layer, width) in enumerate(zip(layers['layers'], layers['widths']), 1):
+            print(f"Слой {i} (пакетов {width}, единиц {len(layer)}): {', '.join(describe(unit) for unit in layer)}")
+        print("-" * 50)
+        print(f"Критический путь ({layers['critical_path_length']}): "
+              f"{' -> '.join(describe(unit) for unit in layers['critical_path'])}")
+        print(f"Максимальная ширина слоя: {max(layers['widths'], default=0)}")
+        print("=" * 50)
+    
+    def get_all_dependencies(self, package: str):
+        """
+        Все транзитивные зависимости пакета
+
+        Обход в ширину по CSR-массивам от одного пакета: каждый узел
+        посещается один раз, поэтому общие поддеревья не обходятся повторно.
+        Для множества запросов к одному графу выгоднее transitive_closure().
+        """
+        compact = self.compact_graph()
+        node_id = compact.nodes.id(package)
+        if node_id is None:
             return set()
+        offsets, targets = compact.forward_offsets, compact.forward_targets
+        reached = set()
+        queue = deque([node_id])
+        while queue:
+            node = queue.popleft()
+            for next_node in targets[offsets[node]:offsets[node + 1]]:
+                if next_node not in reached:
+                    reached.add(next_node)
+                    queue.append(next_node)
+        names = compact.nodes.names
+        return {names[dep_id] for dep_id in reached}
+    
+    def depends_on(self, package: str, dependency: str) -> bool:
+        """Зависит ли пакет (транзитивно) от другого пакета"""
+        compact = self.compact_graph()
+        node_id = compact.nodes.id(package)
+        dependency_id = compact.nodes.id(dependency)
+        if node_id is None or dependency_id is None:
+            return False
+        return self.transitive_closure().depends_on(node_id, dependency_id)
+    
+    def find_path(self, package: str, dependency: str):
+        """
+        Кратчайшая цепочка зависимостей от пакета к другому пакету
+
+        Returns:
+            Список пакетов от package до dependency или None, если пути нет
+        """
+        compact = self.compact_graph()
+        source = compact.nodes.id(package)
+        target = compact.nodes.id(dependency)
+        if source is None or target is None:
+            return None
+        if source == target:
+            return [package]
         
-        visited.add(package)
-        all_dependencies = set()
+        offsets, targets = compact.forward_offsets, compact.forward_targets
+        parents = {source: None}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for edge in range(offsets[node], offsets[node + 1]):
+                next_node = targets[edge]
+                if next_node in parents:
+                    continue
+                parents[next_node] = node
+                if next_node == target:
+                    path = []
+                    while next_node is not None:
+                        path.append(compact.nodes.names[next_node])
+                        next_node = parents[next_node]
+                    return path[::-1]
+                queue.append(next_node)
+        return None
+    
+    def explain_dependency(self, package: str, max_paths: int = 1, root: Optional[str] = None):
+        """
+        Почему пакет попал в граф: кратчайшие цепочки от корня до пакета
+
+        Первая цепочка читается из индекса предшественников, записанного
+        при обходе, за O(длины цепочки). Следующие (различные простые
+        цепочки по неубыванию длины) ищутся от пакета к корням по обратному
+        индексу поиском A*, где оценка остатка - глубина BFS пакета.
+
+        Args:
+            package: Пакет, попадание которого нужно объяснить
+            max_paths: Сколько различных цепочек вернуть
+            root: Корень, от которого строятся цепочки (None - любой корень обхода)
+
+        Returns:
+            Список цепочек (списков пакетов от корня до package); пустой,
+            если пакета нет в построенном обходом графе
+        """
+        self._restore_predecessor_index()
+        if package not in self.depths or max_paths < 1:
+            return []
+        chain = self._predecessor_chain(package)
+        if max_paths == 1 and (root is None or chain[0] == root):
+            return [chain]
+
+        goals = {root} if root is not None else {node for node, depth in self.depths.items() if depth == 0}
+        reverse_graph = self._reverse_index()
+        depths = self.depths
+        order = itertools.count()
+        # В куче: (оценка длины полной цепочки, порядок, цепочка от package к корню)
+        heap = [(depths[package], next(order), (package,))]
+        paths = []
+        while heap and len(paths) < max_paths:
+            _, _, partial = heapq.heappop(heap)
+            node = partial[-1]
+            if node in goals:
+                paths.append(list(reversed(partial)))
+                continue
+            for dependent in dict.fromkeys(reverse_graph.get(node, ())):
+                if dependent in depths and dependent not in partial:
+                    heapq.heappush(heap, (len(partial) + depths[dependent], next(order), partial + (dependent,)))
+        return paths
+    
+    def explain_dependencies_batch(self, packages):
+        """
+        Кратчайшие цепочки от корней сразу для многих пакетов
+
+        Цепочки собираются по индексу предшественников с запоминанием:
+        общие начала цепочек строятся один раз, поэтому объяснение сотен
+        пакетов - один проход по их предкам в графе.
+
+        Args:
+            packages: Пакеты, попадание которых нужно объяснить
+
+        Returns:
+            Dict "пакет -> цепочка от корня" (None, если пакета нет в графе)
+        """
+        self._restore_predecessor_index()
+        chains = {}
+        results = {}
+        for package in dict.fromkeys(packages):
+            if package not in self.depths:
+                results[package] = None
+                continue
+            pending = []
+            node = package
+            while node not in chains and self.predecessors.get(node):
+                pending.append(node)
+                node = self.predecessors[node][0]
+            chain = chains.get(node)
+            if chain is None:
+                chain = chains[node] = (node,)
+            for dependency in reversed(pending):
+                chain = chains[dependency] = chain + (dependency,)
+            results[package] = list(chain)
+        return results
+    
+    def _restore_predecessor_index(self):
+        """
+        Восстанавливает глубины и индекс предшественников графа из снимка
+
+        Снимок хранит только смежность, поэтому индекс строится обходом в
+        ширину по CSR от корней из метаданных снимка (если их нет - от
+        пакетов без обратных зависимостей), один раз на загруженный снимок.
+        """
+        if self.snapshot is None or self.depths:
+            return
+        compact = self.compact_graph()
+        nodes = compact.nodes
+        roots = [nodes.id(root) for root in self.snapshot.metadata.get('roots') or () if root in nodes]
+        if not roots:
+            roots = [node for node in range(compact.node_count) if not len(compact.predecessors(node))]
         
-        if package in self.graph:
-            for dep in self.graph[package]:
-                all_dependencies.add(dep)
-                transitive_deps = self.get_all_dependencies_recursive(dep, visited.copy(), depth + 1)
-                all_dependencies.update(transitive_deps)
+        depths = {root: 0 for root in roots}
+        predecessors = {}
+        level = list(depths)
+        depth = 0
+        while level:
+            next_level = []
+            for node in level:
+                for target in compact.successors(node):
+                    if target not in depths:
+                        depths[target] = depth + 1
+                        predecessors[target] = [node]
+                        next_level.append(target)
+                    elif depths[target] == depth + 1 and predecessors[target][-1] != node:
+                        predecessors[target].append(node)
+            level = next_level
+            depth += 1
         
-        return all_dependencies
+        name = nodes.name
+        self.predecessors = {name(node): [name(p) for p in preds] for node, preds in predecessors.items()}
+        # depths присваивается последним: по нему проверяется, построен ли индекс
+        self.depths = {name(node): depth for node, depth in depths.items()}
+    
+    def _predecessor_chain(self, package: str):
+        """Цепочка от ближайшего корня до пакета по первым предшественникам"""
+        chain = [package]
+        predecessors = self.predecessors.get(package)
+        while predecessors:
+            chain.append(predecessors[0])
+            predecessors = self.predecessors.get(predecessors[0])
+        return chain[::-1]
+    
+    def display_dependency_explanation(self, package: str, max_paths: int = 1):
+        """Вывести цепочки, через которые пакет попал в граф"""
+        paths = self.explain_dependency(package, max_paths)
+        print(f"\nПочему в графе: {package}")
+        print("=" * 50)
+        if not paths:
+            print("Пакет отсутствует в графе")
+        for i, path in enumerate(paths, 1):
+            print(f"  Цепочка {i} (длина {len(path) - 1}): {' -> '.join(path)}")
+        print("=" * 50)
+    
+    def display_dependency_explanations_batch(self, packages):
+        """Вывести кратчайшие цепочки для списка пакетов"""
+        results = self.explain_dependencies_batch(packages)
+        print(f"\nЦепочки зависимостей для {len(results)} пакетов")
+        print("=" * 50)
+        for package, chain in results.items():
+            print(f"{package}: {' -> '.join(chain) if chain else 'отсутствует в графе'}")
+        print("=" * 50)
     
     def display_dependency_info(self, root_package: str, filter_substring: str = ""):
         print(f"\nАнализ зависимостей для: {root_package}")
@@ -192,7 +890,7 @@ class DependencyGraph:
         for i, dep in enumerate(direct_deps, 1):
             print(f"  {i}. {dep}")
         
-        all_deps = self.get_all_dependencies_recursive(root_package)
+        all_deps = self.get_all_dependencies(root_package)
         print(f"\nВсе зависимости ({len(all_deps)}):")
         for i, dep in enumerate(sorted(all_deps), 1):
             print(f"  {i}. {dep}")
@@ -205,11 +903,77 @@ class DependencyGraph:
         
         print("=" * 50)
     
+    def get_roots_summary(self, root_packages):
+        """
+        Сводка по корневым пакетам общего графа
+
+        Args:
+            root_packages: Корневые пакеты
+
+        Returns:
+            Список Dict с полями root, direct, transitive и shared (число
+            транзитивных зависимостей, общих хотя бы с одним другим корнем)
+        """
+        roots = list(dict.fromkeys(root_packages))
+        closure = self.transitive_closure()
+        nodes = self.compact_graph().nodes
+        masks = []
+        for root in roots:
+            node_id = nodes.id(root)
+            masks.append(closure.reachable(node_id) & ~(1 << node_id) if node_id is not None else 0)
+        
+        # Объединение масок всех остальных корней через префиксы и суффиксы
+        suffix = [0] * (len(masks) + 1)
+        for i in range(len(masks) - 1, -1, -1):
+            suffix[i] = suffix[i + 1] | masks[i]
+        
+        summary = []
+        prefix = 0
+        for i, root in enumerate(roots):
+            others = prefix | suffix[i + 1]
+            summary.append({
+                'root': root,
+                'direct': len(self.graph.get(root, ())),
+                'transitive': bin(masks[i]).count('1'),
+                'shared': bin(masks[i] & others).count('1')
+            })
+            prefix |= masks[i]
+        return summary
+    
+    def display_roots_summary(self, root_packages):
+        """Вывести сводку транзитивных зависимостей по корневым пакетам"""
+        summary = self.get_roots_summary(root_packages)
+        print(f"\nСВОДКА ПО КОРНЕВЫМ ПАКЕТАМ ({len(summary)}):")
+        print("=" * 50)
+        for item in summary:
+            print(f"  {item['root']}: прямых {item['direct']}, транзитивных {item['transitive']}, "
+                  f"общих с другими {item['shared']}")
+        print("-" * 50)
+        print(f"Всего уникальных пакетов: {self.compact_graph().node_count}, загружено POM: {self.fetch_count}, "
+              f"сумма транзитивных по корням: {sum(item['transitive'] for item in summary)}")
+        print("=" * 50)
+    
     def generate_plantuml_visualization(self, root_package: str, title: str = None):
         """Генерирует визуализацию графа в PlantUML"""
         if not title:
             title = f"Граф зависимостей для {root_package}"
         
-        visualizer = PlantUMLVisualizer()
+        visualizer = PlantUMLVisualizer(self.profiler)
         plantuml_code = visualizer.generate_plantuml(self.graph, root_package, title)
-        return visualizer, plantuml_code
\ No newline at end of file
+        return visualizer, plantuml_code
+
+    def display_plantuml_visualization(self, root_package: str, title: str = None):
+        """Потоково выводит PlantUML код графа на экран"""
+        PlantUMLVisualizer(self.profiler).display_plantuml(self.graph, root_package, title or f"Граф зависимостей для {root_package}")
+
+    def save_plantuml_visualization(self, root_package: str, filename: str, title: str = None):
+        """Потоково сохраняет PlantUML код графа в файл, не собирая его в памяти"""
+        PlantUMLVisualizer(self.profiler).save_plantuml(self.graph, root_package, filename,
+                                                        title or f"Граф зависимостей для {root_package}")
+
+
+def _version_key(package: str) -> str:
+    """groupId:artifactId пакета "g:a:v" (для идентификаторов без версии - само имя)"""
+    if package.count(':') >= 2:
+        return package.rsplit(':', 1)[0]
+    return package
@@ -0,0 +1,368 @@
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from maven_version import VersionResolutionError, needs_resolution
+
+
+PROPERTY_PATTERN = re.compile(r'\$\{([^}]+)\}')
+
+# Предел вложенности подстановок ${...}, защищает от циклических свойств
+MAX_INTERPOLATION_DEPTH = 10
+
+
+class PomInheritanceError(Exception):
+    """Ошибка построения эффективной модели POM"""
+    pass
+
+
+class EffectivePomResolver:
+    """
+    Построение эффективной модели POM (effective POM)
+
+    Учитывает цепочку parent-POM, подстановку свойств ${...},
+    dependencyManagement и импорт BOM (scope import). Диапазоны версий и
+    LATEST/RELEASE у зависимостей, родителей и BOM заменяются конкретными
+    версиями по maven-metadata.xml. Модели родителей и BOM
+    запоминаются по groupId:artifactId:version, поэтому общий родитель
+    (например, Spring или Apache parent) загружается и вычисляется один раз
+    на все пакеты, которые от него наследуются. Если потомок не переопределяет
+    свойства, на которые ссылается dependencyManagement родителя, эта секция
+    берется из кэша без повторной подстановки.
+    """
+
+    def __init__(self, maven_parser):
+        self.maven_parser = maven_parser
+        self.hits = 0
+        self.misses = 0
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        # Какой поток вычисляет модель и какую модель ждет поток (поиск циклов между потоками)
+        self._owners: Dict[str, int] = {}
+        self._waiting: Dict[int, str] = {}
+        # Пакет -> родители и BOM, из которых построена его эффективная модель;
+        # переживает clear(), пока живы списки зависимостей в кэшах парсера
+        self._inherited: Dict[str, frozenset] = {}
+        # Пакеты, зависимости которых зависят от выбора версии по maven-metadata.xml
+        self._ranged: set = set()
+        self._lock = threading.Lock()
+
+    def resolve(self, group_id: str, artifact_id: str, version: str,
+                chain: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """
+        Возвращает эффективную модель POM пакета с запоминанием
+
+        Args:
+            group_id: Group ID пакета
+            artifact_id: Artifact ID пакета
+            version: Версия пакета
+            chain: Пакеты, для которых уже идет вычисление (защита от циклов)
+
+        Returns:
+            Dict с полями properties, dependency_management и dependencies
+
+        Raises:
+            PomInheritanceError: Если цепочка parent/BOM циклична
+            MavenError: Если POM не удалось загрузить или разобрать
+        """
+        key = f"{group_id}:{artifact_id}:{version}"
+        if key in chain:
+            raise PomInheritanceError(f"Циклическое наследование POM: {' -> '.join(chain + (key,))}")
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self.hits += 1
+                return model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Один поток вычисляет модель, остальные ждут и берут результат из кэша
+        self._acquire(key, key_lock)
+        try:
+            with self._lock:
+                model = self._models.get(key)
+                if model is not None:
+                    self.hits += 1
+                    return model
+                self.misses += 1
+
+            model = self._build(group_id, artifact_id, version, chain + (key,))
+            with self._lock:
+                self._models[key] = model
+            return model
+        finally:
+            with self._lock:
+                self._owners.pop(key, None)
+            key_lock.release()
+
+    def _acquire(self, key: str, key_lock: threading.Lock) -> None:
+        """
+        Захватывает блокировку модели key
+
+        Параметр chain видит цикл только внутри одного потока. Если модель
+        вычисляет другой поток, который сам (возможно, через цепочку других
+        потоков) ждет модель текущего, ожидание стало бы взаимной блокировкой,
+        поэтому такой цикл тоже считается циклическим наследованием.
+
+        Raises:
+            PomInheritanceError: Если ожидание замыкает цикл parent/BOM
+        """
+        thread_id = threading.get_ident()
+        with self._lock:
+            if key_lock.acquire(blocking=False):
+                self._owners[key] = thread_id
+                return
+
+            cycle = [key]
+            owner = self._owners.get(key)
+            while owner is not None and owner != thread_id and len(cycle) <= len(self._waiting):
+                waited = self._waiting.get(owner)
+                if waited is None:
+                    break
+                cycle.append(waited)
+                owner = self._owners.get(waited)
+            if owner == thread_id:
+                raise PomInheritanceError(f"Циклическое наследование POM: {' -> '.join(cycle + [key])}")
+            self._waiting[thread_id] = key
+
+        try:
+            key_lock.acquire()
+        finally:
+            with self._lock:
+                self._waiting.pop(thread_id, None)
+        with self._lock:
+            self._owners[key] = thread_id
+
+    def effective_dependencies(self, group_id: str, artifact_id: str, version: str) -> List[Dict[str, str]]:
+        """
+        Прямые зависимости пакета после наследования и dependencyManagement
+
+        Модель самого пакета не запоминается (список зависимостей кэширует
+        MavenParser). Зависимости, версию которых так и не удалось определить,
+        пропускаются с предупреждением, чтобы в графе не появлялись узлы вида
+        "g:a:UNKNOWN".
+        """
+        key = f"{group_id}:{artifact_id}:{version}"
+        model = self._models.get(key) or self._build(group_id, artifact_id, version, (key,))
+        ranged = model['ranged']
+
+        dependencies = []
+        for dep in model['dependencies']:
+            if not dep['version'] or '${' in dep['version']:
+                print(f"Предупреждение: не удалось определить версию "
+                      f"{dep['group_id']}:{dep['artifact_id']}, зависимость пропущена")
+                continue
+            ranged = ranged or needs_resolution(dep['version'])
+            try:
+                version = self._concrete_version(dep['group_id'], dep['artifact_id'], dep['version'])
+            except VersionResolutionError as e:
+                print(f"Предупреждение: {e}, зависимость пропущена")
+                continue
+            dependencies.append({
+                'group_id': dep['group_id'],
+                'artifact_id': dep['artifact_id'],
+                'version': version,
+                'scope': dep['scope'] or 'compile',
+                'optional': dep['optional'] == 'true',
+                'exclusions': dep['exclusions']
+            })
+
+        with self._lock:
+            self._inherited[key] = model['sources']
+            if ranged:
+                self._ranged.add(key)
+            else:
+                self._ranged.discard(key)
+        return dependencies
+
+    def _build(self, group_id: str, artifact_id: str, version: str,
+               chain: Tuple[str, ...]) -> Dict[str, Any]:
+        raw = self.maven_parser.parse_pom(self.maven_parser.fetch_pom(group_id, artifact_id, version))
+        parent = raw['parent']
+
+        parent_model = None
+        sources = set()
+        ranged = False
+        if parent:
+            ranged = needs_resolution(parent['version'])
+            parent = dict(parent, version=self._concrete_version(parent['group_id'], parent['artifact_id'],
+                                                                 parent['version']))
+            parent_model = self.resolve(parent['group_id'], parent['artifact_id'], parent['version'], chain)
+            sources.add(f"{parent['group_id']}:{parent['artifact_id']}:{parent['version']}")
+            sources.update(parent_model['sources'])
+            ranged = ranged or parent_model['ranged']
+
+        properties = dict(parent_model['properties']) if parent_model else {}
+        properties.update(raw['properties'])
+        properties['project.groupId'] = raw['group_id'] or (parent or {}).get('group_id') or group_id
+        properties['project.artifactId'] = raw['artifact_id'] or artifact_id
+        properties['project.version'] = raw['version'] or (parent or {}).get('version') or version
+        if parent:
+            properties['project.parent.groupId'] = parent['group_id']
+            properties['project.parent.artifactId'] = parent['artifact_id']
+            properties['project.parent.version'] = parent['version']
+        for name in ('groupId', 'artifactId', 'version'):
+            properties[f'pom.{name}'] = properties[f'project.{name}']
+
+        # Наследование: записи родителя идут первыми, собственные переопределяют их
+        raw_management = (parent_model['raw_management'] if parent_model else []) + raw['dependency_management']
+        raw_dependencies = (parent_model['raw_dependencies'] if parent_model else []) + raw['dependencies']
+        references = set(parent_model['references']) if parent_model else set()
+        references.update(_referenced_properties(raw['dependency_management']))
+        references.update(_referenced_properties(raw['dependencies']))
+
+        if parent_model and not self._overridden(parent_model['properties'], properties) & parent_model['references']:
+            management, ranged_boms = self._build_management(
+                raw['dependency_management'], properties, chain, dict(parent_model['dependency_management']), sources
+            )
+        else:
+            management, ranged_boms = self._build_management(raw_management, properties, chain, {}, sources)
+
+        declared = {}
+        for dep in raw_dependencies:
+            dep = _interpolate_dependency(dep, properties)
+            declared[(dep['group_id'], dep['artifact_id'])] = dep
+
+        return {
+            'properties': properties,
+            'raw_management': raw_management,
+            'raw_dependencies': raw_dependencies,
+            'references': references,
+            'dependency_management': management,
+            'dependencies': [_apply_management(dep, management) for dep in declared.values()],
+            'sources': frozenset(sources),
+            'ranged': ranged or ranged_boms
+        }
+
+    def _build_management(self, entries: List[Dict[str, Optional[str]]], properties: Dict[str, str],
+                          chain: Tuple[str, ...], inherited: Dict[Tuple[str, str], Dict[str, Optional[str]]],
+                          sources: set) -> Tuple[Dict[Tuple[str, str], Dict[str, Optional[str]]], bool]:
+        """
+        Строит dependencyManagement: явные записи важнее импортированных BOM,
+        ранний импорт важнее позднего; импортированные BOM добавляются в sources
+
+        Returns:
+            (dependencyManagement, выбрана ли версия какого-либо BOM по maven-metadata.xml)
+        """
+        management = inherited
+        ranged = False
+        imports = []
+        for dep in entries:
+            dep = _interpolate_dependency(dep, properties)
+            if dep['scope'] == 'import' and dep['type'] == 'pom':
+                imports.append(dep)
+            else:
+                management[(dep['group_id'], dep['artifact_id'])] = dep
+
+        for bom in imports:
+            if not bom['version'] or '${' in bom['version']:
+                continue
+            bom_version = self._concrete_version(bom['group_id'], bom['artifact_id'], bom['version'])
+            bom_model = self.resolve(bom['group_id'], bom['artifact_id'], bom_version, chain)
+            sources.add(f"{bom['group_id']}:{bom['artifact_id']}:{bom_version}")
+            sources.update(bom_model['sources'])
+            ranged = ranged or needs_resolution(bom['version']) or bom_model['ranged']
+            for ga, managed in bom_model['dependency_management'].items():
+                management.setdefault(ga, managed)
+
+        return management, ranged
+
+    def _concrete_version(self, group_id: str, artifact_id: str, version: str) -> str:
+        """Версия без диапазона и мета-версии (см. MavenParser.resolve_version)"""
+        if not needs_resolution(version):
+            return version
+        return self.maven_parser.resolve_version(group_id, artifact_id, version)
+
+    @staticmethod
+    def _overridden(parent_properties: Dict[str, str], properties: Dict[str, str]) -> set:
+        """
+        Свойства, значение которых у потомка отличается от родительского,
+        включая свойства, ссылающиеся на измененные
+        """
+        overridden = {name for name, value in properties.items() if parent_properties.get(name) != value}
+        changed = True
+        while changed:
+            changed = False
+            for name, value in properties.items():
+                if name not in overridden and value and '${' in value \
+                        and overridden.intersection(PROPERTY_PATTERN.findall(value)):
+                    overridden.add(name)
+                    changed = True
+        return overridden
+
+    def inherited(self, group_id: str, artifact_id: str, version: str) -> frozenset:
+        """Родители и BOM (транзитивно), из которых построены зависимости пакета"""
+        with self._lock:
+            return self._inherited.get(f"{group_id}:{artifact_id}:{version}", frozenset())
+
+    def ranged(self, group_id: str, artifact_id: str, version: str) -> bool:
+        """
+        Выбрана ли версия зависимости, родителя или BOM пакета по
+        maven-metadata.xml (диапазон или LATEST/RELEASE)
+        """
+        with self._lock:
+            return f"{group_id}:{artifact_id}:{version}" in self._ranged
+
+    def dependents(self, key: str) -> set:
+        """
+        Пакеты, эффективная модель которых использовала key как родителя
+        или BOM (напрямую или через других родителей)
+        """
+        with self._lock:
+            return {package for package, sources in self._inherited.items() if key in sources}
+
+    def clear(self) -> None:
+        """Очищает кэш эффективных моделей"""
+        with self._lock:
+            self._models.clear()
+            self._key_locks.clear()
+
+
+def interpolate(value: Optional[str], properties: Dict[str, str]) -> Optional[str]:
+    """
+    Подставляет значения свойств ${...} в строку
+
+    Неизвестные свойства остаются в строке как есть.
+    """
+    if not value or '${' not in value:
+        return value
+
+    for _ in range(MAX_INTERPOLATION_DEPTH):
+        substituted = PROPERTY_PATTERN.sub(lambda match: properties.get(match.group(1), match.group(0)), value)
+        if substituted == value:
+            break
+        value = substituted
+    return value
+
+
+def _interpolate_dependency(dep: Dict[str, Any], properties: Dict[str, str]) -> Dict[str, Any]:
+    result = {field: interpolate(value, properties) for field, value in dep.items() if field != 'exclusions'}
+    result['exclusions'] = [interpolate(exclusion, properties) for exclusion in dep['exclusions']]
+    return result
+
+
+def _referenced_properties(entries: Iterable[Dict[str, Optional[str]]]) -> set:
+    """Имена свойств, на которые ссылаются записи зависимостей"""
+    names = set()
+    for dep in entries:
+        for field, value in dep.items():
+            values = value if field == 'exclusions' else (value,)
+            for item in values:
+                if item and '${' in item:
+                    names.update(PROPERTY_PATTERN.findall(item))
+    return names
+
+
+def _apply_management(dep: Dict[str, Optional[str]],
+                      management: Dict[Tuple[str, str], Dict[str, Optional[str]]]) -> Dict[str, Optional[str]]:
+    managed = management.get((dep['group_id'], dep['artifact_id']))
+    if not managed:
+        return dep
+    result = dict(dep)
+    if not result['version']:
+        result['version'] = managed['version']
+    if not result['scope']:
+        result['scope'] = managed['scope']
+    if managed['exclusions']:
+        result['exclusions'] = list(dict.fromkeys(result['exclusions'] + managed['exclusions']))
+    return result
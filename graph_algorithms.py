@@ -0,0 +1,345 @@
+from typing import Iterator, List, Optional, Sequence
+
+
+def strongly_connected_components(node_count: int, offsets: Sequence[int],
+                                  targets: Sequence[int]) -> List[List[int]]:
+    """
+    Компоненты сильной связности (итеративный алгоритм Тарьяна), O(V + E)
+
+    Граф задается в формате CSR: зависимости узла i -
+    targets[offsets[i]:offsets[i + 1]]. Рекурсия не используется, поэтому
+    глубокие цепочки не упираются в ограничение стека Python.
+
+    Args:
+        node_count: Число узлов
+        offsets: Смещения списков смежности (длина node_count + 1)
+        targets: Концы ребер
+
+    Returns:
+        Список компонент (id узлов по возрастанию) в обратном
+        топологическом порядке: компонента идет раньше всех компонент,
+        которые от нее зависят
+    """
+    index = [-1] * node_count
+    low = [0] * node_count
+    on_stack = bytearray(node_count)
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(node_count):
+        if index[root] != -1:
+            continue
+
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, offsets[root])]
+
+        while work:
+            node, edge = work[-1]
+            end = offsets[node + 1]
+            descended = False
+
+            while edge < end:
+                target = targets[edge]
+                edge += 1
+                if index[target] == -1:
+                    work[-1] = (node, edge)
+                    index[target] = low[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = 1
+                    work.append((target, offsets[target]))
+                    descended = True
+                    break
+                if on_stack[target] and index[target] < low[node]:
+                    low[node] = index[target]
+
+            if descended:
+                continue
+
+            work.pop()
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component.append(member)
+                    if member == node:
+                        break
+                component.sort()
+                components.append(component)
+            if work:
+                parent = work[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+
+    return components
+
+
+def is_cyclic_component(component: List[int], offsets: Sequence[int], targets: Sequence[int]) -> bool:
+    """Компонента содержит цикл: в ней больше одного узла или есть петля"""
+    if len(component) > 1:
+        return True
+    node = component[0]
+    return any(targets[edge] == node for edge in range(offsets[node], offsets[node + 1]))
+
+
+def elementary_cycles(component: List[int], offsets: Sequence[int], targets: Sequence[int],
+                      limit: Optional[int] = None) -> List[List[int]]:
+    """
+    Элементарные циклы внутри компоненты сильной связности (алгоритм Джонсона)
+
+    Каждый цикл выдается один раз, начиная с узла с наименьшим id.
+    После исчерпания узла компонента без него снова делится на компоненты
+    сильной связности, и поиск продолжается только в циклических.
+    Перебор итеративный и останавливается после limit циклов.
+
+    Args:
+        component: Узлы компоненты
+        offsets: Смещения списков смежности
+        targets: Концы ребер
+        limit: Максимальное число циклов (None - без ограничения)
+
+    Returns:
+        Список циклов, каждый - список id узлов
+    """
+    cycles = []
+    pending = [sorted(component)]
+    while pending:
+        nodes = pending.pop()
+        start = nodes[0]
+        members = set(nodes)
+        for cycle in _cycles_through(start, members, offsets, targets):
+            cycles.append(cycle)
+            if limit is not None and len(cycles) >= limit:
+                return cycles
+
+        # Дальнейшие циклы проходят только через узлы с большим id
+        members.discard(start)
+        for subcomponent in _subset_components(nodes[1:], members, offsets, targets):
+            if is_cyclic_component(subcomponent, offsets, targets):
+                pending.append(subcomponent)
+    return cycles
+
+
+def _subset_components(nodes: List[int], members: set, offsets: Sequence[int],
+                       targets: Sequence[int]) -> List[List[int]]:
+    """Компоненты сильной связности подграфа на узлах members (итеративный Тарьян)"""
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, offsets[root])]
+
+        while work:
+            node, edge = work[-1]
+            end = offsets[node + 1]
+            descended = False
+            while edge < end:
+                target = targets[edge]
+                edge += 1
+                if target not in members:
+                    continue
+                if target not in index:
+                    work[-1] = (node, edge)
+                    index[target] = low[target] = len(index)
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, offsets[target]))
+                    descended = True
+                    break
+                if target in on_stack and index[target] < low[node]:
+                    low[node] = index[target]
+            if descended:
+                continue
+
+            work.pop()
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(sorted(component))
+            if work:
+                parent = work[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+
+    return components
+
+
+def _cycles_through(start: int, members: set, offsets: Sequence[int], targets: Sequence[int]) -> Iterator[List[int]]:
+    """Циклы, проходящие через start, в подграфе на узлах members"""
+    def successors(node):
+        return (targets[edge] for edge in range(offsets[node], offsets[node + 1]) if targets[edge] in members)
+
+    path = [start]
+    blocked = {start}
+    blocked_by = {}
+    closed = [False]
+    stack = [(start, successors(start))]
+
+    while stack:
+        node, neighbours = stack[-1]
+        for neighbour in neighbours:
+            if neighbour == start:
+                yield list(path)
+                closed[-1] = True
+            elif neighbour not in blocked:
+                path.append(neighbour)
+                closed.append(False)
+                stack.append((neighbour, successors(neighbour)))
+                blocked.add(neighbour)
+                break
+        else:
+            stack.pop()
+            node = path.pop()
+            if closed.pop():
+                if closed:
+                    closed[-1] = True
+                _unblock(node, blocked, blocked_by)
+            else:
+                for neighbour in successors(node):
+                    blocked_by.setdefault(neighbour, set()).add(node)
+
+
+def _unblock(node: int, blocked: set, blocked_by: dict) -> None:
+    pending = [node]
+    while pending:
+        current = pending.pop()
+        if current in blocked:
+            blocked.discard(current)
+            pending.extend(blocked_by.pop(current, ()))
+
+
+class TopologicalLayers:
+    """
+    Слои конденсации графа для параллельной обработки, O(V + E)
+
+    Компоненты сильной связности (циклы) сжимаются в единицы. Слой 0 -
+    единицы без внешних зависимостей, слой k - единицы, чья самая длинная
+    цепочка зависимостей состоит из k единиц. Единицы одного слоя не
+    зависят друг от друга, и слои можно обрабатывать по порядку, а единицы
+    внутри слоя - одновременно. Компоненты приходят из Тарьяна в обратном
+    топологическом порядке, поэтому слои вычисляются за один проход без
+    рекурсии.
+    """
+
+    def __init__(self, node_count: int, offsets: Sequence[int], targets: Sequence[int]):
+        self.components = strongly_connected_components(node_count, offsets, targets)
+        self.component_of = [0] * node_count
+        self.layer_of: List[int] = []
+        # Зависимость единицы на самой длинной цепочке (-1 - нет зависимостей)
+        self._longest_dependency: List[int] = []
+
+        for component_id, component in enumerate(self.components):
+            for node in component:
+                self.component_of[node] = component_id
+            layer = 0
+            longest = -1
+            for node in component:
+                for edge in range(offsets[node], offsets[node + 1]):
+                    target_component = self.component_of[targets[edge]]
+                    if target_component != component_id and self.layer_of[target_component] >= layer:
+                        layer = self.layer_of[target_component] + 1
+                        longest = target_component
+            self.layer_of.append(layer)
+            self._longest_dependency.append(longest)
+
+        self.layers: List[List[int]] = [[] for _ in range(max(self.layer_of, default=-1) + 1)]
+        for component_id, layer in enumerate(self.layer_of):
+            self.layers[layer].append(component_id)
+
+    @property
+    def critical_path_length(self) -> int:
+        """Число единиц на самой длинной цепочке зависимостей (число слоев)"""
+        return len(self.layers)
+
+    def widths(self) -> List[int]:
+        """Число узлов в каждом слое"""
+        return [sum(len(self.components[component_id]) for component_id in layer) for layer in self.layers]
+
+    def critical_path(self) -> List[int]:
+        """Id компонент самой длинной цепочки: от зависящей единицы к ее зависимостям"""
+        if not self.layers:
+            return []
+        path = [self.layers[-1][0]]
+        while self._longest_dependency[path[-1]] != -1:
+            path.append(self._longest_dependency[path[-1]])
+        return path
+
+
+class TransitiveClosure:
+    """
+    Транзитивное замыкание графа в виде битовых множеств
+
+    Замыкание вычисляется один раз для всех узлов: компоненты сильной
+    связности обходятся в обратном топологическом порядке, и множество
+    достижимых узлов компоненты собирается из уже готовых множеств ее
+    зависимостей. Узлы одной компоненты разделяют одно множество (целое
+    число, бит i - узел с id i).
+    """
+
+    def __init__(self, node_count: int, offsets: Sequence[int], targets: Sequence[int]):
+        components = strongly_connected_components(node_count, offsets, targets)
+        self.node_count = node_count
+        self.component_of = [0] * node_count
+        self.reach: List[int] = []
+
+        for component_id, component in enumerate(components):
+            for node in component:
+                self.component_of[node] = component_id
+
+            reach = 0
+            cyclic = is_cyclic_component(component, offsets, targets)
+            for node in component:
+                for edge in range(offsets[node], offsets[node + 1]):
+                    target = targets[edge]
+                    target_component = self.component_of[target]
+                    if target_component != component_id:
+                        reach |= self.reach[target_component] | (1 << target)
+            if cyclic:
+                for node in component:
+                    reach |= 1 << node
+            self.reach.append(reach)
+
+    def reachable(self, node_id: int) -> int:
+        """Битовое множество узлов, достижимых из узла"""
+        return self.reach[self.component_of[node_id]]
+
+    def depends_on(self, node_id: int, dependency_id: int) -> bool:
+        """Зависит ли узел (транзитивно) от другого узла"""
+        return (self.reachable(node_id) >> dependency_id) & 1 == 1
+
+    def count(self, node_id: int) -> int:
+        """Число транзитивных зависимостей узла"""
+        return bin(self.reachable(node_id)).count('1')
+
+    def reachable_ids(self, node_id: int) -> List[int]:
+        """Id транзитивных зависимостей узла по возрастанию"""
+        return bits_to_ids(self.reachable(node_id))
+
+
+def bits_to_ids(mask: int) -> List[int]:
+    """Номера установленных битов множества по возрастанию"""
+    bits = bin(mask)[:1:-1]
+    ids = []
+    position = bits.find('1')
+    while position != -1:
+        ids.append(position)
+        position = bits.find('1', position + 1)
+    return ids
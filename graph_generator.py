@@ -0,0 +1,96 @@
+import random
+from typing import Dict, List
+
+
+# Корневой пакет сгенерированного графа
+ROOT_PACKAGE = 'root'
+
+
+def generate_graph(depth: int = 4, fan_out: int = 4, diamond_density: float = 0.3, cycle_rate: float = 0.0,
+                   max_width: int = 0, seed: int = 0) -> Dict[str, List[str]]:
+    """
+    Генерирует синтетический граф зависимостей
+
+    Граф строится по уровням от ROOT_PACKAGE: каждый пакет уровня L
+    получает fan_out зависимостей на уровне L + 1. С вероятностью
+    diamond_density зависимость - уже существующий пакет следующего уровня
+    (общая библиотека, "ромб"), иначе - новый пакет. С вероятностью
+    cycle_rate пакет дополнительно зависит от одного из своих предков,
+    что замыкает цикл. Результат детерминирован для одинаковых параметров.
+
+    Args:
+        depth: Число уровней под корнем
+        fan_out: Число зависимостей каждого пакета
+        diamond_density: Доля зависимостей на уже существующие пакеты (0..1)
+        cycle_rate: Доля пакетов с обратным ребром к предку (0..1)
+        max_width: Максимум пакетов на уровне (0 - без ограничения); при
+            достижении предела зависимости выбираются среди существующих
+        seed: Начальное значение генератора случайных чисел
+
+    Returns:
+        Dict: пакет -> список зависимостей; имена вида "l<уровень>n<номер>"
+    """
+    if not 0.0 <= diamond_density <= 1.0 or not 0.0 <= cycle_rate <= 1.0:
+        raise ValueError("diamond_density и cycle_rate должны быть в диапазоне 0..1")
+
+    rng = random.Random(seed)
+    graph = {ROOT_PACKAGE: []}
+    # Первый родитель каждого пакета: по этой цепочке выбираются предки для циклов
+    parents = {ROOT_PACKAGE: None}
+    level = [ROOT_PACKAGE]
+
+    for level_index in range(1, depth + 1):
+        next_level = []
+        for package in level:
+            dependencies = graph[package]
+            for _ in range(fan_out):
+                full = max_width and len(next_level) >= max_width
+                if next_level and (full or rng.random() < diamond_density):
+                    dependency = rng.choice(next_level)
+                    if dependency in dependencies:
+                        continue
+                else:
+                    dependency = f"l{level_index}n{len(next_level)}"
+                    graph[dependency] = []
+                    parents[dependency] = package
+                    next_level.append(dependency)
+                dependencies.append(dependency)
+        level = next_level
+
+    if cycle_rate:
+        for package in list(graph):
+            if package == ROOT_PACKAGE or rng.random() >= cycle_rate:
+                continue
+            ancestors = []
+            ancestor = parents[package]
+            while ancestor is not None:
+                ancestors.append(ancestor)
+                ancestor = parents[ancestor]
+            ancestor = rng.choice(ancestors)
+            if ancestor not in graph[package]:
+                graph[package].append(ancestor)
+
+    return graph
+
+
+def maven_coordinates(package: str, group_prefix: str = 'gen') -> str:
+    """Координаты "groupId:artifactId:version" для пакета сгенерированного графа"""
+    if package == ROOT_PACKAGE:
+        return f"{group_prefix}.root:root:1.0"
+    level, number = package[1:].split('n', 1)
+    return f"{group_prefix}.l{level}:a{number}:1.0"
+
+
+def to_maven_artifacts(graph: Dict[str, List[str]], group_prefix: str = 'gen') -> Dict[str, List[str]]:
+    """Граф в координатах Maven (для MockMavenRepository и write_repository)"""
+    return {
+        maven_coordinates(package, group_prefix): [maven_coordinates(dep, group_prefix) for dep in dependencies]
+        for package, dependencies in graph.items()
+    }
+
+
+def write_test_repository(graph: Dict[str, List[str]], path: str) -> None:
+    """Записывает граф в формате TestRepository ("пакет: зависимость, ...")"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for package, dependencies in graph.items():
+            f.write(f"{package}: {', '.join(dependencies)}\n")
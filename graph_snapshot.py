@@ -0,0 +1,224 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Optional
+
+from compact_graph import INDEX_TYPECODE, CompactGraph
+
+
+SNAPSHOT_MAGIC = b'DEPGRAPH'
+SNAPSHOT_VERSION = 1
+
+# Заголовок: магическое число, версия, порядок байт, число узлов, раскрытых
+# узлов и ребер, размеры таблицы строк и метаданных (нативный порядок байт)
+HEADER = struct.Struct('=8sIIIIIQI')
+
+# Метка порядка байт: массивы пишутся в нативном порядке платформы
+BYTE_ORDER_MARK = 0x01020304
+
+# Секции выравниваются, чтобы массивы можно было читать через memoryview.cast
+SECTION_ALIGNMENT = 8
+
+
+class SnapshotError(Exception):
+    """Ошибка чтения или записи снимка графа"""
+    pass
+
+
+def _padding(position: int) -> int:
+    return -position % SECTION_ALIGNMENT
+
+
+def save_snapshot(compact: CompactGraph, path: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Сохраняет граф в бинарный снимок
+
+    Формат: заголовок, смещения строк, таблица строк (UTF-8), прямая и
+    обратная смежность CSR, индекс id по возрастанию имен (для поиска
+    пакета без построения словаря) и метаданные JSON.
+
+    Args:
+        compact: Компактный граф
+        path: Путь к файлу снимка
+        metadata: Сведения о построении (корни, фильтр, глубина)
+    """
+    names = compact.nodes.names
+    encoded = [name.encode('utf-8') for name in names]
+    string_offsets = array(INDEX_TYPECODE, [0])
+    position = 0
+    for name in encoded:
+        position += len(name)
+        if position > 0xFFFFFFFF:
+            raise SnapshotError("Таблица строк снимка превышает 4 ГБ")
+        string_offsets.append(position)
+    strings = b''.join(encoded)
+
+    name_index = array(INDEX_TYPECODE, sorted(range(len(encoded)), key=encoded.__getitem__))
+    metadata_bytes = json.dumps(metadata or {}, ensure_ascii=False).encode('utf-8')
+
+    sections = [
+        string_offsets.tobytes(),
+        strings,
+        compact.forward_offsets.tobytes(),
+        compact.forward_targets.tobytes(),
+        compact.reverse_offsets.tobytes(),
+        compact.reverse_targets.tobytes(),
+        name_index.tobytes(),
+        metadata_bytes
+    ]
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, BYTE_ORDER_MARK, compact.node_count,
+                            compact.expanded_count, compact.edge_count, len(strings), len(metadata_bytes)))
+        f.write(b'\0' * _padding(HEADER.size))
+        for section in sections:
+            f.write(section)
+            f.write(b'\0' * _padding(len(section)))
+
+
+class MappedNames(Sequence):
+    """Имена узлов, декодируемые из отображенной таблицы строк по требованию"""
+
+    def __init__(self, offsets: memoryview, strings: memoryview):
+        self._offsets = offsets
+        self._strings = strings
+
+    def __getitem__(self, node_id: int) -> str:
+        return str(self._strings[self._offsets[node_id]:self._offsets[node_id + 1]], 'utf-8')
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class MappedNodeTable:
+    """
+    Таблица имен снимка только для чтения с интерфейсом NodeTable
+
+    Поиск id по имени - двоичный поиск по индексу, отсортированному по имени.
+    """
+
+    def __init__(self, offsets: memoryview, strings: memoryview, name_index: memoryview):
+        self.names = MappedNames(offsets, strings)
+        self._offsets = offsets
+        self._strings = strings
+        self._name_index = name_index
+
+    def _encoded(self, node_id: int) -> bytes:
+        return self._strings[self._offsets[node_id]:self._offsets[node_id + 1]].tobytes()
+
+    def id(self, name: str) -> Optional[int]:
+        """Возвращает id пакета или None, если пакет неизвестен"""
+        key = name.encode('utf-8')
+        low, high = 0, len(self._name_index)
+        while low < high:
+            middle = (low + high) // 2
+            if self._encoded(self._name_index[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._name_index) and self._encoded(self._name_index[low]) == key:
+            return self._name_index[low]
+        return None
+
+    def name(self, node_id: int) -> str:
+        return self.names[node_id]
+
+    def intern(self, name: str) -> int:
+        raise SnapshotError("Снимок графа доступен только для чтения")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return self.id(name) is not None
+
+
+class GraphSnapshot:
+    """
+    Снимок графа, отображенный в память
+
+    Массивы смежности и таблица строк не копируются: CompactGraph снимка
+    работает прямо поверх memoryview, поэтому открытие занимает время,
+    не зависящее от размера графа.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise SnapshotError(f"Файл снимка пуст: {path}")
+        self._buffer = memoryview(self._mmap)
+        self._views = []
+
+        if len(self._buffer) < HEADER.size:
+            self.close()
+            raise SnapshotError(f"Файл не является снимком графа: {path}")
+        magic, version, byte_order, node_count, expanded_count, edge_count, strings_size, metadata_size = \
+            HEADER.unpack_from(self._buffer)
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise SnapshotError(f"Файл не является снимком графа: {path}")
+        if byte_order != BYTE_ORDER_MARK:
+            self.close()
+            raise SnapshotError(f"Снимок записан на платформе с другим порядком байт ({sys.byteorder} здесь)")
+        if version != SNAPSHOT_VERSION:
+            self.close()
+            raise SnapshotError(f"Неподдерживаемая версия снимка: {version} (ожидается {SNAPSHOT_VERSION})")
+
+        self._position = HEADER.size + _padding(HEADER.size)
+        string_offsets = self._section(node_count + 1)
+        strings = self._section(strings_size, raw=True)
+        forward_offsets = self._section(node_count + 1)
+        forward_targets = self._section(edge_count)
+        reverse_offsets = self._section(node_count + 1)
+        reverse_targets = self._section(edge_count)
+        name_index = self._section(node_count)
+        self.metadata = json.loads(str(self._section(metadata_size, raw=True), 'utf-8') or '{}')
+
+        self.compact = CompactGraph(
+            MappedNodeTable(string_offsets, strings, name_index), expanded_count,
+            forward_offsets, forward_targets, reverse_offsets, reverse_targets
+        )
+
+    def _section(self, length: int, raw: bool = False) -> memoryview:
+        """Следующая секция файла: байты или массив 32-битных индексов"""
+        size = length if raw else length * array(INDEX_TYPECODE).itemsize
+        end = self._position + size
+        if end > len(self._buffer):
+            self.close()
+            raise SnapshotError(f"Снимок графа поврежден: {self.path}")
+        section = self._buffer[self._position:end]
+        self._views.append(section)
+        if not raw:
+            section = section.cast(INDEX_TYPECODE)
+            self._views.append(section)
+        self._position = end + _padding(size)
+        return section
+
+    def close(self) -> None:
+        """
+        Освобождает отображение
+
+        После закрытия граф снимка недоступен; срезы массивов, полученные
+        снаружи, должны быть освобождены до вызова.
+        """
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._buffer.release()
+        self._mmap.close()
+
+
+def load_snapshot(path: str) -> GraphSnapshot:
+    """
+    Открывает снимок графа
+
+    Raises:
+        SnapshotError: Если файл не является снимком поддерживаемой версии
+    """
+    return GraphSnapshot(path)
@@ -0,0 +1,207 @@
+import gzip
+import http.client
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class TransportError(Exception):
+    """Ошибка HTTP-транспорта после исчерпания повторных попыток"""
+    pass
+
+
+class HttpResponse:
+    """Результат HTTP-запроса"""
+
+    def __init__(self, status: int, body: bytes, headers: Dict[str, str], url: Optional[str] = None,
+                 wire_bytes: Optional[int] = None):
+        self.status = status
+        self.body = body
+        self.headers = headers
+        # Адрес, по которому фактически получен ответ
+        self.url = url
+        # Размер тела в том виде, в котором оно пришло по сети (до распаковки gzip)
+        self.wire_bytes = len(body) if wire_bytes is None else wire_bytes
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get('etag')
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get('last-modified')
+
+
+class HttpTransport:
+    """
+    HTTP-транспорт с пулом keep-alive соединений для каждого хоста
+
+    Поддерживает сжатие gzip, условные запросы (ETag / If-Modified-Since),
+    тайм-ауты и ограниченное число повторов с экспоненциальной задержкой
+    и случайным разбросом. Ведет счетчики запросов по хостам.
+    """
+
+    # Статусы, при которых запрос имеет смысл повторить
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, timeout: float = 30.0, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 10.0, pool_size: int = 16, user_agent: str = "dependency-visualizer"):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.user_agent = user_agent
+
+        self._pools: Dict[Tuple[str, str, int], list] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> HttpResponse:
+        """
+        Выполняет GET-запрос с повторами
+
+        Args:
+            url: Адрес ресурса (http или https)
+            etag: ETag закэшированной копии для условного запроса
+            last_modified: Last-Modified закэшированной копии
+
+        Returns:
+            HttpResponse с телом, распакованным из gzip при необходимости
+
+        Raises:
+            TransportError: Если запрос не удался после всех повторов
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise TransportError(f"Неподдерживаемая схема URL: {url}")
+
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+
+        headers = {
+            'Accept-Encoding': 'gzip',
+            'User-Agent': self.user_agent,
+            'Connection': 'keep-alive',
+        }
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count(parts.hostname, 'retries')
+                time.sleep(self._backoff_delay(attempt))
+
+            try:
+                response = self._request_once(key, path, headers)
+            except (OSError, http.client.HTTPException) as e:
+                self._count(parts.hostname, 'errors')
+                last_error = e
+                continue
+
+            if response.status in self.RETRY_STATUSES:
+                last_error = TransportError(f"HTTP {response.status}")
+                continue
+
+            if response.status == 304:
+                self._count(parts.hostname, 'not_modified')
+            response.url = url
+            return response
+
+        raise TransportError(f"Не удалось загрузить {url} после {self.max_retries + 1} попыток: {last_error}")
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Задержка перед повтором: экспонента с полным случайным разбросом"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+    def _request_once(self, key: Tuple[str, str, int], path: str, headers: Dict[str, str]) -> HttpResponse:
+        connection, reused = self._acquire(key)
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            raw_response = connection.getresponse()
+            body = raw_response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            connection.close()
+            if not reused:
+                raise
+            # Сервер закрыл простаивающее соединение - повторяем на новом
+            return self._request_once(key, path, headers)
+        except Exception:
+            connection.close()
+            raise
+
+        response_headers = {name.lower(): value for name, value in raw_response.getheaders()}
+        wire_bytes = len(body)
+        self._count(key[1], 'requests')
+        self._count(key[1], 'bytes', wire_bytes)
+        self._count(key[1], 'seconds', time.perf_counter() - started)
+
+        if raw_response.will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+
+        if response_headers.get('content-encoding') == 'gzip':
+            body = gzip.decompress(body)
+
+        return HttpResponse(raw_response.status, body, response_headers, wire_bytes=wire_bytes)
+
+    def _acquire(self, key: Tuple[str, str, int]) -> Tuple[http.client.HTTPConnection, bool]:
+        """Возвращает соединение из пула или новое и признак повторного использования"""
+        with self._lock:
+            pool = self._pools.setdefault(key, [])
+            if pool:
+                return pool.pop(), True
+
+        scheme, host, port = key
+        self._count(host, 'connections')
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def _release(self, key: Tuple[str, str, int], connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            pool = self._pools.setdefault(key, [])
+            if len(pool) < self.pool_size:
+                pool.append(connection)
+                return
+        connection.close()
+
+    def _count(self, host: str, counter: str, amount: float = 1) -> None:
+        with self._lock:
+            host_stats = self._stats.setdefault(host, {})
+            host_stats[counter] = host_stats.get(counter, 0) + amount
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Возвращает копию счетчиков запросов по хостам"""
+        with self._lock:
+            return {host: dict(counters) for host, counters in self._stats.items()}
+
+    def display_stats(self) -> None:
+        """Выводит счетчики запросов по хостам"""
+        print("\nСтатистика HTTP-запросов:")
+        print("=" * 60)
+        for host, counters in sorted(self.stats().items()):
+            print(f"{host}: запросов {int(counters.get('requests', 0))}, "
+                  f"соединений {int(counters.get('connections', 0))}, "
+                  f"повторов {int(counters.get('retries', 0))}, "
+                  f"ошибок {int(counters.get('errors', 0))}, "
+                  f"304 {int(counters.get('not_modified', 0))}, "
+                  f"байт {int(counters.get('bytes', 0))}, "
+                  f"время {counters.get('seconds', 0):.3f} с")
+        print("=" * 60)
+
+    def close(self) -> None:
+        """Закрывает все соединения пула"""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            for connection in pool:
+                connection.close()
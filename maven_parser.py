@@ -1,9 +1,16 @@
-import urllib.request
-import urllib.error
+import time
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 import re
 
+from effective_pom import EffectivePomResolver
+from http_transport import HttpTransport, HttpResponse
+from maven_version import VersionResolutionError, VersionResolver, needs_resolution
+from pom_cache import PomCache
+from profiler import DISABLED, Profiler
+from repository_backend import (LocalResponse, RepositoryBackend, RepositoryBackendError, create_backend,
+                                metadata_path, pom_path)
+
 
 class MavenError(Exception):
     """Базовое исключение для ошибок Maven"""
@@ -15,11 +22,34 @@ class MavenRepositoryError(MavenError):
     pass
 
 
+class MavenArtifactNotFoundError(MavenRepositoryError):
+    """Артефакт отсутствует в репозитории"""
+    pass
+
+
 class MavenPackageError(MavenError):
     """Ошибка поиска пакета"""
     pass
 
 
+def _local_name(tag: str) -> str:
+    """Имя XML-элемента без пространства имен"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _make_dependency(fields: Dict[str, str], exclusions: List[str]) -> Dict[str, Any]:
+    """Запись зависимости из полей элемента <dependency> и его <exclusions>"""
+    return {
+        'group_id': fields['groupId'],
+        'artifact_id': fields['artifactId'],
+        'version': fields.get('version') or None,
+        'scope': fields.get('scope') or None,
+        'type': fields.get('type') or 'jar',
+        'optional': fields.get('optional') or None,
+        'exclusions': exclusions
+    }
+
+
 class MavenParser:
     """Парсер для извлечения зависимостей из Maven-пакетов"""
     
@@ -27,43 +57,38 @@ class MavenParser:
     MAVEN_CENTRAL = "https://repo1.maven.org/maven2"
     MAVEN_GOOGLE = "https://maven.google.com"
     
-    def __init__(self, repository_url: str = None):
+    # Версия формата разобранных зависимостей в постоянном кэше
+    DEPENDENCIES_FORMAT = 7
+    
+    # Секции POM с зависимостями и размер порции для потокового разбора
+    DEPENDENCY_SECTIONS = {
+        ('project', 'dependencies', 'dependency'): 'dependencies',
+        ('project', 'dependencyManagement', 'dependencies', 'dependency'): 'dependency_management'
+    }
+    PROJECT_FIELDS = ('groupId', 'artifactId', 'version', 'packaging')
+    PARSE_CHUNK_SIZE = 16 * 1024
+    
+    def __init__(self, repository_url: str = None, cache: Optional[PomCache] = None, offline: bool = False,
+                 transport: Optional[HttpTransport] = None, backend: Optional[RepositoryBackend] = None,
+                 profiler: Profiler = DISABLED, metadata_ttl: float = 3600.0, negative_ttl: float = 600.0,
+                 verbose: bool = True):
         self.repository_url = repository_url or self.MAVEN_CENTRAL
+        self.profiler = profiler
+        # Выводить загружаемые адреса и пакеты (предупреждения выводятся всегда)
+        self.verbose = verbose
+        # Срок годности maven-metadata.xml и отрицательных результатов (404), секунды
+        self.negative_ttl = negative_ttl
+        self._missing: Dict[str, float] = {}
+        self.version_resolver = VersionResolver(self, ttl=metadata_ttl, negative_ttl=negative_ttl)
         self.dependencies_cache = {}
+        # Срок годности списков в dependencies_cache, выбранных по maven-metadata.xml
+        self._ranged_expiry: Dict[str, float] = {}
+        self.cache = cache
+        self.offline = offline
+        self.transport = transport or HttpTransport()
+        self.backend = backend or create_backend(self.repository_url, self.transport)
+        self.pom_resolver = EffectivePomResolver(self)
     
-    def extract_dependencies_from_pom(self, pom_content: str):
-        """Извлекает зависимости из POM-файла"""
-        try:
-            namespaces = {'ns': 'http://maven.apache.org/POM/4.0.0'}
-            root = ET.fromstring(pom_content)
-            
-            dependencies = []
-            
-            for dep in root.findall('.//ns:dependencies/ns:dependency', namespaces):
-                group_id_elem = dep.find('ns:groupId', namespaces)
-                artifact_id_elem = dep.find('ns:artifactId', namespaces)
-                version_elem = dep.find('ns:version', namespaces)
-                
-                if group_id_elem is not None and artifact_id_elem is not None:
-                    version = version_elem.text if version_elem is not None else 'LATEST'
-                    
-                    # Пропускаем зависимости без версии (кроме BOM)
-                    if version == 'UNKNOWN':
-                        continue
-                        
-                    dependency = {
-                        'group_id': group_id_elem.text,
-                        'artifact_id': artifact_id_elem.text,
-                        'version': version,
-                        'scope': 'compile'
-                    }
-                    dependencies.append(dependency)
-            
-            return dependencies
-            
-        except ET.ParseError as e:
-            raise MavenError(f"Ошибка парсинга POM: {e}")
-
     def parse_maven_identifier(self, package_name: str) -> Dict[str, str]:
         """
         Парсит идентификатор Maven-пакета в формате groupId:artifactId:version
@@ -102,89 +127,170 @@ class MavenParser:
         Returns:
             URL POM-файла
         """
-        group_path = group_id.replace('.', '/')
-        return f"{self.repository_url}/{group_path}/{artifact_id}/{version}/{artifact_id}-{version}.pom"
+        return f"{self.repository_url}/{pom_path(group_id, artifact_id, version)}"
     
-    def build_metadata_url(self, group_id: str, artifact_id: str) -> str:
+    def resolve_version(self, group_id: str, artifact_id: str, version: str) -> str:
         """
-        Строит URL для metadata-файла в Maven-репозитории
+        Конкретная версия для диапазона ([1.2,2.0)) или LATEST/RELEASE
         
-        Args:
-            group_id: Group ID пакета
-            artifact_id: Artifact ID пакета
-            
-        Returns:
-            URL metadata-файла
+        Версия выбирается по maven-metadata.xml; обычная версия
+        возвращается без изменений.
+        
+        Raises:
+            VersionResolutionError: Если подходящей версии нет
+            MavenRepositoryError: Если метаданные не удалось загрузить
         """
-        group_path = group_id.replace('.', '/')
-        return f"{self.repository_url}/{group_path}/{artifact_id}/maven-metadata.xml"
+        if not needs_resolution(version):
+            return version
+        resolved = self.version_resolver.resolve(group_id, artifact_id, version)
+        self.profiler.count('versions.resolved')
+        return resolved
     
-    def fetch_xml_content(self, url: str) -> str:
+    def fetch_metadata(self, group_id: str, artifact_id: str, ttl: float, negative_ttl: float):
         """
-        Загружает XML-контент по URL
+        Загружает maven-metadata.xml артефакта, используя постоянный кэш
         
         Args:
-            url: URL для загрузки
+            group_id: Group ID артефакта
+            artifact_id: Artifact ID артефакта
+            ttl: Срок годности сохраненных метаданных, секунды
+            negative_ttl: Срок годности записи об отсутствии метаданных, секунды
             
         Returns:
-            XML-контент как строка
+            (содержимое или None, если метаданных нет в репозитории; время загрузки)
             
         Raises:
-            MavenRepositoryError: Если не удалось загрузить
+            MavenRepositoryError: Если метаданные не удалось загрузить
         """
+        key = f"{group_id}:{artifact_id}"
+        path = metadata_path(group_id, artifact_id)
+        
+        entry = self.cache.get_metadata(key) if self.cache else None
+        if entry is not None:
+            content, fetched_at = entry
+            if self.offline or time.time() - fetched_at < (ttl if content is not None else negative_ttl):
+                self.profiler.count('metadata.cache_hits')
+                return content, fetched_at
+        
+        if self.offline:
+            response = self.backend.fetch_local(path)
+            return (self._decode_body(response) if response is not None else None), time.time()
+        
         try:
-            with urllib.request.urlopen(url) as response:
-                if response.status == 200:
-                    return response.read().decode('utf-8')
-                else:
-                    raise MavenRepositoryError(
-                        f"Не удалось загрузить {url}. Статус: {response.status}"
-                    )
-        except urllib.error.URLError as e:
-            raise MavenRepositoryError(f"Ошибка сети при загрузке {url}: {e}")
-        except Exception as e:
-            raise MavenRepositoryError(f"Неожиданная ошибка при загрузке {url}: {e}")
+            with self.profiler.timer('metadata.fetch_seconds'):
+                response = self.backend.fetch(path)
+        except RepositoryBackendError as e:
+            raise MavenRepositoryError(str(e))
+        metadata_url = response.url or self.backend.location(path)
+        if self.verbose:
+            print(f"Metadata URL: {metadata_url}")
+        
+        if response.status == 404:
+            content = None
+        elif response.status == 200:
+            content = self._decode_body(response)
+        else:
+            raise MavenRepositoryError(
+                f"Не удалось загрузить {metadata_url}. Статус: {response.status}"
+            )
+        if self.cache:
+            self.cache.put_metadata(key, content)
+        return content, time.time()
     
-    def extract_dependencies_from_pom(self, pom_content: str) -> List[Dict[str, str]]:
+    def parse_pom(self, pom_content: str) -> Dict[str, Any]:
         """
-        Извлекает зависимости из POM-файла
+        Разбирает POM-файл в модель проекта
+        
+        POM разбирается потоково: сохраняются только координаты проекта,
+        parent, properties, dependencies и dependencyManagement, а плагины
+        и профили пропускаются. Пространство имен POM не требуется.
         
         Args:
             pom_content: Содержимое POM-файла
             
         Returns:
-            Список зависимостей
-        """
-        try:
-            # Регистрируем namespace для правильного парсинга
-            namespaces = {
-                'ns': 'http://maven.apache.org/POM/4.0.0'
-            }
+            Dict с полями group_id, artifact_id, version, parent, properties,
+            dependencies и dependency_management (значения без подстановки
+            свойств, отсутствующие поля - None)
             
-            root = ET.fromstring(pom_content)
-            
-            dependencies = []
+        Raises:
+            MavenError: Если POM-файл не является корректным XML
+        """
+        with self.profiler.timer('pom.parse_seconds'):
+            try:
+                parser = ET.XMLPullParser(events=('start', 'end'))
+                project = {}
+                parent = {}
+                properties = {}
+                sections = {'dependencies': [], 'dependency_management': []}
+                path = []
+                elements = []
+                section = None
+                current = None
+                exclusions = []
+                exclusion = {}
             
-            # Ищем секцию dependencies
-            for dep in root.findall('.//ns:dependencies/ns:dependency', namespaces):
-                group_id_elem = dep.find('ns:groupId', namespaces)
-                artifact_id_elem = dep.find('ns:artifactId', namespaces)
-                version_elem = dep.find('ns:version', namespaces)
-                scope_elem = dep.find('ns:scope', namespaces)
+                for offset in range(0, len(pom_content), self.PARSE_CHUNK_SIZE):
+                    parser.feed(pom_content[offset:offset + self.PARSE_CHUNK_SIZE])
                 
-                if group_id_elem is not None and artifact_id_elem is not None:
-                    dependency = {
-                        'group_id': group_id_elem.text,
-                        'artifact_id': artifact_id_elem.text,
-                        'version': version_elem.text if version_elem is not None else 'UNKNOWN',
-                        'scope': scope_elem.text if scope_elem is not None else 'compile'
-                    }
-                    dependencies.append(dependency)
+                    for event, elem in parser.read_events():
+                        if event == 'start':
+                            path.append(_local_name(elem.tag))
+                            elements.append(elem)
+                            if len(path) in (3, 4) and tuple(path) in self.DEPENDENCY_SECTIONS:
+                                section = self.DEPENDENCY_SECTIONS[tuple(path)]
+                                current = {}
+                                exclusions = []
+                            continue
+                    
+                        depth = len(path)
+                        name = path[-1]
+                        if current is not None:
+                            if name == 'dependency' and tuple(path) in self.DEPENDENCY_SECTIONS:
+                                if current.get('groupId') and current.get('artifactId'):
+                                    sections[section].append(_make_dependency(current, exclusions))
+                                current = None
+                                section = None
+                            elif path[-2] == 'dependency' and name != 'exclusions':
+                                current[name] = (elem.text or '').strip()
+                            elif name == 'exclusion' and path[-2] == 'exclusions':
+                                if exclusion.get('groupId') and exclusion.get('artifactId'):
+                                    exclusions.append(f"{exclusion['groupId']}:{exclusion['artifactId']}")
+                                exclusion = {}
+                            elif path[-2] == 'exclusion':
+                                exclusion[name] = (elem.text or '').strip()
+                        elif depth == 2 and name in self.PROJECT_FIELDS:
+                            project[name] = (elem.text or '').strip()
+                        elif depth == 3 and path[1] == 'parent':
+                            parent[name] = (elem.text or '').strip()
+                        elif depth == 3 and path[1] == 'properties':
+                            properties[name] = (elem.text or '').strip()
+                    
+                        # Отсоединяем разобранные элементы от родителя, они больше не нужны
+                        path.pop()
+                        elements.pop()
+                        if elements:
+                            elements[-1].clear()
             
-            return dependencies
+                parser.close()
             
-        except ET.ParseError as e:
-            raise MavenError(f"Ошибка парсинга POM: {e}")
+            except ET.ParseError as e:
+                raise MavenError(f"Ошибка парсинга POM: {e}")
+        
+        return {
+            'group_id': project.get('groupId') or None,
+            'artifact_id': project.get('artifactId') or None,
+            'version': project.get('version') or None,
+            'packaging': project.get('packaging') or 'jar',
+            'parent': {
+                'group_id': parent.get('groupId'),
+                'artifact_id': parent.get('artifactId'),
+                'version': parent.get('version')
+            } if parent.get('groupId') and parent.get('artifactId') and parent.get('version') else None,
+            'properties': properties,
+            'dependencies': sections['dependencies'],
+            'dependency_management': sections['dependency_management']
+        }
     
     def get_direct_dependencies(self, package_name: str) -> List[Dict[str, str]]:
         """
@@ -199,36 +305,221 @@ class MavenParser:
         Raises:
             MavenError: Если не удалось получить зависимости
         """
-        if package_name in self.dependencies_cache:
-            return self.dependencies_cache[package_name]
+        dependencies = self._memory_dependencies(package_name)
+        if dependencies is not None:
+            return dependencies
         
         try:
             # Парсим идентификатор пакета
             package_info = self.parse_maven_identifier(package_name)
             group_id = package_info['group_id']
             artifact_id = package_info['artifact_id']
-            version = package_info['version']
+            requested_version = package_info['version']
             
-            print(f"Поиск зависимостей для: {group_id}:{artifact_id}:{version}")
+            # Диапазон или LATEST/RELEASE заменяется конкретной версией. В памяти
+            # зависимости хранятся под ней, а не под исходным именем, поэтому
+            # после истечения metadata_ttl новая версия дает новый список
+            version = self.resolve_version(group_id, artifact_id, requested_version)
+            cache_key = f"{group_id}:{artifact_id}:{version}"
+            dependencies = self._memory_dependencies(cache_key)
+            if dependencies is not None:
+                return dependencies
             
-            # Строим URL для POM-файла
-            pom_url = self.build_pom_url(group_id, artifact_id, version)
-            print(f"POM URL: {pom_url}")
+            if self.verbose:
+                print(f"Поиск зависимостей для: {group_id}:{artifact_id}:{requested_version}")
+            
+            if self.cache:
+                dependencies = self.cache.get_dependencies(
+                    cache_key, self.DEPENDENCIES_FORMAT, allow_stale=self.offline
+                )
+                if dependencies is not None:
+                    self.profiler.count('dependencies.cache_hits')
+                    self.dependencies_cache[cache_key] = dependencies
+                    return dependencies
+                self.profiler.count('dependencies.cache_misses')
             
-            # Загружаем и парсим POM
-            pom_content = self.fetch_xml_content(pom_url)
-            dependencies = self.extract_dependencies_from_pom(pom_content)
+            # Загружаем POM и строим эффективную модель с учетом родителей
+            with self.profiler.timer('dependencies.resolve_seconds'):
+                dependencies = self.pom_resolver.effective_dependencies(group_id, artifact_id, version)
             
-            # Кэшируем результат
-            self.dependencies_cache[package_name] = dependencies
+            # Кэшируем результат. Список с версиями, выбранными по maven-metadata.xml,
+            # не сохраняется на диск и живет в памяти не дольше самих метаданных
+            self.dependencies_cache[cache_key] = dependencies
+            if self.pom_resolver.ranged(group_id, artifact_id, version):
+                self._ranged_expiry[cache_key] = time.time() + self.version_resolver.ttl
+            elif self.cache:
+                self.cache.put_dependencies(cache_key, dependencies, self.DEPENDENCIES_FORMAT,
+                                            self.pom_resolver.inherited(group_id, artifact_id, version))
             
             return dependencies
             
         except MavenError:
             raise
+        except VersionResolutionError as e:
+            raise MavenPackageError(str(e))
         except Exception as e:
             raise MavenError(f"Неожиданная ошибка при получении зависимостей: {e}")
     
+    def _memory_dependencies(self, key: str) -> Optional[List[Dict[str, str]]]:
+        """Список зависимостей из dependencies_cache, если он есть и не устарел"""
+        dependencies = self.dependencies_cache.get(key)
+        if dependencies is None:
+            return None
+        expires_at = self._ranged_expiry.get(key)
+        if expires_at is not None and time.time() >= expires_at:
+            self.dependencies_cache.pop(key, None)
+            self._ranged_expiry.pop(key, None)
+            return None
+        self.profiler.count('dependencies.memory_hits')
+        return dependencies
+    
+    def has_ranged_dependencies(self, package_name: str) -> bool:
+        """
+        Выбраны ли версии в списке зависимостей пакета по maven-metadata.xml
+
+        Такой список нельзя хранить дольше metadata_ttl: новая версия в
+        репозитории меняет выбор диапазона или LATEST/RELEASE.
+        """
+        package_info = self.parse_maven_identifier(package_name)
+        return self.pom_resolver.ranged(package_info['group_id'], package_info['artifact_id'],
+                                        package_info['version'])
+    
+    def invalidate(self, package_name: Optional[str] = None, persistent: bool = False) -> Optional[set]:
+        """
+        Сбрасывает кэши разобранных зависимостей
+
+        Разобранные зависимости пакета удаляются и из памяти, и из
+        постоянного кэша, вместе с зависимостями пакетов, унаследовавших
+        его как родителя или BOM. Эффективные модели POM и индексы версий
+        сбрасываются целиком.
+
+        Args:
+            package_name: Пакет "groupId:artifactId:version" (None - все пакеты)
+            persistent: Удалить из постоянного кэша и сам POM-файл
+
+        Returns:
+            Пакеты, зависимости которых нужно загрузить заново (None - все)
+        """
+        self.pom_resolver.clear()
+        self.version_resolver.clear()
+        if package_name is None:
+            self.dependencies_cache.clear()
+            self._ranged_expiry.clear()
+            self._missing.clear()
+            if persistent and self.cache:
+                self.cache.clear()
+            return None
+
+        affected = {package_name} | self.pom_resolver.dependents(package_name)
+        if self.cache:
+            affected.update(self.cache.dependents(package_name))
+        for package in affected:
+            self.dependencies_cache.pop(package, None)
+            self._ranged_expiry.pop(package, None)
+            if self.cache:
+                self.cache.invalidate_dependencies(package)
+        self._missing.pop(package_name, None)
+        if persistent and self.cache:
+            self.cache.invalidate(package_name)
+        return affected
+    
+    def fetch_pom(self, group_id: str, artifact_id: str, version: str) -> str:
+        """
+        Загружает POM-файл пакета, используя постоянный кэш
+        
+        Args:
+            group_id: Group ID пакета
+            artifact_id: Artifact ID пакета
+            version: Версия пакета
+            
+        Returns:
+            Содержимое POM-файла
+            
+        Raises:
+            MavenArtifactNotFoundError: Если POM-файла нет в репозитории
+            MavenRepositoryError: Если POM-файла нет в кэше в офлайн-режиме
+                или его не удалось загрузить
+        """
+        key = f"{group_id}:{artifact_id}:{version}"
+        path = pom_path(group_id, artifact_id, version)
+        
+        entry = self.cache.get_entry(key) if self.cache else None
+        if entry and (entry['fresh'] or self.offline):
+            self.profiler.count('pom_cache.hits' if entry['fresh'] else 'pom_cache.stale_hits')
+            return entry['content']
+        if self.cache:
+            self.profiler.count('pom_cache.misses')
+        
+        # Недавний 404 не перепроверяется до истечения negative_ttl
+        if self._recently_missing(key):
+            self.profiler.count('pom.negative_hits')
+            raise MavenArtifactNotFoundError(f"POM для {key} не найден (результат запомнен)")
+        
+        if self.offline:
+            # Локальный репозиторий доступен и без сети
+            response = self.backend.fetch_local(path)
+            if response is None:
+                raise MavenRepositoryError(f"Офлайн-режим: POM для {key} отсутствует в кэше")
+            return self._decode_body(response)
+        
+        # Устаревшую SNAPSHOT-запись перепроверяем условным запросом
+        try:
+            with self.profiler.timer('pom.fetch_seconds'):
+                response = self.backend.fetch(
+                    path,
+                    etag=entry['etag'] if entry else None,
+                    last_modified=entry['last_modified'] if entry else None
+                )
+        except RepositoryBackendError as e:
+            self.profiler.count('pom.fetch_errors')
+            raise MavenRepositoryError(str(e))
+        # Адрес в том репозитории, который фактически ответил (локальный, зеркало)
+        pom_url = response.url or self.backend.location(path)
+        if self.verbose:
+            print(f"POM URL: {pom_url}")
+        
+        if response.status == 304:
+            # Без закэшированной копии условный запрос не отправлялся, тела у 304 нет
+            if not entry:
+                raise MavenRepositoryError(f"Не удалось загрузить {pom_url}: ответ 304 без условного запроса")
+            self.profiler.count('pom_cache.revalidated')
+            self.cache.touch(key)
+            return entry['content']
+        if response.status == 404:
+            self._missing[key] = time.time()
+            if self.cache:
+                self.cache.put_missing(key)
+            raise MavenArtifactNotFoundError(f"POM для {key} не найден: {pom_url}")
+        if response.status != 200:
+            raise MavenRepositoryError(f"Не удалось загрузить {pom_url}. Статус: {response.status}")
+        
+        if isinstance(response, LocalResponse):
+            self.profiler.count('pom.bytes_read_local', len(response.body))
+        else:
+            self.profiler.count('pom.bytes_downloaded', response.wire_bytes)
+        pom_content = self._decode_body(response)
+        # Файлы локального репозитория не дублируются в кэше
+        if self.cache and not isinstance(response, LocalResponse):
+            self.cache.put_pom(key, pom_content, etag=response.etag, last_modified=response.last_modified)
+        return pom_content
+    
+    def _recently_missing(self, key: str) -> bool:
+        checked_at = self._missing.get(key)
+        if checked_at is None and self.cache:
+            checked_at = self.cache.get_missing(key)
+            if checked_at is not None:
+                self._missing[key] = checked_at
+        return checked_at is not None and time.time() - checked_at < self.negative_ttl
+    
+    @staticmethod
+    def _decode_body(response: HttpResponse) -> str:
+        """Декодирует тело ответа (bytes или memoryview поверх mmap)"""
+        try:
+            return str(response.body, 'utf-8')
+        finally:
+            if isinstance(response.body, memoryview):
+                response.body.release()
+    
     def display_dependencies(self, dependencies: List[Dict[str, str]]) -> None:
         """
         Выводит зависимости в читаемом формате
@@ -0,0 +1,299 @@
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from functools import total_ordering
+from typing import Dict, List, Optional, Tuple
+
+
+# Мета-версии, вычисляемые по maven-metadata.xml
+META_VERSIONS = ('LATEST', 'RELEASE')
+
+# Порядок квалификаторов Maven; пустой квалификатор - релиз
+QUALIFIER_RANKS = {'alpha': 0, 'beta': 1, 'milestone': 2, 'rc': 3, 'snapshot': 4, '': 5, 'sp': 6}
+QUALIFIER_ALIASES = {'a': 'alpha', 'b': 'beta', 'm': 'milestone', 'cr': 'rc', 'ga': '', 'final': '', 'release': ''}
+
+# Элемент, которым дополняется более короткая версия при сравнении
+_RELEASE_ITEM = (0, QUALIFIER_RANKS[''], '')
+
+_TOKEN_PATTERN = re.compile(r'\d+|[a-zA-Z]+')
+
+
+class VersionResolutionError(Exception):
+    """Не удалось выбрать версию по диапазону или мета-версии"""
+    pass
+
+
+@total_ordering
+class MavenVersion:
+    """
+    Версия Maven с порядком сравнения, близким к ComparableVersion
+
+    Числа сравниваются как числа, квалификаторы - по QUALIFIER_RANKS
+    (alpha < beta < milestone < rc < snapshot < релиз < sp), неизвестные
+    квалификаторы - после известных, по алфавиту. Завершающие нули, нули
+    перед квалификатором и квалификаторы релиза не учитываются:
+    1.0 == 1 == 1.0.0-final.
+    """
+
+    __slots__ = ('text', 'items')
+
+    def __init__(self, text: str):
+        self.text = text
+        items = []
+        tokens = _TOKEN_PATTERN.findall(text)
+        for position, token in enumerate(tokens):
+            if token.isdigit():
+                items.append((1, int(token), ''))
+                continue
+            name = token.lower()
+            # Однобуквенные сокращения (a1, b2, m3) действуют только перед числом
+            if len(name) > 1 or (position + 1 < len(tokens) and tokens[position + 1].isdigit()):
+                name = QUALIFIER_ALIASES.get(name, name)
+            rank = QUALIFIER_RANKS.get(name)
+            # Нули перед квалификатором не значимы: 1.0-alpha1 == 1-alpha-1
+            while items and items[-1] == (1, 0, ''):
+                items.pop()
+            items.append((0, rank, '') if rank is not None else (0, len(QUALIFIER_RANKS), name))
+        while items and items[-1] in ((1, 0, ''), _RELEASE_ITEM):
+            items.pop()
+        self.items = tuple(items)
+
+    @property
+    def is_snapshot(self) -> bool:
+        return self.text.upper().endswith('-SNAPSHOT')
+
+    def _padded(self, other: 'MavenVersion') -> Tuple[tuple, tuple]:
+        length = max(len(self.items), len(other.items))
+        return (self.items + (_RELEASE_ITEM,) * (length - len(self.items)),
+                other.items + (_RELEASE_ITEM,) * (length - len(other.items)))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MavenVersion):
+            return NotImplemented
+        left, right = self._padded(other)
+        return left == right
+
+    def __lt__(self, other: 'MavenVersion') -> bool:
+        left, right = self._padded(other)
+        return left < right
+
+    def __hash__(self) -> int:
+        return hash(self.items)
+
+    def __repr__(self) -> str:
+        return f"MavenVersion({self.text!r})"
+
+
+def is_version_range(version: str) -> bool:
+    return version[:1] in ('[', '(')
+
+
+def needs_resolution(version: Optional[str]) -> bool:
+    """Требует ли версия выбора по maven-metadata.xml (диапазон или LATEST/RELEASE)"""
+    return bool(version) and (version in META_VERSIONS or is_version_range(version))
+
+
+class VersionRange:
+    """
+    Диапазон версий Maven: [1.0], [1.2,2.0), (,1.0], [1.5,) и их
+    объединения через запятую: [1,2),[3,4)
+    """
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        self.restrictions: List[Tuple[Optional[MavenVersion], bool, Optional[MavenVersion], bool]] = []
+        remaining = spec.strip()
+        while remaining:
+            if remaining[0] not in '[(':
+                raise VersionResolutionError(f"Некорректный диапазон версий: {spec}")
+            end = min((index for index in (remaining.find(']'), remaining.find(')')) if index != -1),
+                      default=-1)
+            if end == -1:
+                raise VersionResolutionError(f"Некорректный диапазон версий: {spec}")
+            self.restrictions.append(self._parse_restriction(remaining[:end + 1]))
+            remaining = remaining[end + 1:].lstrip()
+            if remaining.startswith(','):
+                remaining = remaining[1:].lstrip()
+
+    def _parse_restriction(self, text: str):
+        lower_inclusive = text[0] == '['
+        upper_inclusive = text[-1] == ']'
+        body = text[1:-1]
+        if ',' not in body:
+            if not lower_inclusive or not upper_inclusive or not body.strip():
+                raise VersionResolutionError(f"Некорректный диапазон версий: {self.spec}")
+            version = MavenVersion(body.strip())
+            return version, True, version, True
+        lower, upper = (part.strip() for part in body.split(',', 1))
+        return (MavenVersion(lower) if lower else None, lower_inclusive,
+                MavenVersion(upper) if upper else None, upper_inclusive)
+
+    def contains(self, version: MavenVersion) -> bool:
+        for lower, lower_inclusive, upper, upper_inclusive in self.restrictions:
+            if lower is not None and (version < lower or (version == lower and not lower_inclusive)):
+                continue
+            if upper is not None and (version > upper or (version == upper and not upper_inclusive)):
+                continue
+            return True
+        return False
+
+
+def parse_metadata(content: str) -> Dict[str, object]:
+    """
+    Разбирает maven-metadata.xml
+
+    Returns:
+        Dict с полями versions (по возрастанию), latest и release (или None)
+
+    Raises:
+        VersionResolutionError: Если файл не является корректным XML
+    """
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError as e:
+        raise VersionResolutionError(f"Ошибка парсинга maven-metadata.xml: {e}")
+
+    def text(path: str) -> Optional[str]:
+        element = root.find(path)
+        return element.text.strip() if element is not None and element.text and element.text.strip() else None
+
+    versions_element = root.find('versioning/versions')
+    versions = [element.text.strip() for element in (versions_element if versions_element is not None else ())
+                if element.text and element.text.strip()]
+    return {
+        'versions': sorted(set(versions), key=MavenVersion),
+        'latest': text('versioning/latest'),
+        'release': text('versioning/release')
+    }
+
+
+def merge_metadata(documents: List[str]) -> str:
+    """
+    Объединяет maven-metadata.xml одного артефакта из нескольких репозиториев
+
+    Как и Maven, берет объединение списков versions; latest и release -
+    наибольшие из указанных в документах, lastUpdated - самый поздний.
+
+    Args:
+        documents: Содержимое maven-metadata.xml из разных репозиториев
+
+    Returns:
+        Объединенный maven-metadata.xml
+
+    Raises:
+        VersionResolutionError: Если документ не является корректным XML
+    """
+    roots = []
+    for content in documents:
+        try:
+            roots.append(ET.fromstring(content))
+        except ET.ParseError as e:
+            raise VersionResolutionError(f"Ошибка парсинга maven-metadata.xml: {e}")
+
+    def values(path: str) -> List[str]:
+        found = (root.find(path) for root in roots)
+        return [element.text.strip() for element in found
+                if element is not None and element.text and element.text.strip()]
+
+    metadata = ET.Element('metadata')
+    for field in ('groupId', 'artifactId'):
+        found = values(field)
+        if found:
+            ET.SubElement(metadata, field).text = found[0]
+    versioning = ET.SubElement(metadata, 'versioning')
+    for field in ('latest', 'release'):
+        found = values(f'versioning/{field}')
+        if found:
+            ET.SubElement(versioning, field).text = max(found, key=MavenVersion)
+    versions = ET.SubElement(versioning, 'versions')
+    merged = {element.text.strip() for root in roots for element in root.iterfind('versioning/versions/version')
+              if element.text and element.text.strip()}
+    for version in sorted(merged, key=MavenVersion):
+        ET.SubElement(versions, 'version').text = version
+    last_updated = values('versioning/lastUpdated')
+    if last_updated:
+        ET.SubElement(versioning, 'lastUpdated').text = max(last_updated)
+    return ET.tostring(metadata, encoding='unicode')
+
+
+class VersionIndex:
+    """Отсортированные версии одного groupId:artifactId из maven-metadata.xml"""
+
+    def __init__(self, metadata: Dict[str, object]):
+        self.versions = [MavenVersion(version) for version in metadata['versions']]
+        self.latest = metadata['latest']
+        self.release = metadata['release']
+
+    def select(self, spec: str) -> Optional[str]:
+        """Наибольшая версия, удовлетворяющая диапазону или мета-версии"""
+        if spec == 'LATEST':
+            return self.latest or (self.versions[-1].text if self.versions else None)
+        if spec == 'RELEASE':
+            if self.release:
+                return self.release
+            releases = [version for version in self.versions if not version.is_snapshot]
+            return releases[-1].text if releases else None
+        version_range = VersionRange(spec)
+        for version in reversed(self.versions):
+            if version_range.contains(version):
+                return version.text
+        return None
+
+
+class VersionResolver:
+    """
+    Выбор версий по maven-metadata.xml с кэшированием
+
+    Разобранный индекс версий хранится в памяти для каждого
+    groupId:artifactId в течение ttl секунд; при наличии постоянного кэша
+    туда же сохраняется исходный файл. Отсутствующие в репозитории
+    метаданные запоминаются на negative_ttl секунд, чтобы повторные
+    запросы несуществующих координат не стоили обращения к сети.
+    """
+
+    def __init__(self, maven_parser, ttl: float = 3600.0, negative_ttl: float = 600.0):
+        self.maven_parser = maven_parser
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._indexes: Dict[str, Tuple[float, Optional[VersionIndex]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, group_id: str, artifact_id: str, spec: str) -> str:
+        """
+        Конкретная версия для диапазона или мета-версии
+
+        Обычная версия возвращается без изменений.
+
+        Raises:
+            VersionResolutionError: Если метаданных нет или ни одна версия не подходит
+        """
+        if not needs_resolution(spec):
+            return spec
+        index = self.index(group_id, artifact_id)
+        if index is None:
+            raise VersionResolutionError(f"maven-metadata.xml для {group_id}:{artifact_id} не найден")
+        version = index.select(spec)
+        if version is None:
+            raise VersionResolutionError(f"Нет версии {group_id}:{artifact_id}, подходящей под {spec}")
+        return version
+
+    def index(self, group_id: str, artifact_id: str) -> Optional[VersionIndex]:
+        """Индекс версий (None - метаданные отсутствуют в репозитории)"""
+        key = f"{group_id}:{artifact_id}"
+        now = time.time()
+        with self._lock:
+            cached = self._indexes.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        content, fetched_at = self.maven_parser.fetch_metadata(group_id, artifact_id, self.ttl, self.negative_ttl)
+        index = VersionIndex(parse_metadata(content)) if content is not None else None
+        expires_at = fetched_at + (self.ttl if index is not None else self.negative_ttl)
+        with self._lock:
+            self._indexes[key] = (expires_at, index)
+        return index
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
@@ -0,0 +1,217 @@
+import gzip
+import hashlib
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import repository_backend
+
+
+POM_NAMESPACE = "http://maven.apache.org/POM/4.0.0"
+
+
+def render_pom(package_name: str, dependencies: List[str]) -> str:
+    """
+    Формирует минимальный POM-файл для пакета
+
+    Args:
+        package_name: Пакет в формате "groupId:artifactId:version"
+        dependencies: Зависимости в том же формате
+
+    Returns:
+        Содержимое POM-файла
+    """
+    group_id, artifact_id, version = package_name.split(':')
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<project xmlns="{POM_NAMESPACE}">',
+        '  <modelVersion>4.0.0</modelVersion>',
+        f'  <groupId>{group_id}</groupId>',
+        f'  <artifactId>{artifact_id}</artifactId>',
+        f'  <version>{version}</version>',
+        '  <dependencies>',
+    ]
+    for dep in dependencies:
+        dep_group, dep_artifact, dep_version = dep.split(':')
+        lines.extend([
+            '    <dependency>',
+            f'      <groupId>{dep_group}</groupId>',
+            f'      <artifactId>{dep_artifact}</artifactId>',
+            f'      <version>{dep_version}</version>',
+            '    </dependency>',
+        ])
+    lines.extend(['  </dependencies>', '</project>'])
+    return '\n'.join(lines)
+
+
+def render_metadata(group_id: str, artifact_id: str, versions: List[str]) -> str:
+    """Формирует maven-metadata.xml со списком версий артефакта"""
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<metadata>',
+        f'  <groupId>{group_id}</groupId>',
+        f'  <artifactId>{artifact_id}</artifactId>',
+        '  <versioning>',
+        '    <versions>',
+    ]
+    lines.extend(f'      <version>{version}</version>' for version in versions)
+    lines.extend(['    </versions>', '  </versioning>', '</metadata>'])
+    return '\n'.join(lines)
+
+
+def metadata_documents(packages) -> Dict[str, str]:
+    """maven-metadata.xml для каждого groupId:artifactId среди пакетов, ключ - путь"""
+    versions: Dict[tuple, List[str]] = {}
+    for package in packages:
+        group_id, artifact_id, version = package.split(':')
+        versions.setdefault((group_id, artifact_id), []).append(version)
+    return {
+        "/" + repository_backend.metadata_path(group_id, artifact_id): render_metadata(group_id, artifact_id, found)
+        for (group_id, artifact_id), found in versions.items()
+    }
+
+
+def pom_path(package_name: str) -> str:
+    """Путь POM-файла относительно корня репозитория"""
+    return "/" + repository_backend.pom_path(*package_name.split(':'))
+
+
+def write_repository(artifacts: Dict[str, List[str]], directory: str,
+                     poms: Optional[Dict[str, str]] = None) -> None:
+    """Записывает POM-файлы графа пакетов на диск в раскладке Maven-репозитория"""
+    documents = {package: render_pom(package, deps) for package, deps in artifacts.items()}
+    documents.update(poms or {})
+    for package, content in documents.items():
+        file_path = os.path.join(directory, *pom_path(package).split('/')[1:])
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+class MockMavenRepository:
+    """
+    Локальный HTTP-сервер, имитирующий Maven Central
+
+    Отдает POM-файлы и maven-metadata.xml для заданного графа пакетов
+    с искусственной задержкой и долей ответов 503, чтобы измерять
+    поведение загрузчика без доступа к сети. Доля slow_rate ответов
+    задерживается дополнительно на slow_latency (хвост задержек).
+    Поддерживает keep-alive, gzip и ETag.
+    """
+
+    def __init__(self, artifacts: Dict[str, List[str]], latency: float = 0.0, error_rate: float = 0.0,
+                 poms: Optional[Dict[str, str]] = None, seed: Optional[int] = None,
+                 slow_rate: float = 0.0, slow_latency: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        # Решения о задержке и ошибке зависят только от (seed, путь, номер попытки),
+        # поэтому при заданном seed они воспроизводимы и при параллельных запросах
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.documents = {pom_path(package): render_pom(package, deps)
+                          for package, deps in artifacts.items()}
+        # Готовые POM-файлы (parent, BOM), ключ - "groupId:artifactId:version"
+        for package, content in (poms or {}).items():
+            self.documents[pom_path(package)] = content
+        self.documents.update(metadata_documents(list(artifacts) + list(poms or {})))
+        self.path_counts: Dict[str, int] = {}
+        self.request_count = 0
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Запускает сервер в фоновом потоке и возвращает базовый URL"""
+        repository = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with repository._lock:
+                    repository.connection_count += 1
+
+            def do_GET(self):
+                repository._serve(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        """Останавливает сервер"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _serve(self, handler: BaseHTTPRequestHandler) -> None:
+        with self._lock:
+            self.request_count += 1
+            attempt = self.path_counts.get(handler.path, 0) + 1
+            self.path_counts[handler.path] = attempt
+
+        # Строка-зерно хешируется SHA-512 и не зависит от соли hash() процесса
+        draws = random.Random(f"{self.seed}:{handler.path}:{attempt}")
+        slow = draws.random() < self.slow_rate
+        failed = draws.random() < self.error_rate
+
+        if self.latency:
+            time.sleep(self.latency)
+        if slow:
+            time.sleep(self.slow_latency)
+
+        if failed:
+            self._send(handler, 503, b"Service Unavailable")
+            return
+
+        document = self.documents.get(handler.path)
+        if document is None:
+            self._send(handler, 404, b"Not Found")
+            return
+
+        body = document.encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if handler.headers.get('If-None-Match') == etag:
+            self._send(handler, 304, b"", {'ETag': etag})
+            return
+
+        headers = {'Content-Type': 'text/xml', 'ETag': etag}
+        if 'gzip' in handler.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        self._send(handler, 200, body, headers)
+
+    @staticmethod
+    def _send(handler: BaseHTTPRequestHandler, status: int, body: bytes,
+              headers: Optional[Dict[str, str]] = None) -> None:
+        handler.send_response(status)
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
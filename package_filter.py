@@ -0,0 +1,191 @@
+import fnmatch
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Префиксы видов правил: "group:org.apache", "glob:*:*:*-SNAPSHOT",
+# "re:^com\.ourco\.", "contains:test". glob сопоставляется с "g:a:v"
+# целиком, регулярное выражение и подстрока ищутся в любом месте.
+# Правило без префикса - glob, если содержит *, ? или [, иначе подстрока.
+RULE_KINDS = ('group', 'glob', 're', 'contains')
+
+# Разделитель правил в строковом значении конфигурации
+RULE_SEPARATOR = ';'
+
+# Метка конца префикса в дереве groupId
+_TERMINAL = ''
+
+
+class PackageFilterError(Exception):
+    """Ошибка в правиле фильтра пакетов"""
+    pass
+
+
+def parse_rules(value: str) -> List[str]:
+    """Разбирает список правил, разделенных ';'"""
+    return [rule.strip() for rule in value.split(RULE_SEPARATOR) if rule.strip()]
+
+
+def _split_rule(rule: str) -> Tuple[str, str]:
+    kind, separator, pattern = rule.partition(':')
+    if separator and kind in RULE_KINDS:
+        if not pattern:
+            raise PackageFilterError(f"Пустой шаблон в правиле фильтра: '{rule}'")
+        return kind, pattern
+    if any(char in rule for char in '*?['):
+        return 'glob', rule
+    return 'contains', rule
+
+
+class GroupPrefixTrie:
+    """
+    Дерево префиксов groupId по сегментам, разделенным точками
+
+    Префикс "org.apache" совпадает с org.apache и org.apache.commons,
+    но не с org.apachex. Проверка занимает O(число сегментов groupId)
+    независимо от числа правил.
+    """
+
+    def __init__(self, prefixes: Iterable[str] = ()):
+        self._root: Dict[str, dict] = {}
+        self.size = 0
+        for prefix in prefixes:
+            self.add(prefix)
+
+    def add(self, prefix: str) -> None:
+        node = self._root
+        for segment in prefix.strip('.').split('.'):
+            node = node.setdefault(segment, {})
+        if _TERMINAL not in node:
+            node[_TERMINAL] = {}
+            self.size += 1
+
+    def matches(self, group_id: str) -> bool:
+        node = self._root
+        for segment in group_id.split('.'):
+            node = node.get(segment)
+            if node is None:
+                return False
+            if _TERMINAL in node:
+                return True
+        return False
+
+
+class RuleSet:
+    """
+    Набор правил, скомпилированный в один сопоставитель
+
+    Все glob и подстроки объединяются в одно регулярное выражение
+    с альтернативами, а префиксы groupId - в дерево, поэтому проверка
+    пакета не перебирает эти правила по одному. Правила re: компилируются
+    отдельно: глобальные флаги (?i) и номера групп в обратных ссылках
+    действуют только внутри своего выражения.
+    """
+
+    def __init__(self, rules: Iterable[str] = ()):
+        self.rules = tuple(rules)
+        self.groups = GroupPrefixTrie()
+        alternatives = []
+        substrings = []
+        self._regexes = []
+        for rule in self.rules:
+            kind, pattern = _split_rule(rule)
+            if kind == 'group':
+                self.groups.add(pattern)
+            elif kind == 'glob':
+                # glob сопоставляется с идентификатором целиком
+                alternatives.append('^' + fnmatch.translate(pattern))
+            elif kind == 're':
+                try:
+                    self._regexes.append(re.compile(pattern))
+                except re.error as e:
+                    raise PackageFilterError(f"Некорректное регулярное выражение '{pattern}': {e}")
+            else:
+                substrings.append(re.escape(pattern))
+        if substrings:
+            alternatives.append('|'.join(substrings))
+        try:
+            self._pattern = re.compile('|'.join(alternatives)) if alternatives else None
+        except re.error as e:
+            raise PackageFilterError(f"Некорректные правила фильтра {', '.join(self.rules)}: {e}")
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def matches(self, package: str) -> bool:
+        if self.groups.size and self.groups.matches(package.split(':', 1)[0]):
+            return True
+        if self._pattern is not None and self._pattern.search(package) is not None:
+            return True
+        return any(regex.search(package) is not None for regex in self._regexes)
+
+
+class PackageFilter:
+    """
+    Фильтр пакетов из правил включения и исключения
+
+    Пакет принимается, если он не совпадает ни с одним правилом исключения
+    и (при наличии правил включения) совпадает хотя бы с одним из них.
+    Решения запоминаются: одна и та же зависимость встречается в графе
+    многократно.
+    """
+
+    def __init__(self, include: Iterable[str] = (), exclude: Iterable[str] = ()):
+        self.include = RuleSet(include)
+        self.exclude = RuleSet(exclude)
+        self._decisions: Dict[str, bool] = {}
+
+    @classmethod
+    def from_config(cls, include: str = "", exclude: str = "") -> Optional['PackageFilter']:
+        """
+        Фильтр из строковых параметров конфигурации (правила через ';')
+
+        Returns:
+            PackageFilter или None, если правил нет
+
+        Raises:
+            PackageFilterError: Если правило некорректно
+        """
+        include_rules = parse_rules(include)
+        exclude_rules = parse_rules(exclude)
+        if not include_rules and not exclude_rules:
+            return None
+        return cls(include_rules, exclude_rules)
+
+    @classmethod
+    def combine(cls, package_filter: Optional['PackageFilter'], filter_substring: str = "") -> Optional['PackageFilter']:
+        """
+        Фильтр с добавленным правилом исключения по подстроке
+
+        Так прежний параметр filter_substring становится одним из правил.
+
+        Returns:
+            PackageFilter или None, если нет ни фильтра, ни подстроки
+        """
+        if not filter_substring:
+            return package_filter
+        include = package_filter.include.rules if package_filter else ()
+        exclude = package_filter.exclude.rules if package_filter else ()
+        return cls(include, exclude + (f"contains:{filter_substring}",))
+
+    def accepts(self, package: str) -> bool:
+        decision = self._decisions.get(package)
+        if decision is None:
+            decision = not self.exclude.matches(package) and (not self.include or self.include.matches(package))
+            self._decisions[package] = decision
+        return decision
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PackageFilter) and (self.include.rules, self.exclude.rules) == \
+            (other.include.rules, other.exclude.rules)
+
+    def __hash__(self) -> int:
+        return hash((self.include.rules, self.exclude.rules))
+
+    def describe(self) -> str:
+        parts = []
+        if self.include:
+            parts.append(f"включать {RULE_SEPARATOR.join(self.include.rules)}")
+        if self.exclude:
+            parts.append(f"исключать {RULE_SEPARATOR.join(self.exclude.rules)}")
+        return ', '.join(parts)
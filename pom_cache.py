@@ -0,0 +1,314 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class PomCache:
+    """
+    Постоянный кэш POM-файлов и разобранных зависимостей на диске
+
+    Хранит данные в SQLite-базе, ключ - "groupId:artifactId:version".
+    Размер кэша ограничен, при переполнении вытесняются записи, к которым
+    дольше всего не обращались (LRU). SNAPSHOT-версии могут меняться,
+    поэтому их записи устаревают через snapshot_ttl секунд.
+
+    Отдельно хранятся maven-metadata.xml (ключ "groupId:artifactId") и
+    отрицательные результаты: отсутствующие метаданные и POM-файлы.
+    Срок годности этих записей определяет вызывающий код по времени загрузки.
+    Для разобранных зависимостей запоминаются родители и BOM, из которых
+    они получены, чтобы при изменении родителя сбросить и потомков.
+    """
+
+    DATABASE_NAME = "pom_cache.sqlite3"
+
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024, snapshot_ttl: float = 3600.0):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_bytes = max_bytes
+        self.snapshot_ttl = snapshot_ttl
+        self.hits = 0
+        self.misses = 0
+        # Устаревшие SNAPSHOT-записи, выданные для условного запроса или офлайн
+        self.stale_hits = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            os.path.join(self.cache_dir, self.DATABASE_NAME),
+            check_same_thread=False
+        )
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS poms (
+                key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                dependencies TEXT,
+                dependencies_format INTEGER,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            )
+        """)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(poms)")}
+        for column in ('etag', 'last_modified'):
+            if column not in columns:
+                self._connection.execute(f"ALTER TABLE poms ADD COLUMN {column} TEXT")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS poms_last_access ON poms(last_access)")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, content TEXT, fetched_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS missing (key TEXT PRIMARY KEY, checked_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS inherits (key TEXT NOT NULL, source TEXT NOT NULL, PRIMARY KEY (key, source))"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS inherits_source ON inherits(source)")
+        self._connection.commit()
+        self._total_bytes = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM poms"
+        ).fetchone()[0]
+
+    @staticmethod
+    def is_snapshot(key: str) -> bool:
+        """Проверяет, является ли версия пакета SNAPSHOT-версией"""
+        return key.upper().endswith('-SNAPSHOT')
+
+    def _is_fresh(self, key: str, fetched_at: float) -> bool:
+        if not self.is_snapshot(key):
+            return True
+        return time.time() - fetched_at < self.snapshot_ttl
+
+    def get_pom(self, key: str, allow_stale: bool = False) -> Optional[str]:
+        """
+        Возвращает содержимое POM-файла из кэша
+
+        Args:
+            key: Идентификатор пакета
+            allow_stale: Вернуть устаревшую SNAPSHOT-запись вместо промаха
+
+        Returns:
+            Содержимое POM-файла или None при промахе
+        """
+        row = self._get_row(key, "content", allow_stale)
+        return row[0] if row else None
+
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает запись кэша вместе с валидаторами для условного запроса
+
+        Args:
+            key: Идентификатор пакета
+
+        Returns:
+            Dict с полями content, etag, last_modified и fresh или None
+        """
+        row = self._get_row(key, "content, etag, last_modified, fetched_at", allow_stale=True)
+        if not row:
+            return None
+        content, etag, last_modified, fetched_at = row
+        return {
+            'content': content,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh': self._is_fresh(key, fetched_at)
+        }
+
+    def get_dependencies(self, key: str, dependencies_format: int, allow_stale: bool = False) -> Optional[list]:
+        """
+        Возвращает разобранные зависимости пакета из кэша
+
+        Args:
+            key: Идентификатор пакета
+            dependencies_format: Версия формата, в котором ожидаются зависимости
+            allow_stale: Вернуть устаревшую SNAPSHOT-запись вместо промаха
+
+        Returns:
+            Список зависимостей или None, если они не сохранены в этом формате
+        """
+        row = self._get_row(key, "dependencies, dependencies_format", allow_stale)
+        if not row or row[0] is None or row[1] != dependencies_format:
+            return None
+        return json.loads(row[0])
+
+    def _get_row(self, key: str, columns: str, allow_stale: bool) -> Optional[tuple]:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {columns}, fetched_at FROM poms WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or not (allow_stale or self._is_fresh(key, row[-1])):
+                self.misses += 1
+                return None
+
+            if self._is_fresh(key, row[-1]):
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            self._connection.execute(
+                "UPDATE poms SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._connection.commit()
+            return row[:-1]
+
+    def put_pom(self, key: str, content: str, etag: Optional[str] = None,
+                last_modified: Optional[str] = None) -> None:
+        """Сохраняет POM-файл, сбрасывая ранее разобранные зависимости"""
+        size = len(content.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            previous = self._connection.execute(
+                "SELECT size FROM poms WHERE key = ?", (key,)
+            ).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO poms "
+                "(key, content, dependencies, dependencies_format, size, fetched_at, last_access, "
+                "etag, last_modified) VALUES (?, ?, NULL, NULL, ?, ?, ?, ?, ?)",
+                (key, content, size, now, now, etag, last_modified)
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self._connection.commit()
+
+    def touch(self, key: str) -> None:
+        """Отмечает запись как заново проверенную (сервер ответил 304)"""
+        with self._lock:
+            self._connection.execute("UPDATE poms SET fetched_at = ? WHERE key = ?", (time.time(), key))
+            self._connection.commit()
+
+    def put_dependencies(self, key: str, dependencies: Any, dependencies_format: int,
+                         sources: Iterable[str] = ()) -> None:
+        """
+        Сохраняет разобранные зависимости для уже закэшированного POM-файла
+
+        Args:
+            key: Идентификатор пакета
+            dependencies: Разобранные зависимости
+            dependencies_format: Версия формата зависимостей
+            sources: Родители и BOM, из которых получены зависимости
+        """
+        serialized = json.dumps(dependencies)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, length(CAST(content AS BLOB)) FROM poms WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return
+            size = row[1] + len(serialized.encode('utf-8'))
+            self._connection.execute(
+                "UPDATE poms SET dependencies = ?, dependencies_format = ?, size = ? WHERE key = ?",
+                (serialized, dependencies_format, size, key)
+            )
+            self._connection.execute("DELETE FROM inherits WHERE key = ?", (key,))
+            self._connection.executemany(
+                "INSERT INTO inherits (key, source) VALUES (?, ?)", [(key, source) for source in set(sources)]
+            )
+            self._total_bytes += size - row[0]
+            self._evict()
+            self._connection.commit()
+
+    def dependents(self, source: str) -> List[str]:
+        """Пакеты, сохраненные зависимости которых получены с участием родителя или BOM source"""
+        with self._lock:
+            rows = self._connection.execute("SELECT key FROM inherits WHERE source = ?", (source,)).fetchall()
+        return [row[0] for row in rows]
+
+    def invalidate_dependencies(self, key: str) -> None:
+        """
+        Сбрасывает разобранные зависимости пакета и отметку об отсутствии
+        его POM-файла; сам POM-файл остается в кэше
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, length(CAST(content AS BLOB)) FROM poms WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                self._connection.execute(
+                    "UPDATE poms SET dependencies = NULL, dependencies_format = NULL, size = ? WHERE key = ?",
+                    (row[1], key)
+                )
+                self._total_bytes += row[1] - row[0]
+            self._connection.execute("DELETE FROM inherits WHERE key = ?", (key,))
+            self._connection.execute("DELETE FROM missing WHERE key = ?", (key,))
+            self._connection.commit()
+
+    def get_metadata(self, key: str) -> Optional[Tuple[Optional[str], float]]:
+        """
+        Возвращает сохраненный maven-metadata.xml
+
+        Returns:
+            (содержимое или None, если метаданных нет в репозитории; время
+            загрузки) или None при промахе
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content, fetched_at FROM metadata WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put_metadata(self, key: str, content: Optional[str]) -> None:
+        """Сохраняет maven-metadata.xml (None - метаданные отсутствуют)"""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO metadata (key, content, fetched_at) VALUES (?, ?, ?)",
+                (key, content, time.time())
+            )
+            self._connection.commit()
+
+    def get_missing(self, key: str) -> Optional[float]:
+        """Время, когда POM-файл пакета не был найден в репозитории, или None"""
+        with self._lock:
+            row = self._connection.execute("SELECT checked_at FROM missing WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put_missing(self, key: str) -> None:
+        """Запоминает, что POM-файла пакета нет в репозитории"""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO missing (key, checked_at) VALUES (?, ?)", (key, time.time())
+            )
+            self._connection.commit()
+
+    def invalidate(self, key: str) -> None:
+        """Удаляет POM-файл пакета, отметку об его отсутствии и maven-metadata.xml артефакта"""
+        with self._lock:
+            row = self._connection.execute("SELECT size FROM poms WHERE key = ?", (key,)).fetchone()
+            if row:
+                self._connection.execute("DELETE FROM poms WHERE key = ?", (key,))
+                self._total_bytes -= row[0]
+            self._connection.execute("DELETE FROM inherits WHERE key = ?", (key,))
+            self._connection.execute("DELETE FROM missing WHERE key = ?", (key,))
+            self._connection.execute("DELETE FROM metadata WHERE key = ?", (key.rsplit(':', 1)[0],))
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        """Вытесняет давно неиспользуемые записи, пока кэш не уложится в лимит"""
+        while self._total_bytes > self.max_bytes:
+            row = self._connection.execute(
+                "SELECT key, size FROM poms ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._connection.execute("DELETE FROM poms WHERE key = ?", (row[0],))
+            self._connection.execute("DELETE FROM inherits WHERE key = ?", (row[0],))
+            self._total_bytes -= row[1]
+
+    def clear(self) -> None:
+        """Очищает кэш"""
+        with self._lock:
+            self._connection.execute("DELETE FROM poms")
+            self._connection.execute("DELETE FROM metadata")
+            self._connection.execute("DELETE FROM missing")
+            self._connection.execute("DELETE FROM inherits")
+            self._connection.commit()
+            self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def close(self) -> None:
+        self._connection.close()
@@ -0,0 +1,179 @@
+import json
+import threading
+import time
+from typing import Any, Dict, List
+
+
+# Перцентили, выводимые в отчете для каждой гистограммы
+REPORT_PERCENTILES = (50, 90, 99)
+
+
+class Histogram:
+    """Распределение значений (например, задержек в секундах)"""
+
+    def __init__(self):
+        self.values: List[float] = []
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        self.values.append(value)
+        self.total += value
+
+    def summary(self) -> Dict[str, float]:
+        """Число значений, сумма, минимум, максимум, среднее и перцентили"""
+        if not self.values:
+            return {'count': 0, 'total': 0.0}
+        ordered = sorted(self.values)
+        summary = {
+            'count': len(ordered),
+            'total': self.total,
+            'min': ordered[0],
+            'max': ordered[-1],
+            'mean': self.total / len(ordered)
+        }
+        for percentile in REPORT_PERCENTILES:
+            index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+            summary[f'p{percentile}'] = ordered[index]
+        return summary
+
+
+class _Timer:
+    """Контекстный менеджер, добавляющий длительность блока в гистограмму или фазу"""
+
+    __slots__ = ('_record', '_name', '_started')
+
+    def __init__(self, record, name: str):
+        self._record = record
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._record(self._name, time.perf_counter() - self._started)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Profiler:
+    """
+    Сбор метрик выполнения: фазы, гистограммы задержек, счетчики и
+    статистика уровней BFS
+
+    Методы потокобезопасны: загрузка уровня BFS идет из пула потоков.
+    Отчет - словарь, пригодный для сохранения в JSON.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self.levels: List[Dict[str, int]] = []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def phase(self, name: str) -> _Timer:
+        """Таймер фазы выполнения: суммарное время и число входов"""
+        return _Timer(self._record_phase, name)
+
+    def timer(self, name: str) -> _Timer:
+        """Таймер, записывающий каждую длительность в гистограмму name"""
+        return _Timer(self.observe, name)
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(value)
+
+    def count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_level(self, depth: int, nodes: int, edges: int, seconds: float) -> None:
+        """Статистика одного уровня BFS: пакеты уровня, добавленные ребра, время"""
+        with self._lock:
+            self.levels.append({'depth': depth, 'nodes': nodes, 'edges': edges, 'seconds': seconds})
+
+    def _record_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            phase = self.phases.setdefault(name, {'calls': 0, 'seconds': 0.0})
+            phase['calls'] += 1
+            phase['seconds'] += seconds
+
+    def report(self) -> Dict[str, Any]:
+        """Отчет со всеми собранными метриками"""
+        with self._lock:
+            return {
+                'wall_seconds': time.perf_counter() - self._started,
+                'phases': {name: dict(phase) for name, phase in self.phases.items()},
+                'histograms': {name: histogram.summary() for name, histogram in self.histograms.items()},
+                'counters': dict(self.counters),
+                'bfs_levels': list(self.levels)
+            }
+
+    def save(self, path: str, **sections: Any) -> None:
+        """
+        Сохраняет отчет в JSON
+
+        Args:
+            path: Путь к файлу отчета
+            sections: Дополнительные разделы отчета (например, статистика HTTP)
+        """
+        report = self.report()
+        report.update(sections)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Профиль выполнения сохранен в: {path}")
+
+
+class NullProfiler(Profiler):
+    """
+    Выключенный профилировщик
+
+    Все методы ничего не делают, а таймеры - общий пустой контекстный
+    менеджер, поэтому инструментированный код почти не замедляется.
+    """
+
+    enabled = False
+
+    def __init__(self):
+        pass
+
+    def phase(self, name: str) -> _NullTimer:
+        return NULL_TIMER
+
+    def timer(self, name: str) -> _NullTimer:
+        return NULL_TIMER
+
+    def observe(self, name: str, value: float) -> None:
+        pass
+
+    def count(self, name: str, amount: float = 1) -> None:
+        pass
+
+    def record_level(self, depth: int, nodes: int, edges: int, seconds: float) -> None:
+        pass
+
+    def report(self) -> Dict[str, Any]:
+        return {}
+
+
+# Профилировщик по умолчанию для всех компонентов
+DISABLED = NullProfiler()
@@ -0,0 +1,505 @@
+import json
+import os
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from dependency_graph import DEFAULT_CYCLES_PER_COMPONENT, DependencyGraph
+from maven_parser import MavenParser
+from maven_version import needs_resolution
+
+
+# Адрес по умолчанию: сервер доступен только с локальной машины
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Префикс адреса Unix-сокета: "unix:/tmp/deps.sock"
+UNIX_PREFIX = 'unix:'
+
+
+class QueryServerError(Exception):
+    """Ошибка сервера запросов"""
+    pass
+
+
+class QueryError(Exception):
+    """Некорректный запрос к серверу; status - HTTP-код ответа"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class ResidentGraph:
+    """
+    Построенный граф, который обслуживает запросы
+
+    После публикации объект не изменяется: кэши графа (CSR, обратный
+    индекс, замыкание, циклы) прогреты заранее, поэтому запросы из разных
+    потоков только читают его.
+    """
+
+    def __init__(self, graph: DependencyGraph, generation: int, build_seconds: float):
+        self.graph = graph
+        self.generation = generation
+        self.build_seconds = build_seconds
+        self.built_at = time.time()
+        self.compact = graph.compact_graph()
+        self.closure = graph.transitive_closure()
+        self.cycles = graph.detect_cycles(DEFAULT_CYCLES_PER_COMPONENT)
+
+    def require(self, package: str) -> None:
+        if self.compact.nodes.id(package) is None:
+            raise QueryError(f"Пакет отсутствует в графе: {package}", status=404)
+
+
+class QueryService:
+    """
+    Резидентный граф зависимостей с кэшами парсера между запросами
+
+    Перестроение идет в фоновом потоке в новый DependencyGraph, который
+    забирает загруженные зависимости у текущего, а MavenParser (кэши
+    зависимостей, эффективных POM и метаданных) общий для всех сборок.
+    Пока граф строится, запросы обслуживает предыдущий; готовый граф
+    подменяет его одним присваиванием. Сброс кэшей применяется в потоке
+    перестроения перед следующей сборкой. Сборки идут с verbose=False
+    у графа и общего парсера.
+    """
+
+    def __init__(self, graph_factory: Callable[[], DependencyGraph], roots: List[str], **build_options: Any):
+        """
+        Args:
+            graph_factory: Создает пустой DependencyGraph с общим парсером или
+                тестовым репозиторием
+            roots: Корневые пакеты
+            build_options: Параметры build_dependency_graph_multi (filter_substring,
+                max_depth, concurrency, policy, package_filter)
+        """
+        self.graph_factory = graph_factory
+        self.roots = list(dict.fromkeys(roots))
+        self.build_options = build_options
+        self.current: Optional[ResidentGraph] = None
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._rebuild_requested = False
+        # Отложенный сброс кэшей: все пакеты, список пакетов, постоянный кэш
+        self._invalidate_all = False
+        self._invalidated = set()
+        self._invalidate_persistent = False
+
+    @property
+    def building(self) -> bool:
+        with self._lock:
+            return self._thread is not None
+
+    def publish(self, graph: DependencyGraph, build_seconds: float = 0.0) -> ResidentGraph:
+        """Начать обслуживать уже построенный граф (например, загруженный из снимка)"""
+        with self._lock:
+            generation = self.current.generation + 1 if self.current else 1
+        resident = ResidentGraph(graph, generation, build_seconds)
+        with self._lock:
+            self.current = resident
+        return resident
+
+    def rebuild(self, wait: bool = False) -> None:
+        """
+        Запросить перестроение графа в фоновом потоке
+
+        Запрос во время идущей сборки выполняется сразу после нее.
+
+        Args:
+            wait: Дождаться окончания сборки
+        """
+        with self._lock:
+            self._rebuild_requested = True
+            thread = self._thread
+            if thread is None:
+                thread = self._thread = threading.Thread(target=self._rebuild_loop, name='graph-rebuild',
+                                                         daemon=True)
+                thread.start()
+        if wait:
+            thread.join()
+
+    def invalidate(self, packages: Optional[List[str]] = None, persistent: bool = False,
+                   wait: bool = False) -> None:
+        """
+        Сбросить кэши и перестроить граф
+
+        Args:
+            packages: Пакеты, зависимости которых нужно загрузить заново
+                (None - все пакеты); пакеты, унаследовавшие их как родителя
+                или BOM, загружаются заново вместе с ними
+            persistent: Удалить из постоянного кэша и сами POM-файлы
+            wait: Дождаться окончания сборки
+        """
+        with self._lock:
+            if packages is None:
+                self._invalidate_all = True
+            else:
+                self._invalidated.update(packages)
+            self._invalidate_persistent = self._invalidate_persistent or persistent
+        self.rebuild(wait)
+
+    def _rebuild_loop(self) -> None:
+        while True:
+            with self._lock:
+                if not self._rebuild_requested:
+                    self._thread = None
+                    return
+                self._rebuild_requested = False
+                invalidation = (self._invalidate_all, self._invalidated, self._invalidate_persistent)
+                self._invalidate_all, self._invalidated, self._invalidate_persistent = False, set(), False
+            self._build(*invalidation)
+
+    def _build(self, invalidate_all: bool, invalidated: set, persistent: bool) -> None:
+        started = time.perf_counter()
+        graph = self.graph_factory()
+        previous = self.current
+        # Парсер может быть общим с CLI, поэтому его режим вывода восстанавливается
+        parser_verbose = graph.maven_parser.verbose if graph.maven_parser else None
+        try:
+            # Фоновая сборка не выводит ход построения в консоль сервера
+            graph.verbose = False
+            if graph.maven_parser:
+                graph.maven_parser.verbose = False
+            if invalidate_all or invalidated:
+                affected = self._invalidate_sources(graph, None if invalidate_all else invalidated, persistent)
+                invalidate_all = affected is None
+                invalidated = invalidated | (affected or set())
+            if previous is not None and not invalidate_all:
+                # Пакеты с диапазоном или LATEST/RELEASE в имени или в зависимостях
+                # снова проходят через парсер, чтобы версия перевыбиралась по
+                # истечении metadata_ttl
+                kept = [package for package in previous.graph.fetched
+                        if package not in invalidated and not self._ranged(graph.maven_parser, package)]
+                graph.fetched = {package: previous.graph.fetched[package] for package in kept}
+                graph.edge_attributes = {package: previous.graph.edge_attributes[package] for package in kept
+                                         if package in previous.graph.edge_attributes}
+            graph.build_dependency_graph_multi(self.roots, **self.build_options)
+            resident = ResidentGraph(graph, previous.generation + 1 if previous else 1,
+                                     time.perf_counter() - started)
+        except Exception as e:
+            with self._lock:
+                self.last_error = str(e)
+                # Несостоявшийся сброс повторяется при следующей сборке
+                self._invalidate_all = self._invalidate_all or invalidate_all
+                self._invalidated.update(invalidated)
+                self._invalidate_persistent = self._invalidate_persistent or persistent
+            return
+        finally:
+            if graph.maven_parser:
+                graph.maven_parser.verbose = parser_verbose
+        with self._lock:
+            self.current = resident
+            self.last_error = None
+
+    @staticmethod
+    def _ranged(parser: Optional[MavenParser], package: str) -> bool:
+        """Выбирались ли версии пакета или его зависимостей по maven-metadata.xml"""
+        if needs_resolution(package.rsplit(':', 1)[-1]):
+            return True
+        return parser is not None and parser.has_ranged_dependencies(package)
+
+    @staticmethod
+    def _invalidate_sources(graph: DependencyGraph, packages: Optional[set], persistent: bool) -> Optional[set]:
+        """
+        Сбрасывает кэши источника зависимостей
+
+        Returns:
+            Пакеты, загруженные зависимости которых больше нельзя переносить
+            в новый граф: сами пакеты и унаследовавшие их как родителя или
+            BOM (None - все пакеты)
+        """
+        if graph.test_repository:
+            graph.test_repository.load_test_repository()
+        if packages is None or not graph.maven_parser:
+            if graph.maven_parser:
+                graph.maven_parser.invalidate(persistent=persistent)
+            return None if packages is None else set(packages)
+        affected = set()
+        for package in packages:
+            affected.update(graph.maven_parser.invalidate(package, persistent=persistent))
+        return affected
+
+    def resident(self) -> ResidentGraph:
+        resident = self.current
+        if resident is None:
+            raise QueryError(f"Граф еще не построен: {self.last_error or 'идет сборка'}", status=503)
+        return resident
+
+    def status(self) -> Dict[str, Any]:
+        resident = self.current
+        status = {
+            'roots': self.roots,
+            'building': self.building,
+            'last_error': self.last_error,
+            'generation': None
+        }
+        if resident is not None:
+            status.update({
+                'generation': resident.generation,
+                'packages': resident.compact.node_count,
+                'edges': resident.compact.edge_count,
+                'fetched': len(resident.graph.fetched),
+                'built_at': resident.built_at,
+                'build_seconds': resident.build_seconds
+            })
+        parser = resident.graph.maven_parser if resident else None
+        if parser is not None:
+            status['parser_cache'] = len(parser.dependencies_cache)
+        return status
+
+    def closure(self, package: str) -> Dict[str, Any]:
+        resident = self.resident()
+        resident.require(package)
+        names = resident.compact.nodes.names
+        dependencies = sorted(names[dep_id] for dep_id in
+                              resident.closure.reachable_ids(resident.compact.nodes.id(package)))
+        return {'generation': resident.generation, 'package': package, 'count': len(dependencies),
+                'dependencies': dependencies}
+
+    def reverse(self, package: str, max_depth: int = 10) -> Dict[str, Any]:
+        resident = self.resident()
+        resident.require(package)
+        dependents = resident.graph.get_all_reverse_dependencies_bfs(package, max_depth)
+        return {'generation': resident.generation, 'package': package,
+                'direct': resident.graph.get_reverse_dependencies(package),
+                'count': len(dependents), 'dependents': dependents}
+
+    def cycles(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        resident = self.resident()
+        cycles = resident.cycles if limit is None else resident.cycles[:limit]
+        return {'generation': resident.generation, 'count': len(resident.cycles), 'cycles': cycles}
+
+    def path(self, package: str, dependency: str) -> Dict[str, Any]:
+        resident = self.resident()
+        resident.require(package)
+        resident.require(dependency)
+        nodes = resident.compact.nodes
+        # Недостижимость проверяется по прогретому замыканию без обхода
+        reachable = package == dependency or resident.closure.depends_on(nodes.id(package), nodes.id(dependency))
+        return {'generation': resident.generation, 'from': package, 'to': dependency,
+                'path': resident.graph.find_path(package, dependency) if reachable else None}
+
+    def why(self, package: str, max_paths: int = 1, root: Optional[str] = None) -> Dict[str, Any]:
+        resident = self.resident()
+        resident.require(package)
+        return {'generation': resident.generation, 'package': package,
+                'paths': resident.graph.explain_dependency(package, max_paths, root)}
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API сервера запросов
+
+    GET  /status                        - состояние графа и сборки
+    GET  /closure?package=P             - транзитивные зависимости
+    GET  /reverse?package=P[&depth=N]   - обратные зависимости
+    GET  /cycles[?limit=N]              - циклические зависимости
+    GET  /path?from=A&to=B              - кратчайшая цепочка зависимостей
+    GET  /why?package=P[&k=N][&root=R]  - цепочки от корней, через которые
+                                          пакет попал в граф
+    POST /rebuild[?wait=1]              - перестроить граф в фоне
+    POST /invalidate[?package=P...][&persistent=1][&wait=1]
+                                        - сбросить кэши (все или для пакетов
+                                          и их потомков по parent/BOM)
+                                          и перестроить граф
+    """
+
+    server_version = 'DependencyQueryServer/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._dispatch({
+            '/status': lambda query: self.service.status(),
+            '/closure': lambda query: self.service.closure(_required(query, 'package')),
+            '/reverse': lambda query: self.service.reverse(_required(query, 'package'),
+                                                           _integer(query, 'depth', 10)),
+            '/cycles': lambda query: self.service.cycles(_integer(query, 'limit', None)),
+            '/path': lambda query: self.service.path(_required(query, 'from'), _required(query, 'to')),
+            '/why': lambda query: self.service.why(_required(query, 'package'), _integer(query, 'k', 1),
+                                                   query.get('root', [None])[0])
+        })
+
+    def do_POST(self):
+        self._dispatch({
+            '/rebuild': self._rebuild,
+            '/invalidate': self._invalidate
+        })
+
+    @property
+    def service(self) -> QueryService:
+        return self.server.service
+
+    def _rebuild(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        self.service.rebuild(wait=_flag(query, 'wait'))
+        return self.service.status()
+
+    def _invalidate(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        self.service.invalidate(query.get('package'), persistent=_flag(query, 'persistent'),
+                                wait=_flag(query, 'wait'))
+        return self.service.status()
+
+    def _dispatch(self, routes: Dict[str, Callable[[Dict[str, List[str]]], Dict[str, Any]]]) -> None:
+        url = urlsplit(self.path)
+        route = routes.get(url.path)
+        try:
+            # Тело POST-запроса не используется, но должно быть прочитано
+            length = self.headers.get('Content-Length') or '0'
+            if not length.isdigit():
+                # Граница тела неизвестна, соединение дальше использовать нельзя
+                self.close_connection = True
+                raise QueryError(f"Некорректный заголовок Content-Length: {length}")
+            if int(length):
+                self.rfile.read(int(length))
+            if route is None:
+                raise QueryError(f"Неизвестный запрос: {self.command} {url.path}", status=404)
+            status, body = 200, route(parse_qs(url.query))
+        except QueryError as e:
+            status, body = e.status, {'error': str(e)}
+        except Exception as e:
+            # Ошибка графа или сервера не должна обрывать соединение без ответа
+            status, body = 500, {'error': f"Внутренняя ошибка сервера: {e}"}
+        self._send_json(status, body)
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # У клиентов Unix-сокета нет адреса
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format: str, *args) -> None:
+        # Запросы IDE и скриптов идут потоком, журнал каждого запроса не ведется
+        pass
+
+
+def _required(query: Dict[str, List[str]], name: str) -> str:
+    values = query.get(name)
+    if not values or not values[0]:
+        raise QueryError(f"Не указан параметр {name}")
+    return values[0]
+
+
+def _integer(query: Dict[str, List[str]], name: str, default: Optional[int]) -> Optional[int]:
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise QueryError(f"Параметр {name} должен быть целым числом: {values[0]}")
+
+
+def _flag(query: Dict[str, List[str]], name: str) -> bool:
+    return query.get(name, ['0'])[0] not in ('0', 'false', '')
+
+
+class QueryHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: QueryService):
+        super().__init__(address, QueryRequestHandler)
+        self.service = service
+
+
+class UnixQueryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, service: QueryService):
+        # Сокет, оставшийся от предыдущего запуска, мешает привязке; другие
+        # файлы по этому пути не удаляются
+        if _is_socket(path):
+            os.unlink(path)
+        elif os.path.lexists(path):
+            raise QueryServerError(f"{path} существует и не является Unix-сокетом")
+        super().__init__(path, QueryRequestHandler)
+        self.service = service
+
+    def server_close(self) -> None:
+        super().server_close()
+        if _is_socket(self.server_address):
+            os.unlink(self.server_address)
+
+
+def _is_socket(path: str) -> bool:
+    """Является ли путь Unix-сокетом (символические ссылки не разыменовываются)"""
+    try:
+        return stat.S_ISSOCK(os.lstat(path).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+def parse_address(address: str):
+    """
+    Разбирает адрес сервера
+
+    Args:
+        address: "unix:/путь/к/сокету", "хост:порт" или "порт"
+
+    Returns:
+        Путь к Unix-сокету (str) или пара (хост, порт)
+
+    Raises:
+        QueryServerError: Если адрес некорректен
+    """
+    if address.startswith(UNIX_PREFIX):
+        path = address[len(UNIX_PREFIX):]
+        if not path:
+            raise QueryServerError("Не указан путь к Unix-сокету")
+        return path
+    host, separator, port = address.rpartition(':')
+    if not separator:
+        host = DEFAULT_HOST
+    try:
+        return host or DEFAULT_HOST, int(port)
+    except ValueError:
+        raise QueryServerError(f"Некорректный адрес сервера: {address}")
+
+
+def create_server(address: str, service: QueryService):
+    """
+    Создает сервер запросов (HTTP на localhost или на Unix-сокете)
+
+    Raises:
+        QueryServerError: Если адрес некорректен или занят
+    """
+    parsed = parse_address(address)
+    try:
+        if isinstance(parsed, str):
+            if not hasattr(socketserver, 'UnixStreamServer'):
+                raise QueryServerError("Unix-сокеты не поддерживаются на этой платформе")
+            return UnixQueryServer(parsed, service)
+        return QueryHTTPServer(parsed, service)
+    except OSError as e:
+        raise QueryServerError(f"Не удалось открыть {address}: {e}")
+
+
+def server_url(server) -> str:
+    """Адрес запущенного сервера для вывода пользователю"""
+    if isinstance(server, UnixQueryServer):
+        return f"{UNIX_PREFIX}{server.server_address}"
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def serve(address: str, service: QueryService) -> None:
+    """Обслуживает запросы до прерывания (Ctrl+C)"""
+    server = create_server(address, service)
+    print(f"Сервер запросов запущен: {server_url(server)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nСервер запросов остановлен")
+    finally:
+        server.server_close()
@@ -0,0 +1,461 @@
+import mmap
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from urllib.parse import unquote, urlsplit
+
+from http_transport import HttpResponse, HttpTransport, TransportError
+from maven_version import VersionResolutionError, merge_metadata
+
+
+# Локальный репозиторий Maven по умолчанию
+DEFAULT_LOCAL_REPOSITORY = os.path.join('~', '.m2', 'repository')
+
+# Перцентиль задержки репозитория, после которого запрос дублируется следующему
+HEDGE_PERCENTILE = 95
+
+# Минимальное число сегментов префикса groupId, для которого запоминается репозиторий;
+# сам groupId (junit, log4j, commons-io) запоминается при любом числе сегментов
+ROUTE_MIN_SEGMENTS = 2
+
+
+class RepositoryBackendError(Exception):
+    """Ошибка доступа к репозиторию (сеть или файловая система)"""
+    pass
+
+
+def pom_path(group_id: str, artifact_id: str, version: str) -> str:
+    """Относительный путь POM-файла в раскладке Maven-репозитория"""
+    group_path = group_id.replace('.', '/')
+    return f"{group_path}/{artifact_id}/{version}/{artifact_id}-{version}.pom"
+
+
+def metadata_path(group_id: str, artifact_id: str) -> str:
+    """Относительный путь maven-metadata.xml артефакта"""
+    return f"{group_id.replace('.', '/')}/{artifact_id}/maven-metadata.xml"
+
+
+class LocalResponse(HttpResponse):
+    """
+    Ответ локального репозитория
+
+    Тело - memoryview поверх отображенного в память файла, поэтому до
+    декодирования содержимое не копируется.
+    """
+
+    def __init__(self, body, path: str):
+        super().__init__(200, body, {}, url=path, wire_bytes=0)
+        self.path = path
+
+
+class RepositoryBackend(ABC):
+    """
+    Источник POM-файлов с раскладкой Maven-репозитория
+
+    Пути задаются относительно корня репозитория (см. pom_path).
+    fetch возвращает ответ со статусом 200, 304 или 404, в url ответа -
+    адрес в том репозитории, который фактически ответил; прочие ошибки
+    доступа выбрасываются как RepositoryBackendError.
+    """
+
+    @abstractmethod
+    def fetch(self, path: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> HttpResponse:
+        """Загружает ресурс по относительному пути"""
+
+    def fetch_local(self, path: str) -> Optional[HttpResponse]:
+        """Ответ без обращения к сети или None (для офлайн-режима)"""
+        return None
+
+    @abstractmethod
+    def location(self, path: str) -> str:
+        """Полный адрес ресурса для вывода пользователю"""
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Счетчики и задержки по репозиториям (пусто, если не ведутся)"""
+        return {}
+
+    def close(self) -> None:
+        """Освобождает потоки и другие ресурсы источника (транспорт принадлежит вызывающему)"""
+
+
+class HttpBackend(RepositoryBackend):
+    """Удаленный репозиторий через HttpTransport"""
+
+    def __init__(self, base_url: str, transport: Optional[HttpTransport] = None):
+        self.base_url = base_url.rstrip('/')
+        self.transport = transport or HttpTransport()
+
+    def fetch(self, path: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> HttpResponse:
+        url = self.location(path)
+        try:
+            return self.transport.get(url, etag=etag, last_modified=last_modified)
+        except TransportError as e:
+            raise RepositoryBackendError(f"Ошибка сети при загрузке {url}: {e}")
+
+    def location(self, path: str) -> str:
+        return f"{self.base_url}/{path}"
+
+
+class LocalBackend(RepositoryBackend):
+    """
+    Локальный репозиторий на диске (~/.m2/repository или file://)
+
+    Файлы читаются через mmap без промежуточной копии в памяти процесса.
+    """
+
+    def __init__(self, root: str = DEFAULT_LOCAL_REPOSITORY):
+        if root.startswith('file://'):
+            root = unquote(urlsplit(root).path)
+        self.root = os.path.expanduser(root)
+
+    def fetch(self, path: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> HttpResponse:
+        response = self.fetch_local(path)
+        return response if response is not None else HttpResponse(404, b'', {}, url=self.location(path))
+
+    def fetch_local(self, path: str) -> Optional[HttpResponse]:
+        file_path = self.location(path)
+        try:
+            with open(file_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return LocalResponse(memoryview(b''), file_path)
+                # Отображение остается открытым, пока жив memoryview
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            raise RepositoryBackendError(f"Ошибка чтения {file_path}: {e}")
+        return LocalResponse(memoryview(mapped), file_path)
+
+    def location(self, path: str) -> str:
+        return os.path.join(self.root, *path.split('/'))
+
+
+class ChainedBackend(RepositoryBackend):
+    """
+    Цепочка репозиториев: первый ответ, отличный от 404, выигрывает
+
+    Обычно локальный репозиторий идет первым, удаленный - последним.
+    """
+
+    def __init__(self, backends: List[RepositoryBackend]):
+        if not backends:
+            raise ValueError("Цепочка репозиториев не может быть пустой")
+        self.backends = backends
+
+    def fetch(self, path: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> HttpResponse:
+        response = None
+        for backend in self.backends:
+            response = backend.fetch(path, etag=etag, last_modified=last_modified)
+            if response.status != 404:
+                return response
+        return response
+
+    def fetch_local(self, path: str) -> Optional[HttpResponse]:
+        for backend in self.backends:
+            response = backend.fetch_local(path)
+            if response is not None:
+                return response
+        return None
+
+    def location(self, path: str) -> str:
+        return self.backends[-1].location(path)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        for backend in self.backends:
+            stats.update(backend.stats())
+        return stats
+
+    def close(self) -> None:
+        for backend in self.backends:
+            backend.close()
+
+
+class HedgedBackend(RepositoryBackend):
+    """
+    Несколько удаленных репозиториев (Central, Google, зеркала) с
+    хеджированием запросов и памятью маршрутов по groupId
+
+    Репозитории упорядочены по приоритету. Для каждого хранится окно
+    последних задержек; если репозиторий не ответил за p95 своей задержки,
+    тот же запрос отправляется следующему, и выигрывает первый ответ 200
+    или 304. Ответ 404, другой код (401, 403, 410, ...) или ошибка сразу
+    передают запрос дальше. Репозиторий, выигравший запрос, запоминается
+    для groupId и его префиксов, поэтому следующие пакеты группы
+    запрашиваются сначала у него.
+
+    maven-metadata.xml не хеджируется: он запрашивается у всех
+    репозиториев, и списки версий объединяются, как это делает Maven.
+    """
+
+    def __init__(self, backends: List[RepositoryBackend], initial_hedge_delay: float = 0.2,
+                 min_hedge_delay: float = 0.005, window: int = 256, min_samples: int = 20,
+                 max_workers: int = 32):
+        """
+        Args:
+            backends: Репозитории в порядке приоритета
+            initial_hedge_delay: Задержка дублирования, пока задержки
+                репозитория еще не набраны (секунды)
+            min_hedge_delay: Нижняя граница задержки дублирования
+            window: Число последних задержек, по которым считается p95
+            min_samples: Сколько задержек нужно, чтобы использовать p95
+            max_workers: Число потоков, выполняющих запросы к репозиториям;
+                время до дублирования отсчитывается с начала выполнения
+                запроса, а не с постановки в очередь пула
+        """
+        if not backends:
+            raise ValueError("Список репозиториев не может быть пустым")
+        self.backends = backends
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        # groupId или его префикс -> номер репозитория, который его обслуживает
+        self.routes: Dict[str, int] = {}
+        self._latencies = [deque(maxlen=window) for _ in backends]
+        self._counters = [{} for _ in backends]
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='repository')
+
+    def fetch(self, path: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> HttpResponse:
+        if path.endswith('/maven-metadata.xml'):
+            return self._fetch_metadata(path)
+        group_id = _group_id(path)
+        order = self._order(group_id)
+        pending = {}
+        launched = 0
+        not_found = None
+        failed = None
+        last_error = None
+        # Номер репозитория -> момент, когда поток пула начал запрос к нему
+        started_at: Dict[int, float] = {}
+
+        def launch() -> float:
+            nonlocal launched
+            index = order[launched]
+            launched += 1
+            pending[self._executor.submit(self._timed_fetch, index, path, etag, last_modified, started_at)] = index
+            return self.hedge_delay(index)
+
+        def hedge_timeout() -> Optional[float]:
+            if launched == len(order):
+                return None
+            started = started_at.get(order[launched - 1])
+            if started is None:
+                # Запрос ждет свободного потока пула - время до дублирования не идет
+                return self.min_hedge_delay
+            return max(0.0, started + delay - time.perf_counter())
+
+        delay = launch()
+        while pending:
+            timeout = hedge_timeout()
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                if order[launched - 1] not in started_at or hedge_timeout() > 0:
+                    continue
+                # Репозиторий не уложился в свой p95 - дублируем запрос следующему
+                self._count(order[launched], 'hedges')
+                delay = launch()
+                continue
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    response = future.result()
+                except RepositoryBackendError as e:
+                    last_error = e
+                    continue
+                if response.status in (200, 304):
+                    self._count(index, 'wins')
+                    self._remember(group_id, index)
+                    # Дубли, еще не взятые потоками пула, уже не нужны
+                    for other in pending:
+                        other.cancel()
+                    return response
+                if response.status == 404:
+                    not_found = response
+                else:
+                    failed = response
+            if not pending and launched < len(order):
+                delay = launch()
+
+        if not_found is not None:
+            return not_found
+        if failed is not None:
+            return failed
+        raise last_error
+
+    def _fetch_metadata(self, path: str) -> HttpResponse:
+        """
+        maven-metadata.xml из всех репозиториев, объединенный по версиям
+
+        Первый ответивший репозиторий знает только свои версии, поэтому при
+        хеджировании выбор диапазона и LATEST/RELEASE зависел бы от гонки.
+        """
+        futures = [self._executor.submit(self._timed_fetch, index, path, None, None, {})
+                   for index in range(len(self.backends))]
+        found = []
+        not_found = None
+        failed = None
+        last_error = None
+        for future in futures:
+            try:
+                response = future.result()
+            except RepositoryBackendError as e:
+                last_error = e
+                continue
+            if response.status == 200:
+                found.append(response)
+            elif response.status == 404:
+                not_found = response
+            else:
+                failed = response
+
+        if len(found) == 1:
+            return found[0]
+        if found:
+            try:
+                merged = merge_metadata([str(response.body, 'utf-8') for response in found])
+            except VersionResolutionError as e:
+                raise RepositoryBackendError(f"Некорректный {path}: {e}")
+            return HttpResponse(200, merged.encode('utf-8'), {},
+                                url=', '.join(response.url or '' for response in found))
+        if not_found is not None:
+            return not_found
+        if failed is not None:
+            return failed
+        raise last_error
+
+    def _timed_fetch(self, index: int, path: str, etag: Optional[str], last_modified: Optional[str],
+                     started_at: Dict[int, float]) -> HttpResponse:
+        started = started_at[index] = time.perf_counter()
+        try:
+            response = self.backends[index].fetch(path, etag=etag, last_modified=last_modified)
+        except RepositoryBackendError:
+            self._count(index, 'errors')
+            raise
+        with self._lock:
+            self._latencies[index].append(time.perf_counter() - started)
+            counters = self._counters[index]
+            counters['requests'] = counters.get('requests', 0) + 1
+            if response.status == 404:
+                counters['not_found'] = counters.get('not_found', 0) + 1
+            elif response.status not in (200, 304):
+                counters['errors'] = counters.get('errors', 0) + 1
+        return response
+
+    def hedge_delay(self, index: int) -> float:
+        """Сколько ждать ответа репозитория, прежде чем дублировать запрос"""
+        with self._lock:
+            samples = sorted(self._latencies[index])
+        if len(samples) < self.min_samples:
+            return self.initial_hedge_delay
+        return max(self.min_hedge_delay, samples[min(len(samples) - 1, len(samples) * HEDGE_PERCENTILE // 100)])
+
+    def _order(self, group_id: str) -> List[int]:
+        """Номера репозиториев: запомненный для groupId первым, остальные по приоритету"""
+        order = list(range(len(self.backends)))
+        segments = group_id.split('.')
+        with self._lock:
+            for length in range(len(segments), _shortest_route(segments) - 1, -1):
+                index = self.routes.get('.'.join(segments[:length]))
+                if index is not None:
+                    order.remove(index)
+                    order.insert(0, index)
+                    break
+        return order
+
+    def _remember(self, group_id: str, index: int) -> None:
+        # Сам groupId всегда указывает на последний ответивший репозиторий,
+        # его префиксы - на первый, ответивший в этой ветке групп
+        segments = group_id.split('.')
+        with self._lock:
+            for length in range(len(segments), _shortest_route(segments) - 1, -1):
+                prefix = '.'.join(segments[:length])
+                if length == len(segments) or prefix not in self.routes:
+                    self.routes[prefix] = index
+
+    def _count(self, index: int, counter: str) -> None:
+        with self._lock:
+            counters = self._counters[index]
+            counters[counter] = counters.get(counter, 0) + 1
+
+    def fetch_local(self, path: str) -> Optional[HttpResponse]:
+        for index in self._order(_group_id(path)):
+            response = self.backends[index].fetch_local(path)
+            if response is not None:
+                return response
+        return None
+
+    def location(self, path: str) -> str:
+        return self.backends[self._order(_group_id(path))[0]].location(path)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        with self._lock:
+            for backend, latencies, counters in zip(self.backends, self._latencies, self._counters):
+                samples = sorted(latencies)
+                entry = dict(counters)
+                if samples:
+                    entry['p50'] = samples[len(samples) // 2]
+                    entry[f'p{HEDGE_PERCENTILE}'] = samples[min(len(samples) - 1,
+                                                                len(samples) * HEDGE_PERCENTILE // 100)]
+                stats[backend.location('').rstrip('/')] = entry
+        return stats
+
+    def close(self) -> None:
+        # Дубли, проигравшие гонку, не дожидаются ответа: их результат не нужен
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for backend in self.backends:
+            backend.close()
+
+
+def _shortest_route(segments: List[str]) -> int:
+    """Длина самого короткого префикса groupId, для которого ведется маршрут"""
+    return min(len(segments), ROUTE_MIN_SEGMENTS)
+
+
+def _group_id(path: str) -> str:
+    """groupId по пути POM-файла или maven-metadata.xml"""
+    parts = path.split('/')
+    if parts[-1] == 'maven-metadata.xml':
+        return '.'.join(parts[:-2])
+    return '.'.join(parts[:-3])
+
+
+def _repository_backend(repository_url: str, transport: Optional[HttpTransport]) -> RepositoryBackend:
+    if repository_url.startswith(('http://', 'https://')):
+        return HttpBackend(repository_url, transport)
+    return LocalBackend(repository_url)
+
+
+def create_backend(repository_url: str, transport: Optional[HttpTransport] = None,
+                   local_repository: Optional[str] = None,
+                   mirrors: Optional[List[str]] = None, concurrency: int = 1) -> RepositoryBackend:
+    """
+    Создает источник POM-файлов по адресу репозитория
+
+    Args:
+        repository_url: http(s)-адрес, file:// URL или путь к каталогу
+        transport: HTTP-транспорт для удаленного репозитория
+        local_repository: Локальный репозиторий, который опрашивается первым
+        mirrors: Дополнительные репозитории после repository_url в порядке
+            приоритета; запросы к ним хеджируются (см. HedgedBackend)
+        concurrency: Сколько POM-файлов загружается одновременно; пул
+            HedgedBackend рассчитан на запрос к каждому репозиторию от
+            каждой загрузки
+
+    Returns:
+        RepositoryBackend (ChainedBackend, если задан local_repository);
+        после использования его нужно закрыть (close)
+    """
+    backend = _repository_backend(repository_url, transport)
+    if mirrors:
+        backends = [backend] + [_repository_backend(url, transport) for url in mirrors]
+        backend = HedgedBackend(backends, max_workers=max(1, concurrency) * len(backends))
+
+    if local_repository:
+        return ChainedBackend([LocalBackend(local_repository), backend])
+    return backend
@@ -1,9 +1,42 @@
+import mmap
+import os
+import struct
+from array import array
+
+
+# Заголовок индекса: магическое число, версия, размер и время изменения
+# исходного файла, число записей и размер таблицы имен
+INDEX_HEADER = struct.Struct('=8sIQQQQ')
+INDEX_MAGIC = b'TREPIDX\0'
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.idx'
+
+
+def _parse_dependencies(dependencies_str: str):
+    return [dep.strip() for dep in dependencies_str.split(',') if dep.strip()]
+
+
+def _merge(existing: list, dependencies: list):
+    """Добавляет зависимости повторной строки пакета без дубликатов"""
+    for dep in dependencies:
+        if dep not in existing:
+            existing.append(dep)
+
+
 class TestRepository:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, indexed: bool = False, index_path: str = None):
         self.file_path = file_path
         self.graph = {}
-    
+        # Индексированный режим: строки читаются с диска по требованию
+        self.indexed = indexed
+        self.index_path = index_path or file_path + INDEX_SUFFIX
+        self.index = None
+
     def load_test_repository(self):
+        if self.indexed:
+            self.index = LineIndex.open(self.file_path, self.index_path)
+            return self.graph
+
         self.graph = {}
         with open(self.file_path, 'r', encoding='utf-8') as file:
             for line in file:
@@ -12,9 +45,149 @@ class TestRepository:
                     continue
                 package, dependencies_str = line.split(':', 1)
                 package = package.strip()
-                dependencies = [dep.strip() for dep in dependencies_str.split(',') if dep.strip()]
-                self.graph[package] = dependencies
+                dependencies = _parse_dependencies(dependencies_str)
+                if package in self.graph:
+                    _merge(self.graph[package], dependencies)
+                else:
+                    self.graph[package] = dependencies
         return self.graph
-    
+
     def get_dependencies(self, package: str):
-        return self.graph.get(package, [])
\ No newline at end of file
+        if self.index is not None:
+            return self.index.get_dependencies(package)
+        return self.graph.get(package, [])
+
+
+class LineIndex:
+    """
+    Индекс строк файла смежности "пакет: зависимость, ..."
+
+    Хранит имена пакетов в отсортированной таблице и смещения их строк в
+    файле. Индекс записывается рядом с исходным файлом и переиспользуется,
+    пока не изменились размер и время изменения исходного файла. Исходный
+    файл и индекс отображаются в память, поэтому get_dependencies читает
+    только строки запрошенного пакета.
+    """
+
+    def __init__(self, data: mmap.mmap, index_buffer, entry_count: int, names_size: int):
+        self._data = data
+        self._index_buffer = index_buffer
+        position = INDEX_HEADER.size
+        offsets_size = (entry_count + 1) * 8
+        self._name_offsets = memoryview(index_buffer)[position:position + offsets_size].cast('Q')
+        position += offsets_size
+        self._names = memoryview(index_buffer)[position:position + names_size]
+        position += names_size + (-names_size % 8)
+        self._line_offsets = memoryview(index_buffer)[position:position + entry_count * 8].cast('Q')
+        self.entry_count = entry_count
+
+    @classmethod
+    def open(cls, file_path: str, index_path: str) -> 'LineIndex':
+        """
+        Открывает индекс, строя его при отсутствии или устаревании
+
+        Если индекс нельзя записать на диск, он остается только в памяти.
+        """
+        with open(file_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else None
+
+        index_buffer = cls._map_existing(index_path, stat)
+        if index_buffer is None:
+            index_bytes = cls._build(data, stat)
+            try:
+                temporary_path = f"{index_path}.{os.getpid()}.tmp"
+                with open(temporary_path, 'wb') as f:
+                    f.write(index_bytes)
+                os.replace(temporary_path, index_path)
+            except OSError as e:
+                print(f"Предупреждение: не удалось сохранить индекс {index_path}: {e}")
+            index_buffer = index_bytes
+
+        _, _, _, _, entry_count, names_size = INDEX_HEADER.unpack_from(index_buffer)
+        return cls(data, index_buffer, entry_count, names_size)
+
+    @staticmethod
+    def _map_existing(index_path: str, stat: os.stat_result):
+        """Отображает сохраненный индекс, если он соответствует исходному файлу"""
+        try:
+            with open(index_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < INDEX_HEADER.size:
+                    return None
+                index_buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+
+        magic, version, source_size, source_mtime, _, _ = INDEX_HEADER.unpack_from(index_buffer)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION \
+                or source_size != stat.st_size or source_mtime != stat.st_mtime_ns:
+            index_buffer.close()
+            return None
+        return index_buffer
+
+    @staticmethod
+    def _build(data, stat: os.stat_result) -> bytes:
+        """Один проход по файлу: имя пакета и смещение каждой строки"""
+        entries = []
+        position = 0
+        size = len(data) if data is not None else 0
+        while position < size:
+            end = data.find(b'\n', position)
+            if end == -1:
+                end = size
+            separator = data.find(b':', position, end)
+            if separator != -1:
+                package = data[position:separator].strip()
+                if package:
+                    entries.append((package, position))
+            position = end + 1
+
+        # Сортировка устойчива: повторные строки пакета остаются в порядке файла
+        entries.sort(key=lambda entry: entry[0])
+        name_offsets = array('Q', [0])
+        line_offsets = array('Q')
+        names = bytearray()
+        for package, offset in entries:
+            names += package
+            name_offsets.append(len(names))
+            line_offsets.append(offset)
+        names += b'\0' * (-len(names) % 8)
+
+        header = INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, stat.st_size, stat.st_mtime_ns,
+                                   len(entries), name_offsets[-1])
+        return header + name_offsets.tobytes() + bytes(names) + line_offsets.tobytes()
+
+    def _name(self, entry: int) -> bytes:
+        return self._names[self._name_offsets[entry]:self._name_offsets[entry + 1]].tobytes()
+
+    def _first_entry(self, key: bytes) -> int:
+        low, high = 0, self.entry_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get_dependencies(self, package: str):
+        """Зависимости пакета: все его строки в файле, объединенные без дубликатов"""
+        key = package.strip().encode('utf-8')
+        entry = self._first_entry(key)
+        dependencies = None
+        while entry < self.entry_count and self._name(entry) == key:
+            offset = self._line_offsets[entry]
+            end = self._data.find(b'\n', offset)
+            line = self._data[offset:end if end != -1 else len(self._data)].decode('utf-8')
+            line_dependencies = _parse_dependencies(line.split(':', 1)[1])
+            if dependencies is None:
+                dependencies = line_dependencies
+            else:
+                _merge(dependencies, line_dependencies)
+            entry += 1
+        return dependencies or []
+
+    def __contains__(self, package: str) -> bool:
+        key = package.strip().encode('utf-8')
+        entry = self._first_entry(key)
+        return entry < self.entry_count and self._name(entry) == key
@@ -0,0 +1,83 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from batch_resolver import BatchResolver, create_maven_parser
+from dependency_graph import DependencyGraph
+from maven_parser import MavenParser
+from mock_maven_server import MockMavenRepository
+from pom_cache import PomCache
+
+ARTIFACTS = {
+    'svc:a:1.0': ['lib:web:1.0', 'lib:json:2.0'],
+    'svc:b:1.0': ['lib:web:1.0', 'lib:db:3.0'],
+    'svc:c:1.0': ['lib:cli:1.0'],
+    'lib:web:1.0': ['lib:json:2.0', 'lib:log:1.0'],
+    'lib:db:3.0': ['lib:log:1.0', 'svc:c:1.0'],
+    'lib:json:2.0': [],
+    'lib:log:1.0': [],
+    'lib:cli:1.0': ['lib:log:1.0'],
+}
+ROOTS = ['svc:a:1.0', 'svc:b:1.0', 'svc:c:1.0']
+
+
+class BatchResolverTest(unittest.TestCase):
+    def setUp(self):
+        self.repository = self.enterContext(MockMavenRepository(ARTIFACTS))
+
+    def graph(self) -> DependencyGraph:
+        parser = MavenParser(self.repository.url, verbose=False)
+        self.addCleanup(parser.transport.close)
+        return DependencyGraph(maven_parser=parser, verbose=False)
+
+    def test_shared_graph_matches_separate_builds(self):
+        shared = self.graph()
+        BatchResolver(shared).resolve(ROOTS, concurrency=4)
+        self.assertEqual(self.repository.request_count, len(ARTIFACTS), "каждый POM загружается один раз")
+
+        for root in ROOTS:
+            with self.subTest(root=root):
+                separate = self.graph()
+                separate.build_dependency_graph_bfs(root)
+                self.assertEqual(shared.get_all_dependencies(root), separate.get_all_dependencies(root))
+                for package, dependencies in separate.graph.items():
+                    self.assertEqual(shared.graph[package], dependencies)
+
+    def test_process_pool_matches_threads(self):
+        threads = self.graph()
+        BatchResolver(threads).resolve(ROOTS, concurrency=4)
+        processes = self.graph()
+        BatchResolver(processes, {'repository_url': self.repository.url}, processes=2).resolve(ROOTS)
+        self.assertEqual(list(processes.graph.items()), list(threads.graph.items()))
+        self.assertEqual(processes.depths, threads.depths)
+
+    def test_roots_summary(self):
+        graph = self.graph()
+        BatchResolver(graph).resolve(ROOTS)
+        summary = {item['root']: item for item in graph.get_roots_summary(ROOTS + ['svc:a:1.0', 'absent:x:1'])}
+        closures = {root: graph.get_all_dependencies(root) - {root} for root in ROOTS}
+        for root in ROOTS:
+            others = set().union(*(closures[other] for other in ROOTS if other != root))
+            self.assertEqual(summary[root], {'root': root, 'direct': len(ARTIFACTS[root]),
+                                             'transitive': len(closures[root]),
+                                             'shared': len(closures[root] & others)})
+        self.assertEqual(summary['absent:x:1']['transitive'], 0)
+        self.assertEqual(len(summary), 4, "повторные корни считаются один раз")
+
+    def test_create_maven_parser(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        parser = create_maven_parser({'repository_url': self.repository.url, 'cache_dir': directory.name,
+                                      'http_retries': 0, 'negative_ttl': 5.0})
+        self.addCleanup(parser.transport.close)
+        self.addCleanup(parser.cache.close)
+        self.assertIsInstance(parser.cache, PomCache)
+        self.assertEqual((parser.transport.max_retries, parser.negative_ttl), (0, 5.0))
+        with redirect_stdout(io.StringIO()):
+            dependencies = parser.get_direct_dependencies('svc:c:1.0')
+        self.assertEqual([dep['artifact_id'] for dep in dependencies], ['cli'])
+
+
+if __name__ == '__main__':
+    unittest.main()
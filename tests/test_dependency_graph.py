@@ -0,0 +1,248 @@
+import os
+import random
+import unittest
+
+import test_repository
+from dependency_graph import DependencyGraph
+from maven_parser import MavenParser
+from mock_maven_server import MockMavenRepository
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def layered_artifacts(levels: int = 4, width: int = 12, fan_out: int = 4, seed: int = 1) -> dict:
+    """
+    Пакеты по уровням: каждый зависит от случайных пакетов следующего
+    уровня, поэтому общие зависимости встречаются многократно; последний
+    уровень ссылается на первый, образуя циклы
+    """
+    rng = random.Random(seed)
+    names = [[f"test.l{level}:a{index}:1.0" for index in range(width)] for level in range(levels)]
+    artifacts = {"test.root:root:1.0": names[0][:fan_out]}
+    for level in range(levels):
+        following = names[level + 1] if level + 1 < levels else names[0]
+        for package in names[level]:
+            artifacts[package] = rng.sample(following, fan_out)
+    return artifacts
+
+
+def load_repository(name: str):
+    repository = test_repository.TestRepository(os.path.join(REPOSITORY_DIR, name))
+    repository.load_test_repository()
+    return repository
+
+
+def parser_for(test: unittest.TestCase, url: str) -> MavenParser:
+    """Парсер репозитория, соединения которого закрываются после теста"""
+    parser = MavenParser(url, verbose=False)
+    test.addCleanup(parser.transport.close)
+    return parser
+
+
+class ConcurrentBfsTest(unittest.TestCase):
+    def build(self, concurrency: int, **options) -> DependencyGraph:
+        graph = DependencyGraph(**options, verbose=False)
+        graph.build_dependency_graph_bfs(self.root, max_depth=6, concurrency=concurrency)
+        return graph
+
+    def assertSameGraph(self, sequential: DependencyGraph, concurrent: DependencyGraph):
+        # Порядок пакетов и ребер, а не только множества
+        self.assertEqual(list(concurrent.graph.items()), list(sequential.graph.items()))
+        self.assertEqual(concurrent.depths, sequential.depths)
+        self.assertEqual(concurrent.predecessors, sequential.predecessors)
+        self.assertEqual(concurrent.reverse_graph, sequential.reverse_graph)
+        self.assertEqual(concurrent.fetch_count, sequential.fetch_count)
+
+    def test_maven_repository(self):
+        self.root = "test.root:root:1.0"
+        with MockMavenRepository(layered_artifacts(), latency=0.001) as repository:
+            sequential = self.build(1, maven_parser=parser_for(self, repository.url))
+            concurrent = self.build(8, maven_parser=parser_for(self, repository.url))
+        self.assertSameGraph(sequential, concurrent)
+        self.assertEqual(sequential.fetch_count, len(sequential.graph))
+
+    def test_test_repository(self):
+        self.root = 'A'
+        for name in ('test_repo_complex.txt', 'test_repo_cycles.txt'):
+            with self.subTest(name=name):
+                repository = load_repository(name)
+                self.assertSameGraph(self.build(1, test_repository=repository),
+                                     self.build(4, test_repository=repository))
+
+
+class ReachabilityQueriesTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = DependencyGraph(verbose=False)
+        self.graph.graph = {
+            'a': ['b', 'c'],
+            'b': ['d'],
+            'c': ['d', 'e'],
+            'd': ['b'],
+            'e': [],
+            'f': ['a'],
+        }
+
+    def test_all_dependencies_match_closure(self):
+        closure = self.graph.transitive_closure()
+        nodes = self.graph.compact_graph().nodes
+        for package in self.graph.graph:
+            with self.subTest(package=package):
+                expected = {nodes.names[dep_id] for dep_id in closure.reachable_ids(nodes.id(package))}
+                self.assertEqual(self.graph.get_all_dependencies(package), expected)
+        self.assertEqual(self.graph.get_all_dependencies('b'), {'b', 'd'}, "пакет в цикле зависит от себя")
+        self.assertEqual(self.graph.get_all_dependencies('e'), set())
+        self.assertEqual(self.graph.get_all_dependencies('absent'), set())
+
+    def test_find_path(self):
+        self.assertEqual(self.graph.find_path('f', 'e'), ['f', 'a', 'c', 'e'])
+        self.assertEqual(self.graph.find_path('a', 'd'), ['a', 'b', 'd'])
+        self.assertEqual(self.graph.find_path('a', 'a'), ['a'])
+        self.assertIsNone(self.graph.find_path('e', 'a'))
+        self.assertIsNone(self.graph.find_path('a', 'f'))
+        self.assertIsNone(self.graph.find_path('a', 'absent'))
+        self.assertIsNone(self.graph._closure, "одиночные запросы не строят замыкание")
+
+
+class IncrementalRebuildTest(unittest.TestCase):
+    STEPS = [("", 2), ("", 4), ("test.l1", 4), ("test.l1", 3), ("", 3), ("", 6), ("", 1)]
+
+    def assertSameGraph(self, incremental: DependencyGraph, fresh: DependencyGraph):
+        self.assertEqual(list(incremental.graph.items()), list(fresh.graph.items()))
+        self.assertEqual(incremental.depths, fresh.depths)
+        self.assertEqual(incremental.predecessors, fresh.predecessors)
+        self.assertEqual(incremental.reverse_graph, fresh.reverse_graph)
+        self.assertEqual(incremental.get_all_dependencies(self.root), fresh.get_all_dependencies(self.root))
+
+    def test_matches_fresh_build(self):
+        self.root = "test.root:root:1.0"
+        artifacts = layered_artifacts(levels=5, width=8, fan_out=3, seed=4)
+        with MockMavenRepository(artifacts) as repository:
+            incremental = DependencyGraph(maven_parser=parser_for(self, repository.url), verbose=False)
+            loaded_depth = 0
+            for filter_substring, depth in self.STEPS:
+                with self.subTest(filter_substring=filter_substring, depth=depth):
+                    requests = repository.request_count
+                    incremental.build_dependency_graph_bfs(self.root, filter_substring, depth, concurrency=4)
+                    if depth <= loaded_depth:
+                        self.assertEqual(repository.request_count, requests, "POM загружаются повторно")
+                    loaded_depth = max(loaded_depth, depth)
+
+                    fresh = DependencyGraph(maven_parser=parser_for(self, repository.url), verbose=False)
+                    fresh.build_dependency_graph_bfs(self.root, filter_substring, depth)
+                    self.assertSameGraph(incremental, fresh)
+
+    def test_test_repository(self):
+        self.root = 'A'
+        repository = load_repository('test_repo_cycles.txt')
+        incremental = DependencyGraph(test_repository=repository, verbose=False)
+        for filter_substring, depth in [("", 1), ("", 5), ("C", 5), ("", 2)]:
+            with self.subTest(filter_substring=filter_substring, depth=depth):
+                incremental.build_dependency_graph_bfs(self.root, filter_substring, depth)
+                fresh = DependencyGraph(test_repository=repository, verbose=False)
+                fresh.build_dependency_graph_bfs(self.root, filter_substring, depth)
+                self.assertSameGraph(incremental, fresh)
+
+
+class VersionMediationTest(unittest.TestCase):
+    ARTIFACTS = {
+        'app:root:1.0': ['app:a:1.0', 'app:b:1.0', 'lib:y:3.0'],
+        'app:a:1.0': ['lib:x:1.0'],
+        'app:b:1.0': ['lib:x:2.0', 'lib:z:1.0'],
+        'lib:x:1.0': ['lib:y:1.0'],
+        'lib:x:2.0': ['lib:z:1.0'],
+        'lib:y:1.0': [],
+        'lib:y:3.0': [],
+        'lib:z:1.0': [],
+    }
+
+    def build(self, repository, concurrency: int) -> DependencyGraph:
+        graph = DependencyGraph(maven_parser=parser_for(self, repository.url), verbose=False)
+        graph.build_dependency_graph_bfs('app:root:1.0', max_depth=5, concurrency=concurrency, mediation=True)
+        return graph
+
+    def test_nearest_then_first_wins(self):
+        with MockMavenRepository(self.ARTIFACTS) as repository:
+            graph = self.build(repository, 1)
+            self.assertEqual(repository.path_counts.get('/lib/x/2.0/x-2.0.pom', 0), 0,
+                             "проигравшая версия не загружается")
+            concurrent = self.build(repository, 8)
+
+        self.assertEqual(graph.graph, {
+            'app:root:1.0': ['app:a:1.0', 'app:b:1.0', 'lib:y:3.0'],
+            'app:a:1.0': ['lib:x:1.0'],
+            'app:b:1.0': ['lib:x:1.0', 'lib:z:1.0'],  # на той же глубине побеждает первая в порядке BFS
+            'lib:z:1.0': [],
+            'lib:y:3.0': [],
+            'lib:x:1.0': ['lib:y:3.0'],         # ближайшая версия y объявлена корнем
+        })
+        self.assertEqual(graph.selected_versions, {'app:root': 'app:root:1.0', 'app:a': 'app:a:1.0',
+                                                   'app:b': 'app:b:1.0', 'lib:x': 'lib:x:1.0',
+                                                   'lib:y': 'lib:y:3.0', 'lib:z': 'lib:z:1.0'})
+        self.assertEqual([(conflict['rejected'], conflict['selected'], conflict['requested_by'], conflict['depth'])
+                          for conflict in graph.conflicts],
+                         [('lib:x:2.0', 'lib:x:1.0', 'app:b:1.0', 2),
+                          ('lib:y:1.0', 'lib:y:3.0', 'lib:x:1.0', 3)])
+        self.assertEqual(list(concurrent.graph.items()), list(graph.graph.items()))
+        self.assertEqual(concurrent.conflicts, graph.conflicts)
+
+
+def simple_paths(graph: dict, source: str, target: str) -> list:
+    """Все простые пути source -> target полным перебором"""
+    paths = []
+
+    def extend(path):
+        if path[-1] == target:
+            paths.append(list(path))
+            return
+        for dep in dict.fromkeys(graph.get(path[-1], ())):
+            if dep not in path:
+                path.append(dep)
+                extend(path)
+                path.pop()
+
+    extend([source])
+    return paths
+
+
+class ExplainDependencyTest(unittest.TestCase):
+    def build(self, name: str) -> DependencyGraph:
+        graph = DependencyGraph(test_repository=load_repository(name), verbose=False)
+        graph.build_dependency_graph_bfs('A', max_depth=10)
+        return graph
+
+    def test_paths_against_brute_force(self):
+        for name in ('test_repo_complex.txt', 'test_repo_cycles.txt'):
+            graph = self.build(name)
+            for package in graph.depths:
+                with self.subTest(name=name, package=package):
+                    expected = sorted(len(path) for path in simple_paths(graph.graph, 'A', package))
+                    paths = graph.explain_dependency(package, max_paths=4)
+                    self.assertEqual([len(path) for path in paths], expected[:4])
+                    self.assertEqual(len({tuple(path) for path in paths}), len(paths))
+                    for path in paths:
+                        self.assertEqual((path[0], path[-1]), ('A', package))
+                        for source, target in zip(path, path[1:]):
+                            self.assertIn(target, graph.graph[source])
+                    self.assertEqual(graph.explain_dependency(package), paths[:1])
+                    self.assertEqual(len(paths[0]) - 1, graph.depths[package])
+
+    def test_batch_matches_single(self):
+        graph = self.build('test_repo_complex.txt')
+        packages = list(graph.depths) + ['absent']
+        chains = graph.explain_dependencies_batch(packages)
+        for package in graph.depths:
+            self.assertEqual([chains[package]], graph.explain_dependency(package))
+        self.assertIsNone(chains['absent'])
+        self.assertEqual(graph.explain_dependency('absent'), [])
+        self.assertEqual(graph.explain_dependency('A', max_paths=0), [])
+
+    def test_root_selection(self):
+        graph = DependencyGraph(verbose=False)
+        graph.test_repository = load_repository('test_repo_cycles.txt')
+        graph.build_dependency_graph_multi(['A', 'B'], max_depth=10)
+        self.assertEqual(graph.explain_dependency('D'), [['B', 'D']])
+        self.assertEqual(graph.explain_dependency('D', root='A'), [['A', 'B', 'D']])
+
+
+if __name__ == '__main__':
+    unittest.main()
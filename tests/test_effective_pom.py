@@ -0,0 +1,179 @@
+import io
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+
+from effective_pom import EffectivePomResolver, PomInheritanceError, interpolate
+from maven_parser import MavenParser
+from mock_maven_server import write_repository
+
+
+def pom(package: str, parent: str = None, properties: dict = None, dependencies=(), management=()) -> str:
+    """
+    POM-файл пакета "g:a:v"; зависимости - кортежи (g, a, версия или None[, scope[, type]])
+    """
+    group_id, artifact_id, version = package.split(':')
+
+    def dependency(entry):
+        dep_group, dep_artifact, dep_version, *rest = entry
+        fields = f'<groupId>{dep_group}</groupId><artifactId>{dep_artifact}</artifactId>'
+        if dep_version:
+            fields += f'<version>{dep_version}</version>'
+        if rest:
+            fields += f'<scope>{rest[0]}</scope>'
+        if len(rest) > 1:
+            fields += f'<type>{rest[1]}</type>'
+        return f'<dependency>{fields}</dependency>'
+
+    parts = ['<project xmlns="http://maven.apache.org/POM/4.0.0">']
+    if parent:
+        parent_group, parent_artifact, parent_version = parent.split(':')
+        parts.append(f'<parent><groupId>{parent_group}</groupId><artifactId>{parent_artifact}</artifactId>'
+                     f'<version>{parent_version}</version></parent>')
+    parts.append(f'<groupId>{group_id}</groupId><artifactId>{artifact_id}</artifactId><version>{version}</version>')
+    if properties:
+        parts.append('<properties>' + ''.join(f'<{name}>{value}</{name}>' for name, value in properties.items())
+                     + '</properties>')
+    if management:
+        parts.append('<dependencyManagement><dependencies>' + ''.join(map(dependency, management))
+                     + '</dependencies></dependencyManagement>')
+    parts.append('<dependencies>' + ''.join(map(dependency, dependencies)) + '</dependencies></project>')
+    return ''.join(parts)
+
+
+class CountingParser(MavenParser):
+    """MavenParser, считающий загрузки POM-файлов"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetches = {}
+
+    def fetch_pom(self, group_id, artifact_id, version):
+        key = f"{group_id}:{artifact_id}:{version}"
+        self.fetches[key] = self.fetches.get(key, 0) + 1
+        return super().fetch_pom(group_id, artifact_id, version)
+
+
+class EffectivePomTest(unittest.TestCase):
+    POMS = {
+        'org:parent:1': pom('org:parent:1', properties={'lib.version': '2.0', 'test.scope': 'test'},
+                            management=[('lib', 'core', '${lib.version}'), ('lib', 'junit', '4.13', '${test.scope}'),
+                                        ('org', 'bom', '1', 'import', 'pom')],
+                            dependencies=[('lib', 'inherited', '1.0')]),
+        'org:bom:1': pom('org:bom:1', management=[('lib', 'core', '9.9'), ('lib', 'from-bom', '3.0'),
+                                                  ('org', 'bom2', '1', 'import', 'pom')]),
+        'org:bom2:1': pom('org:bom2:1', management=[('lib', 'from-bom', '4.0'), ('lib', 'deep', '5.0')]),
+        'app:child:1.0': pom('app:child:1.0', parent='org:parent:1',
+                             dependencies=[('lib', 'core', None), ('lib', 'junit', None), ('lib', 'from-bom', None),
+                                           ('lib', 'deep', None), ('app', 'sibling', '${project.version}')]),
+        'app:override:1.0': pom('app:override:1.0', parent='org:parent:1', properties={'lib.version': '2.5'},
+                                dependencies=[('lib', 'core', None), ('lib', 'inherited', '1.1')]),
+        'app:broken:1.0': pom('app:broken:1.0', dependencies=[('lib', 'unversioned', None),
+                                                              ('lib', 'unknown', '${missing.version}'),
+                                                              ('lib', 'ok', '1.0')]),
+        'cyc:a:1': pom('cyc:a:1', parent='cyc:b:1'),
+        'cyc:b:1': pom('cyc:b:1', parent='cyc:a:1'),
+    }
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        write_repository({}, directory.name, self.POMS)
+        self.parser = CountingParser(directory.name, verbose=False)
+        self.resolver = self.parser.pom_resolver
+
+    def dependencies(self, package: str) -> dict:
+        group_id, artifact_id, version = package.split(':')
+        return {f"{dep['group_id']}:{dep['artifact_id']}": (dep['version'], dep['scope'])
+                for dep in self.resolver.effective_dependencies(group_id, artifact_id, version)}
+
+    def test_parent_management_and_boms(self):
+        self.assertEqual(self.dependencies('app:child:1.0'), {
+            'lib:inherited': ('1.0', 'compile'),
+            'lib:core': ('2.0', 'compile'),       # явная запись родителя важнее BOM
+            'lib:junit': ('4.13', 'test'),        # scope из dependencyManagement со свойством
+            'lib:from-bom': ('3.0', 'compile'),   # ранний импорт важнее вложенного BOM
+            'lib:deep': ('5.0', 'compile'),       # BOM, импортированный другим BOM
+            'app:sibling': ('1.0', 'compile'),    # ${project.version}
+        })
+        self.assertEqual(self.resolver.inherited('app', 'child', '1.0'),
+                         frozenset({'org:parent:1', 'org:bom:1', 'org:bom2:1'}))
+        self.assertEqual(self.resolver.dependents('org:bom2:1'), {'app:child:1.0'})
+
+    def test_child_overrides_property_and_dependency(self):
+        self.assertEqual(self.dependencies('app:override:1.0'), {
+            'lib:inherited': ('1.1', 'compile'),
+            'lib:core': ('2.5', 'compile'),
+        })
+
+    def test_parent_is_resolved_once(self):
+        self.dependencies('app:child:1.0')
+        self.dependencies('app:override:1.0')
+        self.assertEqual(self.parser.fetches['org:parent:1'], 1)
+        self.assertEqual(self.parser.fetches['org:bom:1'], 1)
+        self.assertGreaterEqual(self.resolver.hits, 1)
+
+        self.resolver.clear()
+        self.dependencies('app:child:1.0')
+        self.assertEqual(self.parser.fetches['org:parent:1'], 2)
+
+    def test_unresolved_versions_are_skipped(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(self.dependencies('app:broken:1.0'), {'lib:ok': ('1.0', 'compile')})
+        self.assertIn('lib:unversioned', output.getvalue())
+        self.assertIn('lib:unknown', output.getvalue())
+
+    def test_cycle_in_one_thread(self):
+        with self.assertRaises(PomInheritanceError):
+            self.resolver.resolve('cyc', 'a', '1')
+
+    def test_cycle_across_threads(self):
+        # Оба потока загружают свой POM одновременно, затем ждут модель друг друга
+        barrier = threading.Barrier(2, timeout=5)
+        fetch_pom = self.parser.fetch_pom
+
+        def synchronized_fetch(group_id, artifact_id, version):
+            content = fetch_pom(group_id, artifact_id, version)
+            if group_id == 'cyc':
+                barrier.wait()
+            return content
+
+        self.parser.fetch_pom = synchronized_fetch
+        outcomes = {}
+
+        def resolve(artifact_id):
+            try:
+                self.resolver.resolve('cyc', artifact_id, '1')
+                outcomes[artifact_id] = 'ok'
+            except PomInheritanceError:
+                outcomes[artifact_id] = 'cycle'
+            except threading.BrokenBarrierError:
+                outcomes[artifact_id] = 'barrier'
+
+        threads = [threading.Thread(target=resolve, args=(artifact_id,), daemon=True) for artifact_id in 'ab']
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        self.assertFalse(any(thread.is_alive() for thread in threads), "взаимная блокировка")
+        self.assertIn('cycle', outcomes.values())
+        self.assertNotIn('ok', outcomes.values())
+
+
+class InterpolateTest(unittest.TestCase):
+    def test_nested_and_unknown(self):
+        properties = {'a': '${b}.1', 'b': '2', 'self': '${self}'}
+        self.assertEqual(interpolate('${a}-${unknown}', properties), '2.1-${unknown}')
+        self.assertEqual(interpolate('${self}', properties), '${self}')
+        self.assertIsNone(interpolate(None, properties))
+
+    def test_overridden_follows_references(self):
+        overridden = EffectivePomResolver._overridden({'a': '1', 'b': '${a}', 'c': 'x'},
+                                                      {'a': '2', 'b': '${a}', 'c': 'x', 'd': 'new'})
+        self.assertEqual(overridden, {'a', 'b', 'd'})
+
+
+if __name__ == '__main__':
+    unittest.main()
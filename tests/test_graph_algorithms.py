@@ -0,0 +1,168 @@
+import random
+import unittest
+
+from compact_graph import CompactGraph
+from graph_algorithms import (TopologicalLayers, TransitiveClosure, elementary_cycles, is_cyclic_component,
+                              strongly_connected_components)
+
+
+def random_graph(rng: random.Random, node_count: int, edge_probability: float) -> dict:
+    """Случайный граф "n0".."nN" с петлями и циклами"""
+    nodes = [f"n{index}" for index in range(node_count)]
+    return {node: [target for target in nodes if rng.random() < edge_probability] for node in nodes}
+
+
+def brute_force_cycles(node_count: int, offsets, targets) -> set:
+    """
+    Все элементарные циклы полным перебором простых путей
+
+    Цикл записывается начиная с наименьшего id, как в elementary_cycles.
+    """
+    cycles = set()
+
+    def extend(start, path, visited):
+        node = path[-1]
+        for target in targets[offsets[node]:offsets[node + 1]]:
+            if target == start:
+                cycles.add(tuple(path))
+            elif target > start and target not in visited:
+                visited.add(target)
+                path.append(target)
+                extend(start, path, visited)
+                path.pop()
+                visited.discard(target)
+
+    for start in range(node_count):
+        extend(start, [start], {start})
+    return cycles
+
+
+def brute_force_reachable(node_count: int, offsets, targets, source: int) -> set:
+    reached = set()
+    stack = [source]
+    while stack:
+        node = stack.pop()
+        for target in targets[offsets[node]:offsets[node + 1]]:
+            if target not in reached:
+                reached.add(target)
+                stack.append(target)
+    return reached
+
+
+class StronglyConnectedComponentsTest(unittest.TestCase):
+    def test_against_reachability(self):
+        rng = random.Random(3)
+        for _ in range(30):
+            compact = CompactGraph.from_adjacency(random_graph(rng, rng.randint(1, 9), rng.uniform(0.05, 0.4)))
+            offsets, targets = compact.forward_offsets, compact.forward_targets
+            reachable = [brute_force_reachable(compact.node_count, offsets, targets, node)
+                         for node in range(compact.node_count)]
+            components = strongly_connected_components(compact.node_count, offsets, targets)
+
+            self.assertEqual(sorted(node for component in components for node in component),
+                             list(range(compact.node_count)))
+            for component in components:
+                for node in range(compact.node_count):
+                    mutual = node == component[0] or (node in reachable[component[0]]
+                                                      and component[0] in reachable[node])
+                    self.assertEqual(node in component, mutual)
+                self.assertEqual(is_cyclic_component(component, offsets, targets),
+                                 component[0] in reachable[component[0]])
+
+            # Обратный топологический порядок: зависимости компоненты идут раньше нее
+            position = {node: index for index, component in enumerate(components) for node in component}
+            for node in range(compact.node_count):
+                for target in targets[offsets[node]:offsets[node + 1]]:
+                    self.assertLessEqual(position[target], position[node])
+
+    def test_deep_chain(self):
+        graph = {f"n{index}": [f"n{index + 1}"] for index in range(50_000)}
+        graph["n50000"] = ["n0"]
+        compact = CompactGraph.from_adjacency(graph)
+        components = strongly_connected_components(compact.node_count, compact.forward_offsets,
+                                                   compact.forward_targets)
+        self.assertEqual(len(components), 1)
+
+
+class ElementaryCyclesTest(unittest.TestCase):
+    def test_against_brute_force(self):
+        rng = random.Random(5)
+        for _ in range(60):
+            compact = CompactGraph.from_adjacency(random_graph(rng, rng.randint(1, 7), rng.uniform(0.1, 0.6)))
+            offsets, targets = compact.forward_offsets, compact.forward_targets
+            found = []
+            for component in strongly_connected_components(compact.node_count, offsets, targets):
+                if is_cyclic_component(component, offsets, targets):
+                    found.extend(tuple(cycle) for cycle in elementary_cycles(component, offsets, targets))
+
+            self.assertEqual(len(found), len(set(found)), "цикл выдан повторно")
+            self.assertEqual(set(found), brute_force_cycles(compact.node_count, offsets, targets))
+
+    def test_limit(self):
+        graph = {f"n{index}": [f"n{target}" for target in range(5)] for index in range(5)}
+        compact = CompactGraph.from_adjacency(graph)
+        component = list(range(compact.node_count))
+        cycles = elementary_cycles(component, compact.forward_offsets, compact.forward_targets, limit=7)
+        self.assertEqual(len(cycles), 7)
+
+
+class TransitiveClosureTest(unittest.TestCase):
+    def test_against_reachability(self):
+        rng = random.Random(7)
+        for _ in range(30):
+            compact = CompactGraph.from_adjacency(random_graph(rng, rng.randint(1, 9), rng.uniform(0.05, 0.4)))
+            offsets, targets = compact.forward_offsets, compact.forward_targets
+            closure = TransitiveClosure(compact.node_count, offsets, targets)
+            for node in range(compact.node_count):
+                reachable = brute_force_reachable(compact.node_count, offsets, targets, node)
+                self.assertEqual(closure.reachable_ids(node), sorted(reachable))
+                self.assertEqual(closure.count(node), len(reachable))
+
+    def test_dag(self):
+        compact = CompactGraph.from_adjacency({'a': ['b', 'c'], 'b': ['d'], 'c': ['d'], 'd': []})
+        node = compact.nodes.id
+        closure = TransitiveClosure(compact.node_count, compact.forward_offsets, compact.forward_targets)
+        self.assertEqual(closure.reachable_ids(node('a')), sorted([node('b'), node('c'), node('d')]))
+        self.assertTrue(closure.depends_on(node('b'), node('d')))
+        self.assertFalse(closure.depends_on(node('d'), node('a')))
+        self.assertFalse(closure.depends_on(node('a'), node('a')), "узел вне цикла не зависит от себя")
+
+
+class TopologicalLayersTest(unittest.TestCase):
+    def test_dag(self):
+        compact = CompactGraph.from_adjacency({'a': ['b', 'c'], 'b': ['d'], 'c': ['d'], 'd': []})
+        node = compact.nodes.id
+        layers = TopologicalLayers(compact.node_count, compact.forward_offsets, compact.forward_targets)
+        self.assertEqual(layers.critical_path_length, 3)
+        self.assertEqual(layers.widths(), [1, 2, 1])
+        path = [layers.components[component_id] for component_id in layers.critical_path()]
+        self.assertEqual(path[0], [node('a')])
+        self.assertEqual(path[-1], [node('d')])
+
+    def test_against_longest_chains(self):
+        rng = random.Random(11)
+        for _ in range(30):
+            compact = CompactGraph.from_adjacency(random_graph(rng, rng.randint(1, 10), rng.uniform(0.05, 0.35)))
+            offsets, targets = compact.forward_offsets, compact.forward_targets
+            layers = TopologicalLayers(compact.node_count, offsets, targets)
+            self.assertEqual(sorted(node for component in layers.components for node in component),
+                             list(range(compact.node_count)))
+            self.assertEqual(sum(layers.widths()), compact.node_count)
+
+            # Зависимость всегда в более раннем слое, а у единицы слоя k есть зависимость в слое k - 1
+            for component_id, component in enumerate(layers.components):
+                layer = layers.layer_of[component_id]
+                dependency_layers = {layers.layer_of[layers.component_of[target]]
+                                     for node in component for target in targets[offsets[node]:offsets[node + 1]]
+                                     if layers.component_of[target] != component_id}
+                self.assertTrue(all(dependency_layer < layer for dependency_layer in dependency_layers))
+                self.assertEqual(layer, max(dependency_layers) + 1 if dependency_layers else 0)
+
+            path = layers.critical_path()
+            self.assertEqual(len(path), layers.critical_path_length)
+            self.assertEqual([layers.layer_of[component_id] for component_id in path],
+                             list(range(len(path) - 1, -1, -1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
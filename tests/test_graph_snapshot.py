@@ -0,0 +1,135 @@
+import io
+import os
+import struct
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+
+from compact_graph import CompactGraph
+from dependency_graph import DependencyGraph
+from graph_snapshot import (BYTE_ORDER_MARK, HEADER, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, SnapshotError, load_snapshot,
+                            save_snapshot)
+import test_repository
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GRAPH = {
+    'app:root:1.0': ['lib:core:2.0', 'lib:util:1.1', 'пакет:кириллица:1.0'],
+    'lib:core:2.0': ['lib:util:1.1', 'lib:log:3.0'],
+    'lib:util:1.1': ['lib:core:2.0'],
+    'lib:log:3.0': [],
+    'пакет:кириллица:1.0': ['lib:log:3.0'],
+}
+
+
+class SnapshotFormatTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'graph.snapshot')
+
+    def open(self):
+        snapshot = load_snapshot(self.path)
+        self.addCleanup(snapshot.close)
+        return snapshot
+
+    def test_round_trip(self):
+        compact = CompactGraph.from_adjacency(GRAPH)
+        save_snapshot(compact, self.path, {'roots': ['app:root:1.0'], 'max_depth': 3})
+        snapshot = self.open()
+
+        self.assertEqual(snapshot.metadata, {'roots': ['app:root:1.0'], 'max_depth': 3})
+        loaded = snapshot.compact
+        self.assertEqual(loaded.node_count, compact.node_count)
+        self.assertEqual(loaded.edge_count, compact.edge_count)
+        self.assertEqual(loaded.expanded_count, compact.expanded_count)
+        self.assertEqual({package: list(deps) for package, deps in loaded.as_mapping().items()},
+                         {package: list(deps) for package, deps in compact.as_mapping().items()})
+        self.assertEqual(loaded.as_mapping()['пакет:кириллица:1.0'], ['lib:log:3.0'])
+        self.assertEqual(sorted(loaded.as_reverse_mapping()['lib:core:2.0']), ['app:root:1.0', 'lib:util:1.1'])
+        self.assertIsNone(loaded.nodes.id('lib:missing:1.0'))
+        for name in GRAPH:
+            self.assertEqual(loaded.nodes.name(loaded.nodes.id(name)), name)
+
+    def test_header(self):
+        compact = CompactGraph.from_adjacency(GRAPH)
+        save_snapshot(compact, self.path)
+        with open(self.path, 'rb') as f:
+            header = HEADER.unpack(f.read(HEADER.size))
+        self.assertEqual(header[:3], (SNAPSHOT_MAGIC, SNAPSHOT_VERSION, BYTE_ORDER_MARK))
+        self.assertEqual(header[3:6], (compact.node_count, compact.expanded_count, compact.edge_count))
+        self.assertEqual(self.open().metadata, {})
+
+    def test_empty_graph(self):
+        save_snapshot(CompactGraph.from_adjacency({}), self.path)
+        self.assertEqual(self.open().compact.node_count, 0)
+
+    def test_invalid_files(self):
+        save_snapshot(CompactGraph.from_adjacency(GRAPH), self.path)
+        with open(self.path, 'rb') as f:
+            content = f.read()
+
+        def patched(offset: int, data: bytes) -> bytes:
+            return content[:offset] + data + content[offset + len(data):]
+
+        cases = {
+            'magic': patched(0, b'NOTGRAPH'),
+            'version': patched(8, struct.pack('=I', SNAPSHOT_VERSION + 1)),
+            'byte order': patched(12, struct.pack('=I', 0x04030201)),
+            'truncated': content[:len(content) // 2],
+            'short': content[:HEADER.size - 1],
+            'empty': b'',
+        }
+        for name, damaged in cases.items():
+            with self.subTest(name=name):
+                with open(self.path, 'wb') as f:
+                    f.write(damaged)
+                with self.assertRaises(SnapshotError):
+                    load_snapshot(self.path).close()
+
+    def test_string_table_limit(self):
+        class Encoded:
+            def __len__(self):
+                return 0x80000000
+
+        class HugeName:
+            """Имя, закодированная длина которого - 2 ГБ: два таких не помещаются в смещения uint32"""
+
+            def encode(self, encoding):
+                return Encoded()
+
+        compact = SimpleNamespace(nodes=SimpleNamespace(names=[HugeName(), HugeName()]))
+        with self.assertRaises(SnapshotError):
+            save_snapshot(compact, self.path)
+        self.assertFalse(os.path.exists(self.path))
+
+
+class DependencyGraphSnapshotTest(unittest.TestCase):
+    def test_queries_after_load(self):
+        repository = test_repository.TestRepository(os.path.join(REPOSITORY_DIR, 'test_repo_complex.txt'))
+        source = DependencyGraph(test_repository=repository, verbose=False)
+        with redirect_stdout(io.StringIO()):
+            repository.load_test_repository()
+            source.build_dependency_graph_bfs('A', max_depth=5)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.snapshot')
+            loaded = DependencyGraph(verbose=False)
+            with redirect_stdout(io.StringIO()):
+                source.save_snapshot(path)
+                metadata = loaded.load_snapshot(path)
+            try:
+                self.assertEqual(metadata['roots'], ['A'])
+                self.assertEqual(metadata['max_depth'], 5)
+                for package in source.graph:
+                    self.assertEqual(list(loaded.graph[package]), list(source.graph[package]))
+                    self.assertEqual(loaded.get_reverse_dependencies(package),
+                                     source.get_reverse_dependencies(package))
+                    self.assertEqual(loaded.explain_dependency(package, 3), source.explain_dependency(package, 3))
+            finally:
+                loaded.snapshot.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import gzip
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from http_transport import HttpTransport, TransportError
+
+
+class ScriptedServer:
+    """
+    HTTP-сервер с заранее заданными ответами
+
+    Для каждого пути - список ответов (статус, тело, заголовки), которые
+    выдаются по очереди; последний повторяется. Запросы записываются.
+    """
+
+    def __init__(self, script):
+        self.script = {path: list(responses) for path, responses in script.items()}
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                responses = server.script.get(self.path, [(404, b'', {})])
+                status, body, headers = responses.pop(0) if len(responses) > 1 else responses[0]
+                if callable(body):
+                    status, body, headers = body(self.headers)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        host, port = self._server.server_address[:2]
+        self.url = f"http://{host}:{port}"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class HttpTransportTest(unittest.TestCase):
+    def serve(self, script) -> ScriptedServer:
+        server = ScriptedServer(script)
+        self.addCleanup(server.close)
+        return server
+
+    def transport(self, **options) -> HttpTransport:
+        transport = HttpTransport(timeout=5, **options)
+        self.addCleanup(transport.close)
+        return transport
+
+    def test_retries_transient_statuses(self):
+        server = self.serve({'/pom': [(503, b'busy', {}), (429, b'', {}), (200, b'<project/>', {})]})
+        transport = self.transport(max_retries=3)
+        with mock.patch('http_transport.time.sleep') as sleep:
+            response = transport.get(server.url + '/pom')
+        self.assertEqual((response.status, response.body), (200, b'<project/>'))
+        self.assertEqual(sleep.call_count, 2)
+        stats = transport.stats()['127.0.0.1']
+        self.assertEqual((stats['requests'], stats['retries']), (3, 2))
+        self.assertEqual(stats['connections'], 1, "соединение переиспользуется между попытками")
+
+    def test_gives_up_after_max_retries(self):
+        server = self.serve({'/pom': [(503, b'', {})]})
+        transport = self.transport(max_retries=2)
+        with mock.patch('http_transport.time.sleep'):
+            with self.assertRaises(TransportError):
+                transport.get(server.url + '/pom')
+        self.assertEqual(len(server.requests), 3)
+
+    def test_client_errors_are_not_retried(self):
+        server = self.serve({'/pom': [(404, b'', {})]})
+        with mock.patch('http_transport.time.sleep') as sleep:
+            self.assertEqual(self.transport().get(server.url + '/pom').status, 404)
+        sleep.assert_not_called()
+        self.assertEqual(len(server.requests), 1)
+
+    def test_connection_errors_are_retried(self):
+        transport = self.transport(max_retries=1)
+        with mock.patch('http_transport.time.sleep'):
+            with self.assertRaises(TransportError):
+                # Порт 1 на localhost закрыт: каждая попытка - ошибка соединения
+                transport.get('http://127.0.0.1:1/pom')
+        stats = transport.stats()['127.0.0.1']
+        self.assertEqual((stats['errors'], stats['retries']), (2, 1))
+
+    def test_backoff_is_capped_exponential(self):
+        transport = self.transport(backoff_base=0.5, backoff_max=3.0)
+        with mock.patch('http_transport.random.uniform', side_effect=lambda low, high: high):
+            self.assertEqual([transport._backoff_delay(attempt) for attempt in range(1, 6)],
+                             [0.5, 1.0, 2.0, 3.0, 3.0])
+        for attempt in range(1, 6):
+            self.assertLessEqual(transport._backoff_delay(attempt), 3.0)
+
+    def test_gzip(self):
+        body = b'<project>' + b'x' * 1000 + b'</project>'
+        compressed = gzip.compress(body)
+        server = self.serve({'/pom': [(200, compressed, {'Content-Encoding': 'gzip'})]})
+        response = self.transport().get(server.url + '/pom')
+        self.assertEqual(response.body, body)
+        self.assertEqual(response.wire_bytes, len(compressed))
+        self.assertEqual(server.requests[0][1]['Accept-Encoding'], 'gzip')
+
+    def test_conditional_request(self):
+        def respond(headers):
+            if headers.get('If-None-Match') == '"v1"':
+                return 304, b'', {'ETag': '"v1"'}
+            return 200, b'<project/>', {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+
+        server = self.serve({'/pom': [(200, respond, {})]})
+        transport = self.transport()
+        first = transport.get(server.url + '/pom')
+        self.assertEqual((first.status, first.etag), (200, '"v1"'))
+        self.assertEqual(first.last_modified, 'Mon, 01 Jan 2024 00:00:00 GMT')
+
+        second = transport.get(server.url + '/pom', etag=first.etag, last_modified=first.last_modified)
+        self.assertEqual((second.status, second.body), (304, b''))
+        self.assertEqual(second.url, server.url + '/pom')
+        self.assertEqual(server.requests[1][1]['If-Modified-Since'], first.last_modified)
+        self.assertEqual(transport.stats()['127.0.0.1']['not_modified'], 1)
+
+    def test_unsupported_scheme(self):
+        with self.assertRaises(TransportError):
+            self.transport().get('ftp://example.org/pom')
+
+
+if __name__ == '__main__':
+    unittest.main()
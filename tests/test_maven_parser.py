@@ -0,0 +1,150 @@
+import unittest
+
+from maven_parser import MavenError, MavenPackageError, MavenParser
+
+POM = """<?xml version="1.0" encoding="UTF-8"?>
+<project {xmlns}>
+  <modelVersion>4.0.0</modelVersion>
+  <parent>
+    <groupId>org.example</groupId>
+    <artifactId>parent</artifactId>
+    <version>3</version>
+  </parent>
+  <artifactId>app</artifactId>
+  <version>1.0</version>
+  <packaging>war</packaging>
+  <properties>
+    <lib.version>2.5</lib.version>
+  </properties>
+  <dependencyManagement>
+    <dependencies>
+      <dependency>
+        <groupId>org.managed</groupId>
+        <artifactId>bom</artifactId>
+        <version>4.0</version>
+        <type>pom</type>
+        <scope>import</scope>
+      </dependency>
+    </dependencies>
+  </dependencyManagement>
+  <dependencies>
+    <dependency>
+      <groupId>org.lib</groupId>
+      <artifactId>core</artifactId>
+      <version>${{lib.version}}</version>
+      <exclusions>
+        <exclusion>
+          <groupId>org.unwanted</groupId>
+          <artifactId>logging</artifactId>
+        </exclusion>
+      </exclusions>
+    </dependency>
+    <dependency>
+      <groupId>org.lib</groupId>
+      <artifactId>testing</artifactId>
+      <scope>test</scope>
+      <optional>true</optional>
+    </dependency>
+    <dependency>
+      <artifactId>no-group</artifactId>
+    </dependency>
+  </dependencies>
+  <build>
+    <plugins>
+      <plugin>
+        <groupId>org.apache.maven.plugins</groupId>
+        <artifactId>maven-compiler-plugin</artifactId>
+        <dependencies>
+          <dependency>
+            <groupId>org.plugin</groupId>
+            <artifactId>plugin-only</artifactId>
+            <version>1.0</version>
+          </dependency>
+        </dependencies>
+      </plugin>
+    </plugins>
+  </build>
+  <profiles>
+    <profile>
+      <dependencies>
+        <dependency>
+          <groupId>org.profile</groupId>
+          <artifactId>profile-only</artifactId>
+          <version>1.0</version>
+        </dependency>
+      </dependencies>
+    </profile>
+  </profiles>
+</project>
+"""
+
+
+class ParsePomTest(unittest.TestCase):
+    def setUp(self):
+        self.parser = MavenParser(verbose=False)
+
+    def check_model(self, model):
+        self.assertEqual((model['group_id'], model['artifact_id'], model['version']), (None, 'app', '1.0'))
+        self.assertEqual(model['packaging'], 'war')
+        self.assertEqual(model['parent'], {'group_id': 'org.example', 'artifact_id': 'parent', 'version': '3'})
+        self.assertEqual(model['properties'], {'lib.version': '2.5'})
+
+        self.assertEqual([(dep['group_id'], dep['artifact_id']) for dep in model['dependencies']],
+                         [('org.lib', 'core'), ('org.lib', 'testing')])
+        core, testing = model['dependencies']
+        self.assertEqual(core['version'], '${lib.version}', "свойства подставляются при построении модели")
+        self.assertEqual(core['exclusions'], ['org.unwanted:logging'])
+        self.assertEqual((core['scope'], core['optional'], core['type']), (None, None, 'jar'))
+        self.assertEqual((testing['version'], testing['scope'], testing['optional']), (None, 'test', 'true'))
+
+        self.assertEqual(len(model['dependency_management']), 1)
+        managed = model['dependency_management'][0]
+        self.assertEqual((managed['artifact_id'], managed['type'], managed['scope']), ('bom', 'pom', 'import'))
+
+    def test_namespaced(self):
+        self.check_model(self.parser.parse_pom(POM.format(xmlns='xmlns="http://maven.apache.org/POM/4.0.0"')))
+
+    def test_without_namespace(self):
+        self.check_model(self.parser.parse_pom(POM.format(xmlns='')))
+
+    def test_small_chunks(self):
+        parser = MavenParser(verbose=False)
+        parser.PARSE_CHUNK_SIZE = 7
+        self.check_model(parser.parse_pom(POM.format(xmlns='xmlns="http://maven.apache.org/POM/4.0.0"')))
+
+    def test_minimal(self):
+        model = self.parser.parse_pom('<project><groupId>g</groupId><artifactId>a</artifactId></project>')
+        self.assertEqual((model['group_id'], model['version'], model['packaging']), ('g', None, 'jar'))
+        self.assertIsNone(model['parent'])
+        self.assertEqual((model['dependencies'], model['dependency_management']), ([], []))
+
+    def test_incomplete_parent_is_ignored(self):
+        model = self.parser.parse_pom('<project><parent><groupId>g</groupId><artifactId>p</artifactId>'
+                                      '</parent><artifactId>a</artifactId></project>')
+        self.assertIsNone(model['parent'])
+
+    def test_malformed(self):
+        for content in ('<project><dependencies></project>', 'not xml', '<project>'):
+            with self.subTest(content=content):
+                with self.assertRaises(MavenError):
+                    self.parser.parse_pom(content)
+
+
+class MavenIdentifierTest(unittest.TestCase):
+    def test_parse_identifier(self):
+        parser = MavenParser(verbose=False)
+        self.assertEqual(parser.parse_maven_identifier('org.example:lib:1.0'),
+                         {'group_id': 'org.example', 'artifact_id': 'lib', 'version': '1.0'})
+        for package in ('org.example:lib', 'a:b:c:d'):
+            with self.subTest(package=package):
+                with self.assertRaises(MavenPackageError):
+                    parser.parse_maven_identifier(package)
+
+    def test_pom_url(self):
+        parser = MavenParser('http://repo.test/maven2', verbose=False)
+        self.assertEqual(parser.build_pom_url('org.example', 'lib', '1.0'),
+                         'http://repo.test/maven2/org/example/lib/1.0/lib-1.0.pom')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,248 @@
+import io
+import tempfile
+import time
+import unittest
+import xml.etree.ElementTree as ET
+from contextlib import redirect_stdout
+from unittest import mock
+
+from dependency_graph import DependencyGraph
+from maven_parser import MavenParser
+from maven_version import (MavenVersion, VersionIndex, VersionRange, VersionResolutionError, merge_metadata,
+                           needs_resolution, parse_metadata)
+from mock_maven_server import MockMavenRepository, metadata_documents, pom_path, render_pom
+from pom_cache import PomCache
+from query_server import QueryService
+
+
+def metadata(versions, latest=None, release=None, last_updated=None) -> str:
+    """maven-metadata.xml с указанными версиями"""
+    parts = ['<metadata><groupId>org.example</groupId><artifactId>lib</artifactId><versioning>']
+    if latest:
+        parts.append(f'<latest>{latest}</latest>')
+    if release:
+        parts.append(f'<release>{release}</release>')
+    parts.append('<versions>' + ''.join(f'<version>{version}</version>' for version in versions) + '</versions>')
+    if last_updated:
+        parts.append(f'<lastUpdated>{last_updated}</lastUpdated>')
+    parts.append('</versioning></metadata>')
+    return ''.join(parts)
+
+
+class MavenVersionTest(unittest.TestCase):
+    def test_equal_forms(self):
+        for left, right in (('1.0', '1'), ('1', '1.0.0-final'), ('1.0-ga', '1.0.0'), ('1.0-alpha1', '1-alpha-1'),
+                            ('2.0-RC1', '2.0-cr1'), ('1.0-a1', '1.0-alpha-1')):
+            with self.subTest(left=left, right=right):
+                self.assertEqual(MavenVersion(left), MavenVersion(right))
+                self.assertEqual(hash(MavenVersion(left)), hash(MavenVersion(right)))
+
+    def test_qualifier_order(self):
+        ordered = ['1.0-alpha1', '1.0-beta1', '1.0-milestone1', '1.0-rc1', '1.0-SNAPSHOT', '1.0', '1.0-sp1']
+        versions = [MavenVersion(text) for text in ordered]
+        for lower, higher in zip(versions, versions[1:]):
+            with self.subTest(lower=lower, higher=higher):
+                self.assertLess(lower, higher)
+                self.assertGreater(higher, lower)
+
+    def test_numeric_order(self):
+        texts = ['1.10', '1.2', '1.9.1', '1.0.0', '1.2.0.1', '10', '2']
+        ordered = sorted(texts, key=MavenVersion)
+        self.assertEqual(ordered, ['1.0.0', '1.2', '1.2.0.1', '1.9.1', '1.10', '2', '10'])
+
+    def test_unknown_qualifier_after_known(self):
+        self.assertLess(MavenVersion('1.0-sp1'), MavenVersion('1.0-foo'))
+        self.assertLess(MavenVersion('1.0-bar'), MavenVersion('1.0-foo'))
+
+    def test_snapshot(self):
+        self.assertTrue(MavenVersion('1.0-SNAPSHOT').is_snapshot)
+        self.assertFalse(MavenVersion('1.0').is_snapshot)
+
+
+class VersionRangeTest(unittest.TestCase):
+    def contains(self, spec: str, version: str) -> bool:
+        return VersionRange(spec).contains(MavenVersion(version))
+
+    def test_bounds(self):
+        self.assertTrue(self.contains('[1.2,2.0)', '1.2'))
+        self.assertTrue(self.contains('[1.2,2.0)', '1.9.9'))
+        self.assertFalse(self.contains('[1.2,2.0)', '2.0'))
+        self.assertFalse(self.contains('[1.2,2.0)', '1.1'))
+        self.assertTrue(self.contains('(,1.0]', '0.5'))
+        self.assertTrue(self.contains('(,1.0]', '1.0'))
+        self.assertFalse(self.contains('(1.0,)', '1.0'))
+        self.assertTrue(self.contains('[1.5,)', '100'))
+
+    def test_exact(self):
+        self.assertTrue(self.contains('[1.0]', '1'))
+        self.assertFalse(self.contains('[1.0]', '1.0.1'))
+
+    def test_union(self):
+        self.assertTrue(self.contains('[1,2),[3,4)', '3.5'))
+        self.assertFalse(self.contains('[1,2),[3,4)', '2.5'))
+        self.assertEqual(len(VersionRange('[1,2), [3,4)').restrictions), 2)
+
+    def test_invalid(self):
+        for spec in ('1.0', '[1.0', '(1.0)', '[]', '[1,2),x'):
+            with self.subTest(spec=spec):
+                with self.assertRaises(VersionResolutionError):
+                    VersionRange(spec)
+
+    def test_needs_resolution(self):
+        self.assertTrue(needs_resolution('[1,2)'))
+        self.assertTrue(needs_resolution('LATEST'))
+        self.assertTrue(needs_resolution('RELEASE'))
+        self.assertFalse(needs_resolution('1.0'))
+        self.assertFalse(needs_resolution(None))
+
+
+class VersionIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = VersionIndex(parse_metadata(metadata(
+            ['1.0', '1.10', '1.2', '2.0-SNAPSHOT', '2.0-rc1'], latest='2.0-SNAPSHOT', release='1.10'
+        )))
+
+    def test_versions_sorted(self):
+        self.assertEqual([version.text for version in self.index.versions],
+                         ['1.0', '1.2', '1.10', '2.0-rc1', '2.0-SNAPSHOT'])
+
+    def test_select_range(self):
+        self.assertEqual(self.index.select('[1.0,1.5)'), '1.2')
+        self.assertEqual(self.index.select('[1.0,2.0)'), '2.0-SNAPSHOT')
+        self.assertEqual(self.index.select('[1.0]'), '1.0')
+        self.assertIsNone(self.index.select('[3.0,)'))
+
+    def test_select_meta(self):
+        self.assertEqual(self.index.select('LATEST'), '2.0-SNAPSHOT')
+        self.assertEqual(self.index.select('RELEASE'), '1.10')
+
+    def test_meta_without_elements(self):
+        index = VersionIndex(parse_metadata(metadata(['1.0', '1.1', '1.2-SNAPSHOT'])))
+        self.assertEqual(index.select('LATEST'), '1.2-SNAPSHOT')
+        self.assertEqual(index.select('RELEASE'), '1.1')
+
+    def test_invalid_metadata(self):
+        with self.assertRaises(VersionResolutionError):
+            parse_metadata('<metadata><versioning>')
+
+
+class MergeMetadataTest(unittest.TestCase):
+    def test_union(self):
+        merged = parse_metadata(merge_metadata([
+            metadata(['1.0', '1.1'], latest='1.1', release='1.1', last_updated='20240101000000'),
+            metadata(['1.1', '1.2'], latest='1.2', release='1.2', last_updated='20230101000000'),
+        ]))
+        self.assertEqual(merged['versions'], ['1.0', '1.1', '1.2'])
+        self.assertEqual(merged['latest'], '1.2')
+        self.assertEqual(merged['release'], '1.2')
+
+    def test_last_updated(self):
+        merged = ET.fromstring(merge_metadata([
+            metadata(['1.0'], last_updated='20240101000000'),
+            metadata(['1.0'], last_updated='20230101000000'),
+        ]))
+        self.assertEqual(merged.findtext('versioning/lastUpdated'), '20240101000000')
+        self.assertEqual(merged.findtext('groupId'), 'org.example')
+
+
+
+class RangeResolutionTest(unittest.TestCase):
+    ARTIFACTS = {
+        'app:root:1.0': ['lib:x:[1.0,2.0)', 'lib:y:1.0'],
+        'app:meta:1.0': ['lib:x:LATEST'],
+        'lib:x:1.0': [],
+        'lib:x:1.5': [],
+        'lib:y:1.0': ['lib:x:1.0'],
+    }
+    TTL = 60.0
+
+    def setUp(self):
+        self.repository = self.enterContext(MockMavenRepository(self.ARTIFACTS))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = PomCache(directory.name)
+        self.addCleanup(self.cache.close)
+        self.parser = MavenParser(self.repository.url, cache=self.cache, metadata_ttl=self.TTL, verbose=False)
+        self.addCleanup(self.parser.transport.close)
+        self.now = time.time()
+
+    def publish(self, package: str) -> None:
+        """Новая версия артефакта появляется в репозитории"""
+        self.repository.documents[pom_path(package)] = render_pom(package, [])
+        self.repository.documents.update(metadata_documents(list(self.ARTIFACTS) + [package]))
+
+    def versions(self, package: str) -> list:
+        with mock.patch('time.time', return_value=self.now):
+            return [dep['version'] for dep in self.parser.get_direct_dependencies(package)]
+
+    def test_ranged_lists_expire_with_metadata(self):
+        self.assertEqual(self.versions('app:root:1.0'), ['1.5', '1.0'])
+        self.assertEqual(self.versions('app:meta:1.0'), ['1.5'])
+        self.assertTrue(self.parser.has_ranged_dependencies('app:root:1.0'))
+        self.assertFalse(self.parser.has_ranged_dependencies('lib:y:1.0'))
+        self.versions('lib:y:1.0')
+
+        # На диск попадают только списки без выбора версий по метаданным
+        self.assertIsNone(self.cache.get_dependencies('app:root:1.0', MavenParser.DEPENDENCIES_FORMAT))
+        self.assertIsNone(self.cache.get_dependencies('app:meta:1.0', MavenParser.DEPENDENCIES_FORMAT))
+        self.assertIsNotNone(self.cache.get_dependencies('lib:y:1.0', MavenParser.DEPENDENCIES_FORMAT))
+
+        self.publish('lib:x:1.9')
+        self.now += self.TTL / 2
+        self.assertEqual(self.versions('app:root:1.0'), ['1.5', '1.0'], "в пределах metadata_ttl выбор сохраняется")
+
+        self.now += self.TTL
+        self.assertEqual(self.versions('app:root:1.0'), ['1.9', '1.0'])
+        self.assertEqual(self.versions('app:meta:1.0'), ['1.9'])
+
+    def test_ranged_parent_and_bom(self):
+        def project(package: str, inside: str) -> str:
+            group_id, artifact_id, version = package.split(':')
+            return (f'<project><groupId>{group_id}</groupId><artifactId>{artifact_id}</artifactId>'
+                    f'<version>{version}</version>{inside}</project>')
+
+        bom_import = ('<dependencyManagement><dependencies><dependency><groupId>org</groupId>'
+                      '<artifactId>bom</artifactId><version>{}</version><type>pom</type><scope>import</scope>'
+                      '</dependency></dependencies></dependencyManagement>'
+                      '<dependencies><dependency><groupId>lib</groupId><artifactId>y</artifactId></dependency>'
+                      '</dependencies>')
+        poms = {
+            'org:parent:1.0': project('org:parent:1.0', bom_import.format('1.0')),
+            'org:bom:1.0': project('org:bom:1.0', '<dependencyManagement><dependencies><dependency>'
+                                                  '<groupId>lib</groupId><artifactId>y</artifactId>'
+                                                  '<version>1.0</version></dependency></dependencies>'
+                                                  '</dependencyManagement>'),
+            'app:by-parent:1.0': project('app:by-parent:1.0', '<parent><groupId>org</groupId>'
+                                                              '<artifactId>parent</artifactId>'
+                                                              '<version>[1.0,)</version></parent>'),
+            'app:by-bom:1.0': project('app:by-bom:1.0', bom_import.format('RELEASE')),
+            'app:plain:1.0': project('app:plain:1.0', bom_import.format('1.0')),
+        }
+        with MockMavenRepository({}, poms=poms) as repository:
+            parser = MavenParser(repository.url, verbose=False)
+            self.addCleanup(parser.transport.close)
+            for package, ranged in (('app:by-parent:1.0', True), ('app:by-bom:1.0', True),
+                                    ('app:plain:1.0', False), ('org:parent:1.0', False)):
+                with self.subTest(package=package):
+                    self.assertEqual([dep['version'] for dep in parser.get_direct_dependencies(package)], ['1.0'])
+                    self.assertEqual(parser.has_ranged_dependencies(package), ranged)
+
+    def test_resident_graph_reselects_after_ttl(self):
+        def rebuild():
+            with mock.patch('time.time', return_value=self.now), redirect_stdout(io.StringIO()):
+                service.rebuild(wait=True)
+            return set(service.resident().graph.graph)
+
+        service = QueryService(lambda: DependencyGraph(maven_parser=self.parser, verbose=False),
+                               ['app:root:1.0'], max_depth=3)
+        self.assertIn('lib:x:1.5', rebuild())
+
+        self.publish('lib:x:1.9')
+        self.now += self.TTL + 1
+        packages = rebuild()
+        self.assertIn('lib:x:1.9', packages)
+        self.assertNotIn('lib:x:1.5', packages)
+
+
+if __name__ == '__main__':
+    unittest.main()
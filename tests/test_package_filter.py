@@ -0,0 +1,76 @@
+import unittest
+
+from package_filter import GroupPrefixTrie, PackageFilter, PackageFilterError, parse_rules
+
+
+class GroupPrefixTrieTest(unittest.TestCase):
+    def test_segments(self):
+        trie = GroupPrefixTrie(['org.apache', 'com.ourco.'])
+        self.assertTrue(trie.matches('org.apache'))
+        self.assertTrue(trie.matches('org.apache.commons'))
+        self.assertFalse(trie.matches('org.apachex'))
+        self.assertFalse(trie.matches('org'))
+        self.assertTrue(trie.matches('com.ourco.core'))
+        self.assertEqual(trie.size, 2)
+
+
+class PackageFilterTest(unittest.TestCase):
+    def test_rule_kinds(self):
+        package_filter = PackageFilter(exclude=['group:org.apache', 'glob:*:*:*-SNAPSHOT', r're:^com\.ourco\.',
+                                                'contains:test'])
+        self.assertFalse(package_filter.accepts('org.apache.commons:commons-lang3:3.12'))
+        self.assertFalse(package_filter.accepts('io.app:core:1.0-SNAPSHOT'))
+        self.assertFalse(package_filter.accepts('com.ourco.lib:api:1.0'))
+        self.assertFalse(package_filter.accepts('io.app:testkit:1.0'))
+        self.assertTrue(package_filter.accepts('io.app:core:1.0'))
+        self.assertTrue(package_filter.accepts('org.apachex:lib:1.0'))
+        self.assertTrue(package_filter.accepts('net.com.ourco:lib:1.0'))
+
+    def test_rules_without_prefix(self):
+        package_filter = PackageFilter(exclude=['*:junit:*', 'mock'])
+        self.assertFalse(package_filter.accepts('org.junit:junit:4.13'))
+        self.assertFalse(package_filter.accepts('org.mockito:mockito-core:5.0'))
+        # glob сопоставляется с идентификатором целиком
+        self.assertTrue(package_filter.accepts('org.junit:junit-bom:5.0'))
+
+    def test_include_and_exclude(self):
+        package_filter = PackageFilter(include=['group:com.ourco'], exclude=['contains:internal'])
+        self.assertTrue(package_filter.accepts('com.ourco:api:1.0'))
+        self.assertFalse(package_filter.accepts('com.ourco:internal-api:1.0'))
+        self.assertFalse(package_filter.accepts('org.other:api:1.0'))
+
+    def test_regex_flags_are_local(self):
+        package_filter = PackageFilter(exclude=['re:(?i)FOO', 'contains:Bar'])
+        self.assertFalse(package_filter.accepts('org.foo:lib:1.0'))
+        self.assertFalse(package_filter.accepts('org.x:Bar:1.0'))
+        # (?i) одного правила не распространяется на подстроки
+        self.assertTrue(package_filter.accepts('org.x:bar:1.0'))
+
+    def test_regex_backreferences(self):
+        package_filter = PackageFilter(exclude=['glob:x:*:*', r're:^([a-z]+)\.\1:'])
+        self.assertFalse(package_filter.accepts('dup.dup:lib:1.0'))
+        self.assertTrue(package_filter.accepts('dup.other:lib:1.0'))
+        self.assertFalse(package_filter.accepts('x:lib:1.0'))
+
+    def test_invalid_rules(self):
+        for rule in ('re:(unclosed', 're:', 'glob:'):
+            with self.subTest(rule=rule):
+                with self.assertRaises(PackageFilterError):
+                    PackageFilter(exclude=[rule])
+
+    def test_from_config(self):
+        self.assertIsNone(PackageFilter.from_config('', ' ; '))
+        package_filter = PackageFilter.from_config('', 'group:org.apache; contains:test')
+        self.assertEqual(package_filter.exclude.rules, ('group:org.apache', 'contains:test'))
+        self.assertEqual(parse_rules(' a ;; b '), ['a', 'b'])
+
+    def test_combine(self):
+        self.assertIsNone(PackageFilter.combine(None, ''))
+        combined = PackageFilter.combine(PackageFilter(include=['group:org']), 'test')
+        self.assertEqual(combined, PackageFilter(include=['group:org'], exclude=['contains:test']))
+        self.assertFalse(combined.accepts('org.x:testkit:1.0'))
+        self.assertTrue(combined.accepts('org.x:core:1.0'))
+
+
+if __name__ == '__main__':
+    unittest.main()
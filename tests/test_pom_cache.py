@@ -0,0 +1,161 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from maven_parser import MavenParser, MavenRepositoryError
+from mock_maven_server import MockMavenRepository
+from pom_cache import PomCache
+
+
+class PomCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def open(self, **options) -> PomCache:
+        cache = PomCache(self.directory, **options)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_round_trip_and_reopen(self):
+        cache = self.open()
+        cache.put_pom('g:a:1.0', '<project/>', etag='"x"', last_modified='Mon')
+        cache.put_dependencies('g:a:1.0', [{'group_id': 'g', 'artifact_id': 'b'}], 3)
+        cache.close()
+
+        reopened = self.open()
+        self.assertEqual(reopened.get_pom('g:a:1.0'), '<project/>')
+        self.assertEqual(reopened.get_dependencies('g:a:1.0', 3), [{'group_id': 'g', 'artifact_id': 'b'}])
+        self.assertIsNone(reopened.get_dependencies('g:a:1.0', 4), "другой формат - промах")
+        entry = reopened.get_entry('g:a:1.0')
+        self.assertEqual((entry['etag'], entry['last_modified'], entry['fresh']), ('"x"', 'Mon', True))
+        self.assertEqual(reopened.total_bytes, cache.total_bytes)
+        self.assertIsNone(reopened.get_pom('g:other:1.0'))
+        self.assertEqual((reopened.hits, reopened.misses), (4, 1))
+
+    def test_put_pom_drops_dependencies(self):
+        cache = self.open()
+        cache.put_pom('g:a:1.0', '<project/>')
+        cache.put_dependencies('g:a:1.0', ['g:b:1.0'], 1)
+        cache.put_pom('g:a:1.0', '<project><x/></project>')
+        self.assertIsNone(cache.get_dependencies('g:a:1.0', 1))
+        self.assertEqual(cache.total_bytes, len('<project><x/></project>'))
+
+    def test_dependencies_need_pom(self):
+        cache = self.open()
+        cache.put_dependencies('g:missing:1.0', ['g:b:1.0'], 1)
+        self.assertIsNone(cache.get_dependencies('g:missing:1.0', 1))
+        self.assertEqual(cache.total_bytes, 0)
+
+    def test_lru_eviction(self):
+        cache = self.open(max_bytes=300)
+        clock = iter(range(1000, 2000))
+        with mock.patch('pom_cache.time.time', side_effect=lambda: next(clock)):
+            for name in ('a', 'b', 'c'):
+                cache.put_pom(f'g:{name}:1.0', name * 100)
+            # Обращение к a делает самой старой запись b
+            self.assertIsNotNone(cache.get_pom('g:a:1.0'))
+            cache.put_pom('g:d:1.0', 'd' * 100)
+
+        self.assertIsNone(cache.get_pom('g:b:1.0'))
+        for name in ('a', 'c', 'd'):
+            self.assertIsNotNone(cache.get_pom(f'g:{name}:1.0'))
+        self.assertLessEqual(cache.total_bytes, 300)
+
+    def test_eviction_counts_dependencies(self):
+        cache = self.open(max_bytes=250)
+        with mock.patch('pom_cache.time.time', side_effect=iter(range(1000, 2000)).__next__):
+            cache.put_pom('g:a:1.0', 'a' * 100)
+            cache.put_pom('g:b:1.0', 'b' * 100)
+            cache.put_dependencies('g:b:1.0', ['x' * 60], 1)
+        self.assertIsNone(cache.get_pom('g:a:1.0'))
+        self.assertEqual(cache.get_dependencies('g:b:1.0', 1), ['x' * 60])
+
+    def test_snapshot_staleness(self):
+        cache = self.open(snapshot_ttl=60)
+        with mock.patch('pom_cache.time.time', return_value=1000.0):
+            cache.put_pom('g:a:1.0-SNAPSHOT', '<snapshot/>')
+            cache.put_pom('g:a:1.0', '<release/>')
+        with mock.patch('pom_cache.time.time', return_value=1000.0 + 61):
+            self.assertIsNone(cache.get_pom('g:a:1.0-SNAPSHOT'))
+            self.assertEqual(cache.get_pom('g:a:1.0'), '<release/>', "релизы не устаревают")
+            self.assertEqual(cache.get_pom('g:a:1.0-SNAPSHOT', allow_stale=True), '<snapshot/>')
+            self.assertFalse(cache.get_entry('g:a:1.0-SNAPSHOT')['fresh'])
+            self.assertEqual(cache.stale_hits, 2)
+
+            cache.touch('g:a:1.0-SNAPSHOT')
+            self.assertEqual(cache.get_pom('g:a:1.0-SNAPSHOT'), '<snapshot/>')
+
+    def test_metadata_and_missing(self):
+        cache = self.open()
+        cache.put_metadata('g:a', '<metadata/>')
+        cache.put_metadata('g:none', None)
+        cache.put_missing('g:a:9.9')
+        self.assertEqual(cache.get_metadata('g:a')[0], '<metadata/>')
+        self.assertEqual(cache.get_metadata('g:none')[0], None)
+        self.assertIsNone(cache.get_metadata('g:unknown'))
+        self.assertIsNotNone(cache.get_missing('g:a:9.9'))
+
+        cache.invalidate('g:a:9.9')
+        self.assertIsNone(cache.get_missing('g:a:9.9'))
+        self.assertIsNone(cache.get_metadata('g:a'), "метаданные артефакта сбрасываются вместе с POM")
+
+    def test_clear(self):
+        cache = self.open()
+        cache.put_pom('g:a:1.0', '<project/>')
+        cache.clear()
+        self.assertIsNone(cache.get_pom('g:a:1.0'))
+        self.assertEqual(cache.total_bytes, 0)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, PomCache.DATABASE_NAME)))
+
+
+
+class OfflineParserTest(unittest.TestCase):
+    ARTIFACTS = {
+        'app:root:1.0': ['lib:core:1.0-SNAPSHOT', 'lib:util:2.0'],
+        'lib:core:1.0-SNAPSHOT': ['lib:util:2.0'],
+        'lib:util:2.0': [],
+    }
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def parser(self, url: str, **options) -> MavenParser:
+        cache = PomCache(self.directory, snapshot_ttl=0)
+        self.addCleanup(cache.close)
+        parser = MavenParser(url, cache=cache, verbose=False, **options)
+        self.addCleanup(parser.transport.close)
+        return parser
+
+    def test_offline_reads_cache(self):
+        with MockMavenRepository(self.ARTIFACTS) as repository:
+            url = repository.url
+            online = self.parser(url)
+            expected = {package: online.get_direct_dependencies(package) for package in self.ARTIFACTS}
+            requests = repository.request_count
+
+        # Сервер остановлен: офлайн-парсер обходится кэшем, в том числе устаревшей SNAPSHOT-записью
+        offline = self.parser(url, offline=True)
+        for package, dependencies in expected.items():
+            self.assertEqual(offline.get_direct_dependencies(package), dependencies)
+        self.assertEqual(requests, len(self.ARTIFACTS))
+        self.assertGreater(offline.cache.stale_hits, 0)
+        with self.assertRaises(MavenRepositoryError):
+            offline.get_direct_dependencies('lib:absent:1.0')
+
+    def test_stale_snapshot_revalidated_online(self):
+        with MockMavenRepository(self.ARTIFACTS) as repository:
+            self.parser(repository.url).get_direct_dependencies('lib:core:1.0-SNAPSHOT')
+            again = self.parser(repository.url)
+            self.assertEqual([dep['artifact_id'] for dep in again.get_direct_dependencies('lib:core:1.0-SNAPSHOT')],
+                             ['util'])
+            # Устаревшая запись перепроверена условным запросом (304), релиз - нет
+            self.assertEqual(repository.path_counts['/lib/core/1.0-SNAPSHOT/core-1.0-SNAPSHOT.pom'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+import http.client
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from dependency_graph import DependencyGraph
+from maven_parser import MavenParser
+from mock_maven_server import write_repository
+from query_server import QueryServerError, QueryService, create_server, parse_address
+import test_repository
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class QueryServerTest(unittest.TestCase):
+    """JSON API поверх графа из test_repo_cycles.txt (A -> B, C; B -> D; C -> A, F; D -> B)"""
+
+    @classmethod
+    def setUpClass(cls):
+        repository = test_repository.TestRepository(os.path.join(REPOSITORY_DIR, 'test_repo_cycles.txt'))
+        with redirect_stdout(io.StringIO()):
+            repository.load_test_repository()
+        cls.service = QueryService(lambda: DependencyGraph(test_repository=repository), ['A'], max_depth=10)
+        cls.service.rebuild(wait=True)
+        cls.server = create_server('127.0.0.1:0', cls.service)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def request(self, method: str, path: str, headers=None):
+        connection = http.client.HTTPConnection(*self.server.server_address[:2], timeout=10)
+        self.addCleanup(connection.close)
+        connection.request(method, path, headers=headers or {})
+        response = connection.getresponse()
+        self.assertEqual(response.getheader('Content-Type'), 'application/json; charset=utf-8')
+        return response.status, json.loads(response.read().decode('utf-8'))
+
+    def test_status(self):
+        status, body = self.request('GET', '/status')
+        self.assertEqual(status, 200)
+        self.assertEqual(body['roots'], ['A'])
+        self.assertEqual(body['packages'], 5)
+        self.assertEqual(body['edges'], 6)
+        self.assertIsNone(body['last_error'])
+
+    def test_closure(self):
+        status, body = self.request('GET', '/closure?package=C')
+        self.assertEqual(status, 200)
+        self.assertEqual(body['dependencies'], ['A', 'B', 'C', 'D', 'F'])
+        self.assertEqual(body['count'], 5)
+
+    def test_reverse(self):
+        status, body = self.request('GET', '/reverse?package=B&depth=1')
+        self.assertEqual(status, 200)
+        self.assertEqual(sorted(body['direct']), ['A', 'D'])
+
+    def test_cycles(self):
+        status, body = self.request('GET', '/cycles')
+        self.assertEqual(status, 200)
+        self.assertEqual(sorted(sorted(cycle) for cycle in body['cycles']), [['A', 'C'], ['B', 'D']])
+        status, body = self.request('GET', '/cycles?limit=1')
+        self.assertEqual((body['count'], len(body['cycles'])), (2, 1))
+
+    def test_path(self):
+        status, body = self.request('GET', '/path?from=A&to=D')
+        self.assertEqual((status, body['path']), (200, ['A', 'B', 'D']))
+        status, body = self.request('GET', '/path?from=F&to=A')
+        self.assertEqual((status, body['path']), (200, None))
+
+    def test_why(self):
+        status, body = self.request('GET', '/why?package=F')
+        self.assertEqual((status, body['paths']), (200, [['A', 'C', 'F']]))
+        status, body = self.request('GET', '/why?package=D&k=3&root=A')
+        self.assertEqual(body['paths'], [['A', 'B', 'D']])
+
+    def test_client_errors(self):
+        for method, path, expected in (('GET', '/closure', 400), ('GET', '/closure?package=', 400),
+                                       ('GET', '/reverse?package=A&depth=x', 400),
+                                       ('GET', '/closure?package=Z', 404), ('GET', '/unknown', 404),
+                                       ('POST', '/status', 404)):
+            with self.subTest(method=method, path=path):
+                status, body = self.request(method, path)
+                self.assertEqual(status, expected)
+                self.assertIn('error', body)
+
+    def test_malformed_content_length(self):
+        status, body = self.request('POST', '/rebuild', headers={'Content-Length': 'abc'})
+        self.assertEqual(status, 400)
+        self.assertIn('Content-Length', body['error'])
+
+    def test_internal_error(self):
+        resident = self.service.resident()
+        with mock.patch.object(resident.graph, 'find_path', side_effect=RuntimeError('сбой')):
+            status, body = self.request('GET', '/path?from=A&to=B')
+        self.assertEqual(status, 500)
+        self.assertIn('сбой', body['error'])
+
+    def test_rebuild(self):
+        generation = self.service.resident().generation
+        status, body = self.request('POST', '/rebuild?wait=1')
+        self.assertEqual(status, 200)
+        self.assertGreater(body['generation'], generation)
+        self.assertEqual(body['packages'], 5)
+
+
+class ServiceWithoutGraphTest(unittest.TestCase):
+    def test_not_built(self):
+        service = QueryService(lambda: DependencyGraph(), ['A'])
+        server = create_server('127.0.0.1:0', service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            connection = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+            connection.request('GET', '/closure?package=A')
+            response = connection.getresponse()
+            self.assertEqual(response.status, 503)
+            self.assertIn('error', json.loads(response.read()))
+            connection.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address('8080'), ('127.0.0.1', 8080))
+        self.assertEqual(parse_address('0.0.0.0:9000'), ('0.0.0.0', 9000))
+        self.assertEqual(parse_address('unix:/tmp/deps.sock'), '/tmp/deps.sock')
+        for address in ('host:port', 'unix:'):
+            with self.subTest(address=address):
+                with self.assertRaises(QueryServerError):
+                    parse_address(address)
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix-сокеты не поддерживаются")
+class UnixSocketTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'deps.sock')
+        self.service = QueryService(lambda: DependencyGraph(), ['A'])
+
+    def test_stale_socket_is_replaced_and_removed(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+
+        server = create_server('unix:' + self.path, self.service)
+        self.assertTrue(os.path.exists(self.path))
+        server.server_close()
+        self.assertFalse(os.path.lexists(self.path))
+
+    def test_other_files_are_kept(self):
+        with open(self.path, 'w') as f:
+            f.write('data')
+        target = self.path + '.target'
+        os.symlink(target, self.path + '.link')
+        for path in (self.path, self.path + '.link'):
+            with self.subTest(path=path):
+                with self.assertRaises(QueryServerError):
+                    create_server('unix:' + path, self.service)
+        with open(self.path) as f:
+            self.assertEqual(f.read(), 'data')
+        self.assertTrue(os.path.islink(self.path + '.link'))
+
+    def test_close_keeps_replaced_file(self):
+        server = create_server('unix:' + self.path, self.service)
+        os.unlink(self.path)
+        with open(self.path, 'w') as f:
+            f.write('data')
+        server.server_close()
+        self.assertTrue(os.path.isfile(self.path))
+
+
+class SharedParserTest(unittest.TestCase):
+    def test_build_restores_parser_verbosity(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        write_repository({'app:root:1.0': ['lib:core:1.0'], 'lib:core:1.0': []}, directory.name)
+        parser = MavenParser(directory.name)
+        self.addCleanup(parser.transport.close)
+
+        service = QueryService(lambda: DependencyGraph(maven_parser=parser), ['app:root:1.0'])
+        output = io.StringIO()
+        with redirect_stdout(output):
+            service.rebuild(wait=True)
+        self.assertEqual(output.getvalue(), '', "фоновая сборка ничего не выводит")
+        self.assertEqual(service.status()['packages'], 2)
+        self.assertTrue(parser.verbose)
+
+
+if __name__ == '__main__':
+    unittest.main()
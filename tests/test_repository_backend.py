@@ -0,0 +1,238 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from http_transport import HttpResponse, HttpTransport
+from maven_parser import MavenParser
+from maven_version import parse_metadata
+from mock_maven_server import MockMavenRepository, write_repository
+from repository_backend import (ChainedBackend, HedgedBackend, HttpBackend, LocalBackend, LocalResponse,
+                                RepositoryBackend, RepositoryBackendError, create_backend, metadata_path, pom_path)
+
+
+class ScriptedBackend(RepositoryBackend):
+    """Репозиторий с заданными ответами по путям; остальные пути - 404"""
+
+    def __init__(self, name: str, responses: dict = None, local: dict = None, release: threading.Event = None):
+        self.name = name
+        self.responses = responses or {}
+        self.local = local or {}
+        self.requests = []
+        self.closed = False
+        # Если задано, ответ задерживается до release.set()
+        self.release = release
+
+    def fetch(self, path, etag=None, last_modified=None):
+        self.requests.append(path)
+        if self.release is not None:
+            self.release.wait(5)
+        response = self.responses.get(path, 404)
+        if isinstance(response, Exception):
+            raise response
+        if isinstance(response, str):
+            return HttpResponse(200, response.encode('utf-8'), {}, url=self.location(path))
+        return HttpResponse(response, self.name.encode('utf-8'), {}, url=self.location(path))
+
+    def fetch_local(self, path):
+        if path in self.local:
+            return HttpResponse(200, self.local[path].encode('utf-8'), {}, url=self.location(path))
+        return None
+
+    def location(self, path):
+        return f"{self.name}/{path}"
+
+    def close(self):
+        self.closed = True
+
+
+class PathsTest(unittest.TestCase):
+    def test_layout(self):
+        self.assertEqual(pom_path('org.example.app', 'core', '1.0'), 'org/example/app/core/1.0/core-1.0.pom')
+        self.assertEqual(metadata_path('org.example', 'core'), 'org/example/core/maven-metadata.xml')
+
+
+class LocalBackendTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        write_repository({'org.example:core:1.0': ['org.example:util:2.0']}, self.directory)
+        self.path = pom_path('org.example', 'core', '1.0')
+
+    def test_fetch(self):
+        for root in (self.directory, 'file://' + self.directory):
+            with self.subTest(root=root):
+                response = LocalBackend(root).fetch(self.path)
+                self.assertIsInstance(response, LocalResponse)
+                self.assertEqual(response.status, 200)
+                self.assertEqual(response.path, os.path.join(self.directory, *self.path.split('/')))
+                self.assertIn(b'<artifactId>util</artifactId>', bytes(response.body))
+                response.body.release()
+
+    def test_missing_and_empty(self):
+        backend = LocalBackend(self.directory)
+        missing = pom_path('org.example', 'absent', '1.0')
+        self.assertIsNone(backend.fetch_local(missing))
+        self.assertEqual(backend.fetch(missing).status, 404)
+
+        empty = pom_path('org.example', 'empty', '1.0')
+        os.makedirs(os.path.dirname(backend.location(empty)))
+        open(backend.location(empty), 'wb').close()
+        self.assertEqual(bytes(backend.fetch(empty).body), b'')
+
+    def test_unreadable_path_is_backend_error(self):
+        backend = LocalBackend(self.directory)
+        # Каталог на месте файла - ошибка чтения, а не "нет в репозитории"
+        with self.assertRaises(RepositoryBackendError):
+            backend.fetch(self.path.rsplit('/', 1)[0])
+
+
+class ChainedBackendTest(unittest.TestCase):
+    def test_falls_through_not_found(self):
+        first = ScriptedBackend('first')
+        second = ScriptedBackend('second', {'a.pom': 200})
+        response = ChainedBackend([first, second]).fetch('a.pom')
+        self.assertEqual((response.status, response.url), (200, 'second/a.pom'))
+        self.assertEqual((first.requests, second.requests), (['a.pom'], ['a.pom']))
+
+    def test_first_answer_wins(self):
+        first = ScriptedBackend('first', {'a.pom': 200, 'b.pom': 500})
+        second = ScriptedBackend('second', {'a.pom': 200, 'b.pom': 200})
+        chain = ChainedBackend([first, second])
+        self.assertEqual(chain.fetch('a.pom').url, 'first/a.pom')
+        self.assertEqual(chain.fetch('b.pom').status, 500, "только 404 передает запрос дальше")
+        self.assertEqual(second.requests, [])
+
+    def test_not_found_everywhere(self):
+        response = ChainedBackend([ScriptedBackend('first'), ScriptedBackend('second')]).fetch('a.pom')
+        self.assertEqual((response.status, response.url), (404, 'second/a.pom'))
+
+    def test_errors_propagate(self):
+        chain = ChainedBackend([ScriptedBackend('first', {'a.pom': RepositoryBackendError('down')}),
+                                ScriptedBackend('second', {'a.pom': 200})])
+        with self.assertRaises(RepositoryBackendError):
+            chain.fetch('a.pom')
+
+    def test_local_and_location(self):
+        chain = ChainedBackend([ScriptedBackend('first'), ScriptedBackend('second', local={'a.pom': 'cached'})])
+        self.assertEqual(chain.fetch_local('a.pom').body, b'cached')
+        self.assertIsNone(chain.fetch_local('b.pom'))
+        self.assertEqual(chain.location('a.pom'), 'second/a.pom')
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            ChainedBackend([])
+
+
+def metadata(versions) -> str:
+    return ('<metadata><groupId>org.example</groupId><artifactId>lib</artifactId><versioning><versions>'
+            + ''.join(f'<version>{version}</version>' for version in versions)
+            + '</versions></versioning></metadata>')
+
+
+class HedgedBackendTest(unittest.TestCase):
+    POM = 'org/example/lib/1.0/lib-1.0.pom'
+    METADATA = 'org/example/lib/maven-metadata.xml'
+
+    def hedged(self, backends, **options) -> HedgedBackend:
+        backend = HedgedBackend(backends, **options)
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_fast_failure_does_not_win(self):
+        for status in (500, 503):
+            with self.subTest(status=status):
+                failing = ScriptedBackend('failing', {self.POM: status})
+                backend = self.hedged([failing, ScriptedBackend('mirror', {self.POM: 200})])
+                response = backend.fetch(self.POM)
+                self.assertEqual((response.status, response.url), (200, 'mirror/' + self.POM))
+                self.assertEqual(backend.stats()['failing']['errors'], 1)
+                self.assertEqual(backend.stats()['mirror']['wins'], 1)
+                self.assertEqual(backend.routes['org.example'], 1, "маршрут запоминается за выигравшим")
+
+    def test_not_modified_wins(self):
+        backend = self.hedged([ScriptedBackend('first', {self.POM: 304}), ScriptedBackend('second', {self.POM: 200})])
+        self.assertEqual(backend.fetch(self.POM, etag='"v1"').status, 304)
+
+    def test_slow_repository_is_hedged(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        slow = ScriptedBackend('slow', {self.POM: 200}, release=release)
+        backend = self.hedged([slow, ScriptedBackend('fast', {self.POM: 200})], initial_hedge_delay=0.01)
+        self.assertEqual(backend.fetch(self.POM).url, 'fast/' + self.POM)
+        self.assertEqual(backend.stats()['fast']['hedges'], 1)
+
+    def test_failures_everywhere(self):
+        backend = self.hedged([ScriptedBackend('first', {self.POM: 503}), ScriptedBackend('second')])
+        self.assertEqual(backend.fetch(self.POM).status, 404, "404 важнее ошибки сервера")
+        backend = self.hedged([ScriptedBackend('first', {self.POM: 503}),
+                               ScriptedBackend('second', {self.POM: RepositoryBackendError('down')})])
+        self.assertEqual(backend.fetch(self.POM).status, 503)
+
+    def test_metadata_is_merged(self):
+        backends = [ScriptedBackend('central', {self.METADATA: metadata(['1.0', '1.1'])}),
+                    ScriptedBackend('google', {self.METADATA: metadata(['1.1', '2.0'])}),
+                    ScriptedBackend('mirror', {self.METADATA: 503})]
+        response = self.hedged(backends).fetch(self.METADATA)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(parse_metadata(str(response.body, 'utf-8'))['versions'], ['1.0', '1.1', '2.0'])
+        self.assertTrue(all(backend.requests == [self.METADATA] for backend in backends))
+
+    def test_metadata_from_mock_repositories(self):
+        central = self.enterContext(MockMavenRepository({'lib:core:1.0': [], 'lib:core:1.1': []}))
+        google = self.enterContext(MockMavenRepository({'lib:core:2.0': []}))
+        transport = HttpTransport()
+        self.addCleanup(transport.close)
+        backend = self.hedged([HttpBackend(central.url, transport), HttpBackend(google.url, transport)])
+        response = backend.fetch(metadata_path('lib', 'core'))
+        self.assertEqual(parse_metadata(str(response.body, 'utf-8'))['versions'], ['1.0', '1.1', '2.0'])
+
+    def test_close(self):
+        backends = [ScriptedBackend('first'), ScriptedBackend('second')]
+        backend = HedgedBackend(backends)
+        backend.close()
+        self.assertTrue(all(child.closed for child in backends))
+        with self.assertRaises(RuntimeError):
+            backend.fetch(self.POM)
+
+
+class CreateBackendTest(unittest.TestCase):
+    def test_kinds(self):
+        self.assertIsInstance(create_backend('http://repo.test/maven2'), HttpBackend)
+        self.assertIsInstance(create_backend('/var/repository'), LocalBackend)
+        chain = create_backend('https://repo.test', local_repository='/var/repository')
+        self.assertIsInstance(chain, ChainedBackend)
+        self.assertEqual([type(backend) for backend in chain.backends], [LocalBackend, HttpBackend])
+
+    def test_hedged_pool_follows_concurrency(self):
+        mirrors = ['https://mirror.test', 'https://google.test']
+        backend = create_backend('https://repo.test', mirrors=mirrors, concurrency=8)
+        self.addCleanup(backend.close)
+        self.assertIsInstance(backend, HedgedBackend)
+        self.assertEqual(backend._executor._max_workers, 8 * 3)
+
+        chain = create_backend('https://repo.test', local_repository='/var/repository', mirrors=mirrors)
+        chain.close()
+        self.assertEqual(chain.backends[1]._executor._max_workers, 3)
+        with self.assertRaises(RuntimeError):
+            chain.backends[1]._executor.submit(print)
+
+    def test_parser_prefers_local_repository(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        write_repository({'app:root:1.0': ['lib:local:1.0']}, directory.name)
+
+        with MockMavenRepository({'app:root:1.0': ['lib:remote:1.0'], 'lib:other:1.0': []}) as repository:
+            transport = HttpTransport()
+            self.addCleanup(transport.close)
+            parser = MavenParser(repository.url, transport=transport, verbose=False,
+                                 backend=create_backend(repository.url, transport, local_repository=directory.name))
+            self.assertEqual([dep['artifact_id'] for dep in parser.get_direct_dependencies('app:root:1.0')],
+                             ['local'])
+            self.assertEqual(parser.get_direct_dependencies('lib:other:1.0'), [])
+            self.assertEqual(repository.request_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import test_repository
+from test_repository import INDEX_HEADER, INDEX_SUFFIX, LineIndex
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONTENT = """\
+A: B, C
+B: D
+
+# строка без двоеточия пропускается
+C: D, Ж
+A: C, E
+Ж:
+D:
+"""
+
+
+class TestRepositoryTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = self.write('repo.txt', CONTENT)
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def load(self, path: str, **options):
+        repository = test_repository.TestRepository(path, **options)
+        repository.load_test_repository()
+        return repository
+
+    def assertSameDependencies(self, path: str, packages):
+        plain = self.load(path)
+        indexed = self.load(path, indexed=True)
+        for package in packages:
+            self.assertEqual(indexed.get_dependencies(package), plain.get_dependencies(package), package)
+
+    def test_plain(self):
+        repository = self.load(self.path)
+        self.assertEqual(repository.graph, {'A': ['B', 'C', 'E'], 'B': ['D'], 'C': ['D', 'Ж'], 'Ж': [], 'D': []})
+        self.assertEqual(repository.get_dependencies('absent'), [])
+
+    def test_indexed_matches_plain(self):
+        self.assertSameDependencies(self.path, ['A', 'B', 'C', 'D', 'E', 'Ж', 'absent'])
+        for name in ('test_repo_complex.txt', 'test_repo_cycles.txt'):
+            with self.subTest(name=name):
+                with open(os.path.join(REPOSITORY_DIR, name), encoding='utf-8') as f:
+                    path = self.write(name, f.read())
+                self.assertSameDependencies(path, self.load(path).graph)
+
+    def test_index_is_written_and_reused(self):
+        repository = self.load(self.path, indexed=True)
+        self.assertTrue(os.path.exists(self.path + INDEX_SUFFIX))
+        self.assertIn('A', repository.index)
+        self.assertNotIn('E', repository.index, "E встречается только как зависимость")
+
+        with mock.patch.object(LineIndex, '_build', wraps=LineIndex._build) as build:
+            self.assertEqual(self.load(self.path, indexed=True).get_dependencies('A'), ['B', 'C', 'E'])
+        build.assert_not_called()
+
+    def test_index_is_rebuilt_when_source_changes(self):
+        self.load(self.path, indexed=True)
+        stat = os.stat(self.path)
+        # Тот же размер, другое содержимое и время изменения
+        self.write('repo.txt', CONTENT.replace('B: D', 'B: F'))
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.load(self.path, indexed=True).get_dependencies('B'), ['F'])
+
+        self.write('repo.txt', CONTENT + 'F: A\n')
+        self.assertEqual(self.load(self.path, indexed=True).get_dependencies('F'), ['A'])
+
+    def test_damaged_index_is_rebuilt(self):
+        index_path = self.path + INDEX_SUFFIX
+        for damaged in (b'', b'x' * (INDEX_HEADER.size - 1), b'NOTINDEX' + bytes(INDEX_HEADER.size)):
+            with self.subTest(damaged=damaged[:8]):
+                with open(index_path, 'wb') as f:
+                    f.write(damaged)
+                self.assertEqual(self.load(self.path, indexed=True).get_dependencies('C'), ['D', 'Ж'])
+                self.assertGreater(os.path.getsize(index_path), INDEX_HEADER.size)
+
+    def test_unwritable_index_stays_in_memory(self):
+        index_path = os.path.join(self.directory, 'missing', 'repo.idx')
+        output = io.StringIO()
+        with redirect_stdout(output):
+            repository = self.load(self.path, indexed=True, index_path=index_path)
+        self.assertEqual(repository.get_dependencies('A'), ['B', 'C', 'E'])
+        self.assertIn('Предупреждение', output.getvalue())
+        self.assertFalse(os.path.exists(index_path))
+
+    def test_empty_file(self):
+        path = self.write('empty.txt', '')
+        self.assertEqual(self.load(path, indexed=True).get_dependencies('A'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
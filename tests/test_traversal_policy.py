@@ -0,0 +1,86 @@
+import unittest
+
+from traversal_policy import (ALL_SCOPES, DEFAULT_EDGE, SCOPE_PROPAGATION, TraversalPolicy, TraversalPolicyError,
+                              edge_attributes, parse_scopes)
+
+
+class ScopePropagationTest(unittest.TestCase):
+    def test_root_edges_keep_declared_scope(self):
+        policy = TraversalPolicy()
+        for scope in ALL_SCOPES:
+            with self.subTest(scope=scope):
+                self.assertEqual(policy.follow(None, frozenset(), 'g:a:1', (scope, False, ())),
+                                 (scope, frozenset()))
+
+    def test_transitive_scopes(self):
+        policy = TraversalPolicy()
+        for parent_scope in ALL_SCOPES:
+            for declared_scope in ALL_SCOPES:
+                with self.subTest(parent=parent_scope, declared=declared_scope):
+                    result = policy.follow(parent_scope, frozenset(), 'g:a:1', (declared_scope, False, ()))
+                    expected = SCOPE_PROPAGATION.get((parent_scope, declared_scope))
+                    self.assertEqual(result[0] if result else None, expected)
+
+    def test_maven_table(self):
+        # Таблица из документации Maven (Dependency Scope)
+        self.assertEqual(SCOPE_PROPAGATION[('compile', 'runtime')], 'runtime')
+        self.assertEqual(SCOPE_PROPAGATION[('provided', 'compile')], 'provided')
+        self.assertEqual(SCOPE_PROPAGATION[('test', 'runtime')], 'test')
+        for parent_scope in ('compile', 'provided', 'runtime', 'test'):
+            self.assertNotIn((parent_scope, 'provided'), SCOPE_PROPAGATION)
+            self.assertNotIn((parent_scope, 'test'), SCOPE_PROPAGATION)
+
+    def test_scope_selection(self):
+        policy = TraversalPolicy(scopes={'compile', 'runtime'})
+        self.assertIsNone(policy.follow(None, frozenset(), 'g:a:1', ('test', False, ())))
+        self.assertIsNone(policy.follow('test', frozenset(), 'g:a:1', ('compile', False, ())))
+        self.assertEqual(policy.follow('runtime', frozenset(), 'g:a:1', ('compile', False, ()))[0], 'runtime')
+        self.assertEqual(policy.follow('compile', frozenset(), 'g:a:1', ('runtime', False, ()))[0], 'runtime')
+
+
+class OptionalAndExclusionsTest(unittest.TestCase):
+    def test_optional_only_at_root(self):
+        policy = TraversalPolicy()
+        self.assertIsNotNone(policy.follow(None, frozenset(), 'g:a:1', ('compile', True, ())))
+        self.assertIsNone(policy.follow('compile', frozenset(), 'g:a:1', ('compile', True, ())))
+        included = TraversalPolicy(include_optional=True)
+        self.assertIsNotNone(included.follow('compile', frozenset(), 'g:a:1', ('compile', True, ())))
+
+    def test_exclusions_accumulate(self):
+        policy = TraversalPolicy()
+        scope, exclusions = policy.follow(None, frozenset(), 'g:a:1', ('compile', False, ('org.bad:lib', 'junk:*')))
+        self.assertEqual(exclusions, frozenset({('org.bad', 'lib'), ('junk', '*')}))
+        self.assertIsNone(policy.follow(scope, exclusions, 'org.bad:lib:2.0', DEFAULT_EDGE))
+        self.assertIsNone(policy.follow(scope, exclusions, 'junk:anything:1.0', DEFAULT_EDGE))
+        self.assertIsNotNone(policy.follow(scope, exclusions, 'org.bad:other:1.0', DEFAULT_EDGE))
+
+        scope, deeper = policy.follow(scope, exclusions, 'g:b:1', ('compile', False, ('*:log',)))
+        self.assertEqual(deeper, exclusions | {('*', 'log')})
+        self.assertIsNone(policy.follow(scope, deeper, 'any.group:log:1', DEFAULT_EDGE))
+
+    def test_exclusions_disabled(self):
+        policy = TraversalPolicy(apply_exclusions=False)
+        excluded = frozenset({('org.bad', 'lib')})
+        self.assertEqual(policy.follow('compile', excluded, 'org.bad:lib:1', DEFAULT_EDGE), ('compile', excluded))
+
+
+class ParsingTest(unittest.TestCase):
+    def test_parse_scopes(self):
+        self.assertEqual(parse_scopes('compile, runtime'), frozenset({'compile', 'runtime'}))
+        self.assertIsNone(parse_scopes(' , '))
+        with self.assertRaises(TraversalPolicyError):
+            parse_scopes('compile,shipping')
+
+    def test_edge_attributes(self):
+        self.assertEqual(edge_attributes({'package': 'g:a:1'}), DEFAULT_EDGE)
+        self.assertEqual(edge_attributes({'scope': 'test', 'optional': True, 'exclusions': ['x:y']}),
+                         ('test', True, ('x:y',)))
+
+    def test_policy_equality(self):
+        self.assertEqual(TraversalPolicy(scopes=['compile']), TraversalPolicy(scopes={'compile'}))
+        self.assertEqual(TraversalPolicy(), TraversalPolicy(scopes=ALL_SCOPES))
+        self.assertNotEqual(TraversalPolicy(), TraversalPolicy(include_optional=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
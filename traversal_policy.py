@@ -0,0 +1,132 @@
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+
+# Все области видимости Maven
+ALL_SCOPES = ('compile', 'provided', 'runtime', 'test', 'system', 'import')
+
+# Распространение областей видимости Maven: (область ребра к родителю,
+# объявленная область зависимости) -> область транзитивной зависимости.
+# Отсутствующие пары означают, что зависимость транзитивно не наследуется.
+SCOPE_PROPAGATION = {
+    ('compile', 'compile'): 'compile',
+    ('compile', 'runtime'): 'runtime',
+    ('provided', 'compile'): 'provided',
+    ('provided', 'runtime'): 'provided',
+    ('runtime', 'compile'): 'runtime',
+    ('runtime', 'runtime'): 'runtime',
+    ('test', 'compile'): 'test',
+    ('test', 'runtime'): 'test',
+}
+
+# Атрибуты ребра: область видимости, optional, исключения "groupId:artifactId"
+EdgeAttributes = Tuple[str, bool, Tuple[str, ...]]
+DEFAULT_EDGE = ('compile', False, ())
+
+
+class TraversalPolicyError(Exception):
+    """Ошибка настройки политики обхода"""
+    pass
+
+
+def edge_attributes(dependency: Dict) -> EdgeAttributes:
+    """Атрибуты ребра из записи зависимости MavenParser"""
+    return (
+        dependency.get('scope') or 'compile',
+        bool(dependency.get('optional')),
+        tuple(dependency.get('exclusions') or ())
+    )
+
+
+def parse_scopes(value: str) -> Optional[FrozenSet[str]]:
+    """
+    Разбирает список областей видимости через запятую
+
+    Returns:
+        Множество областей или None для пустой строки
+
+    Raises:
+        TraversalPolicyError: Если указана неизвестная область
+    """
+    scopes = frozenset(scope.strip() for scope in value.split(',') if scope.strip())
+    unknown = scopes - set(ALL_SCOPES)
+    if unknown:
+        raise TraversalPolicyError(
+            f"Неизвестные области видимости: {', '.join(sorted(unknown))}. Допустимы: {', '.join(ALL_SCOPES)}"
+        )
+    return scopes or None
+
+
+class TraversalPolicy:
+    """
+    Правила выбора ребер при обходе графа по аналогии с Maven
+
+    Область видимости транзитивной зависимости вычисляется по таблице
+    SCOPE_PROPAGATION от области ребра, по которому достигнут пакет;
+    provided и test транзитивно не наследуются. Optional-зависимости
+    берутся только у корня (если не включен include_optional), исключения
+    накапливаются вдоль пути от корня. Ребро, не прошедшее проверку,
+    в граф не добавляется, и его POM не загружается.
+    """
+
+    def __init__(self, scopes: Optional[Iterable[str]] = None, include_optional: bool = False,
+                 apply_exclusions: bool = True):
+        self.scopes = frozenset(scopes) if scopes else frozenset(ALL_SCOPES)
+        self.include_optional = include_optional
+        self.apply_exclusions = apply_exclusions
+
+    def _key(self):
+        return self.scopes, self.include_optional, self.apply_exclusions
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, TraversalPolicy) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def follow(self, parent_scope: Optional[str], parent_exclusions: FrozenSet[Tuple[str, str]],
+               package: str, attributes: EdgeAttributes) -> Optional[Tuple[str, FrozenSet[Tuple[str, str]]]]:
+        """
+        Решает, следовать ли по ребру
+
+        Args:
+            parent_scope: Область пакета-источника (None для корня)
+            parent_exclusions: Исключения, накопленные на пути к источнику
+            package: Идентификатор зависимости "g:a:v"
+            attributes: Атрибуты ребра (см. edge_attributes)
+
+        Returns:
+            (область, исключения) для зависимости или None, если ребро отбрасывается
+        """
+        declared_scope, optional, exclusions = attributes
+
+        if parent_scope is None:
+            scope = declared_scope
+        else:
+            if optional and not self.include_optional:
+                return None
+            scope = SCOPE_PROPAGATION.get((parent_scope, declared_scope))
+            if scope is None:
+                return None
+
+        if scope not in self.scopes:
+            return None
+
+        if not self.apply_exclusions:
+            return scope, parent_exclusions
+        if parent_exclusions and _is_excluded(package, parent_exclusions):
+            return None
+        if exclusions:
+            parent_exclusions = parent_exclusions | frozenset(
+                tuple(exclusion.split(':', 1)) for exclusion in exclusions if ':' in exclusion
+            )
+        return scope, parent_exclusions
+
+
+def _is_excluded(package: str, exclusions: FrozenSet[Tuple[str, str]]) -> bool:
+    """Попадает ли пакет под исключение; '*' совпадает с любым значением"""
+    parts = package.split(':')
+    if len(parts) < 2:
+        return False
+    group_id, artifact_id = parts[0], parts[1]
+    return any((excluded_group in ('*', group_id)) and (excluded_artifact in ('*', artifact_id))
+               for excluded_group, excluded_artifact in exclusions)
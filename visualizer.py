@@ -1,11 +1,61 @@
+import sys
+from typing import Iterator, TextIO
+
+from profiler import DISABLED, Profiler
+
+
+# Символы, недопустимые в идентификаторах PlantUML, заменяются на '_'
+ID_TRANSLATION = str.maketrans(':.-', '___')
+
+# Сколько строк накапливать перед записью в поток
+WRITE_BATCH_LINES = 1024
+
+
 class PlantUMLVisualizer:
-    def __init__(self):
+    def __init__(self, profiler: Profiler = DISABLED):
         self.plantuml_code = ""
-    
+        self._id_cache = {}
+        self.profiler = profiler
+
     def generate_plantuml(self, graph: dict, root_package: str, title: str = "Граф зависимостей"):
         """Генерирует PlantUML код для графа зависимостей"""
-        
-        self.plantuml_code = f"""@startuml
+        with self.profiler.phase('plantuml'):
+            self.plantuml_code = ''.join(self.iter_plantuml(graph, root_package, title))
+        self.profiler.count('plantuml.characters', len(self.plantuml_code))
+        return self.plantuml_code
+
+    def iter_plantuml(self, graph: dict, root_package: str, title: str = "Граф зависимостей") -> Iterator[str]:
+        """
+        Генерирует PlantUML код по частям
+
+        Узлы и ребра выдаются по мере формирования, поэтому весь документ
+        не собирается в памяти; результат совпадает с generate_plantuml.
+        """
+        yield self._header(root_package, title)
+
+        # Добавляем все пакеты
+        all_packages = set()
+        for package, dependencies in graph.items():
+            all_packages.add(package)
+            all_packages.update(dependencies)
+
+        for package in sorted(all_packages):
+            if package != root_package:
+                yield f'node "{package}" as {self._sanitize_id(package)}\n'
+
+        yield "\n"
+
+        # Добавляем зависимости
+        for package, dependencies in graph.items():
+            source_id = 'root' if package == root_package else self._sanitize_id(package)
+            for dep in dependencies:
+                yield f'{source_id} --> {self._sanitize_id(dep)}\n'
+
+        yield "@enduml"
+
+    def _header(self, root_package: str, title: str) -> str:
+        """Заголовок диаграммы со стилями и корневым пакетом"""
+        return f"""@startuml
 title {title}
 skinparam monochrome true
 skinparam shadowing false
@@ -23,44 +73,61 @@ skinparam node {{
 node "{root_package}" as root #LightBlue
 
 """
-        
-        # Добавляем все пакеты
-        all_packages = set()
-        for package, dependencies in graph.items():
-            all_packages.add(package)
-            all_packages.update(dependencies)
-        
-        for package in sorted(all_packages):
-            if package != root_package:
-                self.plantuml_code += f'node "{package}" as {self._sanitize_id(package)}\n'
-        
-        self.plantuml_code += "\n"
-        
-        # Добавляем зависимости
-        for package, dependencies in graph.items():
-            for dep in dependencies:
-                if package == root_package:
-                    self.plantuml_code += f'root --> {self._sanitize_id(dep)}\n'
-                else:
-                    self.plantuml_code += f'{self._sanitize_id(package)} --> {self._sanitize_id(dep)}\n'
-        
-        self.plantuml_code += "@enduml"
-        return self.plantuml_code
-    
+
+    def write_plantuml(self, graph: dict, root_package: str, stream: TextIO, title: str = "Граф зависимостей"):
+        """
+        Записывает PlantUML код в файлоподобный объект, не храня его целиком
+
+        Args:
+            graph: Граф зависимостей
+            root_package: Корневой пакет
+            stream: Объект с методом write
+            title: Заголовок диаграммы
+        """
+        with self.profiler.phase('plantuml'):
+            batch = []
+            written = 0
+            for chunk in self.iter_plantuml(graph, root_package, title):
+                batch.append(chunk)
+                if len(batch) >= WRITE_BATCH_LINES:
+                    written += stream.write(''.join(batch)) or 0
+                    batch.clear()
+            written += stream.write(''.join(batch)) or 0
+        self.profiler.count('plantuml.characters', written)
+
     def _sanitize_id(self, package_name: str) -> str:
         """Создает валидный идентификатор для PlantUML"""
-        return package_name.replace(':', '_').replace('.', '_').replace('-', '_')
-    
+        sanitized = self._id_cache.get(package_name)
+        if sanitized is None:
+            sanitized = package_name.translate(ID_TRANSLATION)
+            self._id_cache[package_name] = sanitized
+        return sanitized
+
     def save_to_file(self, filename: str):
         """Сохраняет PlantUML код в файл"""
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(self.plantuml_code)
         print(f"PlantUML код сохранен в: {filename}")
-    
+
+    def save_plantuml(self, graph: dict, root_package: str, filename: str, title: str = "Граф зависимостей"):
+        """Потоково записывает PlantUML код графа в файл"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            self.write_plantuml(graph, root_package, f, title)
+        print(f"PlantUML код сохранен в: {filename}")
+
     def display_plantuml_code(self):
         """Выводит PlantUML код на экран"""
         print("\n" + "="*60)
         print("PLANTUML КОД:")
         print("="*60)
         print(self.plantuml_code)
-        print("="*60)
\ No newline at end of file
+        print("="*60)
+
+    def display_plantuml(self, graph: dict, root_package: str, title: str = "Граф зависимостей"):
+        """Потоково выводит PlantUML код графа на экран"""
+        print("\n" + "="*60)
+        print("PLANTUML КОД:")
+        print("="*60)
+        self.write_plantuml(graph, root_package, sys.stdout, title)
+        print()
+        print("="*60)